@@ -4,6 +4,10 @@ from authn.models import authns
 
 class AdminRequiredMixin:
     def is_admin(self, request):
+        role = getattr(request.user, 'role', None)
+        if role is not None:
+            return role == 'ADMIN'
+        
         student_number = request.user.student_number
         try:
             auth_user = authns.objects.get(student_number=student_number)
@@ -27,6 +31,11 @@ class IsAdmin(permissions.BasePermission):
         if not request.user or not request.user.is_authenticated:
             return False
         
+        # 인증 시 확인된 role 사용 (IsLoginUser의 AuthPrincipal)
+        role = getattr(request.user, 'role', None)
+        if role is not None:
+            return role == 'ADMIN'
+        
         # 학번으로 role 확인
         try:
             auth_user = authns.objects.get(student_number=request.user.student_number)
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class AuthnConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'authn'
+
+    def ready(self):
+        import authn.signals
@@ -10,4 +10,7 @@ class AuthnService:
         return self.authn_repository.get_authn_user_id_by_student_number(student_number)
     
     def get_authn_by_user_id(self, user_id: str):
-        return self.authn_repository.get_authn_by_user_id(user_id)
\ No newline at end of file
+        return self.authn_repository.get_authn_by_user_id(user_id)
+    
+    def get_authns_by_student_numbers(self, student_numbers: list):
+        return self.authn_repository.get_authns_by_student_numbers(student_numbers)
@@ -0,0 +1,81 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import AccessToken
+from authn.models import authns
+from core.middleware.auth_principal import AuthPrincipalCache
+from core.middleware.authentication import IsLoginUser, IsStatelessLoginUser
+from core.middleware.jwt import CustomLoginJwtToken, cipher_suite, decrypt_cache, decrypt_student_number
+
+
+class Command(BaseCommand):
+    help = '요청당 인증 처리 시간(student_number 복호화 + 사용자 조회)을 캐시 적용 전후로 측정합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=1000, help='단계별 반복 횟수')
+        parser.add_argument('--student-number', type=str, default=None, help='측정에 사용할 학번 (기본값: 첫 번째 사용자)')
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        student_number = options['student_number']
+
+        authn = authns.objects.filter(student_number=student_number).first() if student_number else authns.objects.first()
+        if not authn:
+            raise CommandError('측정에 사용할 사용자가 없습니다.')
+
+        token = AccessToken(str(CustomLoginJwtToken.get_token(authn).access_token))
+        claim = token['student_number']
+        expires_at = token['exp']
+
+        def fernet_only():
+            cipher_suite.decrypt(claim.encode()).decode()
+
+        def memoized_decrypt():
+            decrypt_student_number(claim, expires_at=expires_at)
+
+        def uncached_auth():
+            # 기존 방식: 요청마다 복호화 + authns 조회
+            authns.objects.get(student_number=cipher_suite.decrypt(claim.encode()).decode())
+
+        def memoized_auth():
+            authns.objects.get(student_number=decrypt_student_number(claim, expires_at=expires_at))
+
+        authentication = IsLoginUser()
+
+        def cached_auth():
+            authentication.get_user(token)
+
+        stateless_authentication = IsStatelessLoginUser()
+
+        def stateless_auth():
+            # 토큰 클레임 + Redis 토큰 버전 확인 (토큰에 클레임이 없으면 IsLoginUser와 같음)
+            stateless_authentication.get_user(token)
+
+        decrypt_cache.clear()
+        AuthPrincipalCache().local_cache.clear()
+
+        self.stdout.write(f'사용자 {authn.student_number}, 단계별 {iterations}회 반복')
+        results = [
+            ('Fernet 복호화', self._measure(fernet_only, iterations)),
+            ('복호화 메모', self._measure(memoized_decrypt, iterations)),
+            ('인증: 복호화 + DB 조회', self._measure(uncached_auth, iterations)),
+            ('인증: 복호화 메모 + DB 조회', self._measure(memoized_auth, iterations)),
+            ('인증: IsLoginUser (사용자 캐시)', self._measure(cached_auth, iterations)),
+            ('인증: IsStatelessLoginUser (토큰 클레임)', self._measure(stateless_auth, iterations)),
+        ]
+
+        baseline = results[2][1]
+        for label, elapsed_us in results:
+            self.stdout.write(f'{label:<32} {elapsed_us:10.2f} us/요청')
+        self.stdout.write(self.style.SUCCESS(
+            f'요청당 인증 오버헤드: {baseline:.2f} us -> {results[-1][1]:.2f} us '
+            f'({baseline / max(results[-1][1], 1e-9):.1f}배)'
+        ))
+
+    @staticmethod
+    def _measure(func, iterations):
+        """한 번 예열 후 평균 실행 시간(마이크로초) 반환"""
+        func()
+        start_time = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        return (time.perf_counter() - start_time) / iterations * 1_000_000
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 16:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authn', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='authns',
+            name='token_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
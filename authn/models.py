@@ -36,6 +36,8 @@ class authns(AbstractBaseUser):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     deleted_at = models.DateTimeField(null=True, blank=True)
+    # 발급된 토큰의 token_version 클레임과 비교하는 현재 버전 (권한 변경, 삭제 표시 시 증가)
+    token_version = models.PositiveIntegerField(default=0)
 
     last_login = None
 
@@ -44,8 +46,43 @@ class authns(AbstractBaseUser):
     USERNAME_FIELD = 'student_number'
     REQUIRED_FIELDS = []
 
+    # 변경되면 이미 발급된 토큰을 무효화해야 하는 필드 (권한, 삭제 여부)
+    TOKEN_REVOKING_FIELDS = ('role', 'deleted_at')
+
     def __str__(self):
         return self.student_number
+
+    @property
+    def is_active(self):
+        """삭제 표시(deleted_at)가 없는 사용자만 활성 (AbstractBaseUser의 항상 True인 속성 대체)"""
+        return self.deleted_at is None
+
+    def save(self, *args, **kwargs):
+        # token_version은 signal에서 DB 값 기준으로만 증가시키므로
+        # 기존 행 전체 저장 시 읽어 둔(이전) 버전으로 덮어쓰지 않도록 제외
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            deferred_fields = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'token_version' and field.attname not in deferred_fields
+            ]
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # 저장 시 토큰 무효화 여부를 판단할 수 있도록 DB에서 읽은 값 보관
+        instance._loaded_token_state = instance.get_token_state()
+        return instance
+
+    def get_token_state(self):
+        """토큰 무효화 대상 필드의 현재 값 (지연 로딩된 필드는 제외)"""
+        deferred_fields = self.get_deferred_fields()
+        return {
+            field: getattr(self, field)
+            for field in self.TOKEN_REVOKING_FIELDS
+            if field not in deferred_fields
+        }
     
     @classmethod
     def get_by_student_number(cls, student_number):
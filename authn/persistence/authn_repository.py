@@ -22,4 +22,7 @@ class AuthnRepository:
 
         if not authn:
             raise CabinetNotFoundException(user_id=user_id)
-        return authn
\ No newline at end of file
+        return authn
+    
+    def get_authns_by_student_numbers(self, student_numbers : list):
+        return authns.objects.filter(student_number__in=student_numbers).only('id', 'student_number', 'user_id')
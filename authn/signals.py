@@ -0,0 +1,67 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from authn.models import authns
+from core.middleware.auth_principal import AuthPrincipalCache
+from core.middleware.token_version import TokenVersionStore
+import logging
+
+logger = logging.getLogger(__name__)
+
+@receiver(post_save, sender=authns)
+@receiver(post_delete, sender=authns)
+def invalidate_auth_principal(sender, instance, **kwargs):
+    """사용자 삭제 또는 권한 변경 시 커밋 후 인증 사용자 캐시 삭제"""
+    student_number = instance.student_number
+    transaction.on_commit(lambda: AuthPrincipalCache().invalidate(student_number))
+
+
+def _revoke_issued_tokens(instance):
+    """
+    DB의 토큰 버전을 올려 발급된 토큰 무효화 (변경과 같은 트랜잭션에서 커밋/롤백)
+
+    캐시된 이전 버전은 바로 삭제하며, Redis 오류 시 예외를 전달하여 저장 자체가 실패하게 합니다.
+    커밋 전에 이전 버전을 다시 캐시한 요청이 있을 수 있으므로 커밋 후 새 버전으로 캐시를 갱신합니다.
+    """
+    authns.objects.filter(pk=instance.pk).update(token_version=F('token_version') + 1)
+    instance.refresh_from_db(fields=['token_version'])
+    student_number = instance.student_number
+    token_version = instance.token_version
+    TokenVersionStore().invalidate(student_number)
+    transaction.on_commit(lambda: TokenVersionStore().set(student_number, token_version))
+
+
+def _is_token_state_changed(instance, update_fields):
+    """권한/삭제 여부가 DB에서 읽은 값과 달라졌는지 확인"""
+    if update_fields is not None and not set(update_fields) & set(authns.TOKEN_REVOKING_FIELDS):
+        return False
+    loaded_state = getattr(instance, '_loaded_token_state', None)
+    if loaded_state is None:
+        # DB에서 읽지 않은 인스턴스는 비교할 값이 없으므로 변경된 것으로 간주
+        return True
+    return any(loaded_state.get(field) != value for field, value in instance.get_token_state().items())
+
+
+@receiver(post_save, sender=authns)
+def revoke_tokens_on_change(sender, instance, created=False, update_fields=None, **kwargs):
+    """권한 또는 삭제 여부 변경 시 토큰 버전을 올려 발급된 토큰 무효화"""
+    if not created and _is_token_state_changed(instance, update_fields):
+        _revoke_issued_tokens(instance)
+    # 같은 인스턴스를 다시 저장할 때는 이번에 저장한 값과 비교
+    instance._loaded_token_state = instance.get_token_state()
+
+
+@receiver(post_delete, sender=authns)
+def revoke_tokens_on_delete(sender, instance, **kwargs):
+    """사용자 삭제 시 캐시된 토큰 버전 삭제 (DB에 사용자가 없으므로 발급된 토큰은 거부됨)"""
+    student_number = instance.student_number
+    TokenVersionStore().invalidate(student_number)
+
+    def on_commit():
+        # 커밋 전에 이전 버전을 다시 캐시한 요청이 있을 수 있으므로 한 번 더 삭제
+        try:
+            TokenVersionStore().invalidate(student_number)
+        except Exception as e:
+            logger.error(f"삭제된 사용자의 토큰 버전 캐시 삭제 중 오류: {str(e)}")
+    transaction.on_commit(on_commit)
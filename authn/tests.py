@@ -1,3 +1,222 @@
+from unittest import mock
+
+from django.db import transaction
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+
+from authn.models import RoleEnum, authns
+from core.middleware.auth_principal import AuthPrincipalCache
+from core.middleware.authentication import IsAdminUser, IsLoginUser, IsStatelessLoginUser, IsValidRefreshToken
+from core.middleware.jwt import CustomLoginJwtToken, encrypt_student_number
+from core.middleware.token_version import TokenVersionStore
+from core.tests.fixtures import CabinetFixtureMixin, FakeRedisMixin
+
+
+class AuthPrincipalCacheTest(FakeRedisMixin, CabinetFixtureMixin, TestCase):
+    """토큰 사용자 캐시 테스트 (프로세스 로컬 캐시 + fakeredis 공유 캐시)"""
+
+    def setUp(self):
+        super().setUp()
+        AuthPrincipalCache().local_cache.clear()
+        self.addCleanup(AuthPrincipalCache().local_cache.clear)
+        self.building = self.create_building()
+        self.user = self.create_user("20240001")
+        self.authn = self.user.authn_info
+        self.token = {'student_number': encrypt_student_number("20240001")}
+
+    def test_cached_principal_skips_db(self):
+        """같은 토큰의 두 번째 인증은 DB를 조회하지 않아야 함"""
+        IsLoginUser().get_user(self.token)
+        with self.assertNumQueries(0):
+            principal = IsLoginUser().get_user(self.token)
+        self.assertEqual(principal.user_id_id, self.user.id)
+        self.assertEqual(principal.student_number, "20240001")
+
+    def test_shared_cache_serves_other_processes(self):
+        """로컬 캐시가 비어 있어도 Redis 공유 캐시에 있으면 DB를 조회하지 않아야 함"""
+        IsLoginUser().get_user(self.token)
+        # 다른 프로세스처럼 로컬 캐시만 비움
+        AuthPrincipalCache().local_cache.clear()
+        with self.assertNumQueries(0):
+            principal = IsLoginUser().get_user(self.token)
+        self.assertEqual(principal.user_id_id, self.user.id)
+
+    def test_soft_deleted_user_is_inactive(self):
+        """삭제 표시된 사용자는 user_inactive로 인증이 거부되어야 함"""
+        IsLoginUser().get_user(self.token)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.authn.deleted_at = timezone.now()
+            self.authn.save()
+
+        with self.assertRaises(AuthenticationFailed) as context:
+            IsLoginUser().get_user(self.token)
+        self.assertEqual(context.exception.detail['code'], 'user_inactive')
+
+    def test_role_change_invalidates_principal(self):
+        """권한 변경 후에는 바뀐 권한으로 인증되어야 함"""
+        self.assertEqual(IsLoginUser().get_user(self.token).role, RoleEnum.NORMAL.value)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.authn.role = RoleEnum.ADMIN.value
+            self.authn.save()
+        self.assertEqual(IsAdminUser().get_user(self.token).role, RoleEnum.ADMIN.value)
+
+
+class TokenRevocationTest(FakeRedisMixin, CabinetFixtureMixin, TestCase):
+    """토큰 버전 기반 토큰 무효화 테스트 (fakeredis)"""
+
+    def setUp(self):
+        super().setUp()
+        AuthPrincipalCache().local_cache.clear()
+        self.building = self.create_building()
+        self.user = self.create_user("20240001")
+        self.authn = self.user.authn_info
+        self.token = {
+            'student_number': encrypt_student_number("20240001"),
+            'user_id': self.user.id,
+            'role': RoleEnum.NORMAL.value,
+            'token_version': 0,
+        }
+
+    def _version(self):
+        return authns.objects.get(pk=self.authn.pk).token_version
+
+    def _save(self, **fields):
+        with self.captureOnCommitCallbacks(execute=True):
+            for field, value in fields.items():
+                setattr(self.authn, field, value)
+            self.authn.save()
+
+    def test_unrelated_save_keeps_version(self):
+        """권한/삭제 여부와 무관한 저장은 토큰 버전을 올리지 않아야 함"""
+        self._save(password="changed")
+        self._save()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.authn.role = RoleEnum.ADMIN.value
+            # role을 저장하지 않는 부분 저장
+            self.authn.save(update_fields=['password'])
+        self.assertEqual(self._version(), 0)
+
+    def test_role_active_and_delete_bump_version(self):
+        """권한 변경, 삭제 표시/해제, 삭제는 각각 한 번씩 토큰 버전을 올려야 함"""
+        self._save(role=RoleEnum.ADMIN.value)
+        self.assertEqual(self._version(), 1)
+        # 같은 값으로 다시 저장하면 올리지 않음
+        self._save(role=RoleEnum.ADMIN.value)
+        self.assertEqual(self._version(), 1)
+
+        self._save(deleted_at=timezone.now())
+        self.assertEqual(self._version(), 2)
+        self.assertFalse(self.authn.is_active)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.authn.deleted_at = None
+            self.authn.save(update_fields=['deleted_at'])
+        self.assertEqual(self._version(), 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.authn.delete()
+        self.assertIsNone(TokenVersionStore().get("20240001"))
+
+    def test_stale_full_save_keeps_bumped_version(self):
+        """이전에 읽은 인스턴스를 전체 저장해도 올라간 토큰 버전을 되돌리지 않아야 함"""
+        stale = authns.objects.get(pk=self.authn.pk)
+        self._save(role=RoleEnum.ADMIN.value)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            stale.password = "changed"
+            stale.save()
+        self.assertEqual(self._version(), 1)
+
+    def test_matching_version_skips_db(self):
+        """캐시된 토큰 버전이 같으면 DB 조회 없이 토큰 클레임으로 사용자를 구성해야 함"""
+        # 첫 요청은 DB에서 버전을 읽어 캐시
+        with self.assertNumQueries(1):
+            IsStatelessLoginUser().get_user(self.token)
+
+        with self.assertNumQueries(0):
+            principal = IsStatelessLoginUser().get_user(self.token)
+        self.assertEqual(principal.user_id_id, self.user.id)
+        self.assertEqual(principal.student_number, "20240001")
+        self.assertEqual(principal.role, RoleEnum.NORMAL.value)
+
+    def test_bumped_version_rejects_token(self):
+        """권한이 바뀐 뒤에는 이전 토큰이 token_revoked로 거부되어야 함"""
+        self._save(role=RoleEnum.ADMIN.value)
+
+        with self.assertRaises(AuthenticationFailed) as context:
+            IsStatelessLoginUser().get_user(self.token)
+        self.assertEqual(context.exception.detail['code'], 'token_revoked')
+
+    def test_missing_cache_key_still_rejects_revoked_token(self):
+        """캐시 키가 만료/삭제되어도 DB의 버전으로 이전 토큰을 거부해야 함"""
+        self._save(role=RoleEnum.ADMIN.value)
+        self.redis_conn.flushall()
+
+        with self.assertRaises(AuthenticationFailed) as context:
+            IsStatelessLoginUser().get_user(self.token)
+        self.assertEqual(context.exception.detail['code'], 'token_revoked')
+
+    def test_stale_cache_fill_does_not_overwrite_newer_version(self):
+        """커밋 전에 읽은 이전 버전은 커밋 후 캐시된 새 버전을 덮어쓰지 않아야 함"""
+        self._save(role=RoleEnum.ADMIN.value)
+        TokenVersionStore().set("20240001", 0)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(TokenVersionStore().get("20240001"), 1)
+
+    def test_redis_error_reads_version_from_db(self):
+        """Redis 오류 시 DB의 버전으로 확인해야 함"""
+        self._save(role=RoleEnum.ADMIN.value)
+        with mock.patch('core.middleware.token_version.get_redis_connection', side_effect=ConnectionError("redis down")):
+            with self.assertRaises(AuthenticationFailed) as context:
+                IsStatelessLoginUser().get_user(self.token)
+            self.assertEqual(context.exception.detail['code'], 'token_revoked')
+
+            with self.assertNumQueries(1):
+                principal = IsStatelessLoginUser().get_user(dict(self.token, token_version=1))
+        self.assertEqual(principal.role, RoleEnum.NORMAL.value)
+
+    def test_cache_invalidation_failure_fails_save(self):
+        """캐시된 버전을 지우지 못하면 변경이 저장되지 않아야 함"""
+        with mock.patch.object(TokenVersionStore, 'invalidate', side_effect=ConnectionError("redis down")):
+            with self.assertRaises(ConnectionError), transaction.atomic():
+                self._save(role=RoleEnum.ADMIN.value)
+
+        self.authn.refresh_from_db()
+        self.assertEqual(self.authn.role, RoleEnum.NORMAL.value)
+        self.assertEqual(self.authn.token_version, 0)
+
+    def test_deleted_user_token_is_rejected(self):
+        """삭제된 사용자의 토큰은 user_not_found로 거부되어야 함"""
+        IsStatelessLoginUser().get_user(self.token)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.authn.delete()
+
+        with self.assertRaises(AuthenticationFailed) as context:
+            IsStatelessLoginUser().get_user(self.token)
+        self.assertEqual(context.exception.detail['code'], 'user_not_found')
+
+    def test_revoked_refresh_token_is_rejected(self):
+        """토큰 버전이 바뀐 사용자의 refresh token으로는 재발급하지 않아야 함"""
+        request = APIRequestFactory().post('/authn/refresh')
+        request.COOKIES['refreshToken'] = str(CustomLoginJwtToken.get_token(self.authn))
+
+        _, refresh = IsValidRefreshToken().authenticate(request)
+        self.assertEqual(refresh['token_version'], 0)
+
+        self._save(role=RoleEnum.ADMIN.value)
+        with self.assertRaises(AuthenticationFailed) as context:
+            IsValidRefreshToken().authenticate(request)
+        self.assertEqual(context.exception.detail['code'], 'token_revoked')
+
+    def test_refresh_token_check_failure_is_rejected(self):
+        """토큰 버전을 확인할 수 없으면 refresh token으로 재발급하지 않아야 함"""
+        request = APIRequestFactory().post('/authn/refresh')
+        request.COOKIES['refreshToken'] = str(CustomLoginJwtToken.get_token(self.authn))
 
-# Create your tests here.
+        with mock.patch.object(TokenVersionStore, 'get', side_effect=ConnectionError("db down")), \
+                self.assertRaises(AuthenticationFailed) as context:
+            IsValidRefreshToken().authenticate(request)
+        self.assertEqual(context.exception.detail['code'], 'token_revoked')
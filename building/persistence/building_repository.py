@@ -11,6 +11,9 @@ class BuildingRepository :
             raise BuildingNotFoundException(building=building, floor=floor)
         return building
     
+    def get_buildings_by_ids(self, building_ids):
+        return buildings.objects.filter(id__in=building_ids)
+
     def get_buildings_with_floors(self, building_name, floor_list):
         """
         건물명과 층 리스트를 받아 해당 건물의 존재하는 층 정보를 반환
@@ -1,120 +1,111 @@
 
+import logging
 from authn.business.authn_service import AuthnService
-from cabinet.exceptions import CabinetBookmarkAlreadyExistsException, CabinetNotFoundException
+from cabinet.exceptions import CabinetBookmarkAlreadyExistsException, CabinetBookmarkNotFoundException, CabinetNotFoundException
 from cabinet.persistence.cabinet_bookmark_redis_repository import CabinetBookmarkRedisRepository
 from cabinet.persistence.cabinet_bookmark_repository import CabinetBookmarkRepository
 from cabinet.persistence.cabinet_repository import CabinetRepository
+from cabinet.persistence.cabinet_status_index_redis_repository import CabinetStatusIndexRedisRepository
+from cabinet.type import CabinetStatusEnum
 from user.exceptions import UserNotFoundException
 
+logger = logging.getLogger(__name__)
+
 authn_service = AuthnService()
 
 cabinet_bookmark_repository = CabinetBookmarkRepository()
 cabinet_repository = CabinetRepository()
 
 cabinet_bookmark_redis_repository = CabinetBookmarkRedisRepository()
+cabinet_status_index_redis_repository = CabinetStatusIndexRedisRepository()
 
 class CabinetBookmarkService :
-    def add_bookmark(self, cabinet_id, student_number):
-        # 사용자 정보 조회
+    def _get_user_id(self, student_number, user_id=None):
+        # 인증된 사용자 ID가 전달되면 DB 조회 생략
+        if user_id is not None:
+            return user_id
 
         user_auth_info = authn_service.get_authn_by_student_number(student_number)
 
         if not user_auth_info:
             raise UserNotFoundException(student_number=student_number)
-        
-        cabinet_info = cabinet_repository.get_cabinet_by_id(cabinet_id) 
+        return user_auth_info.user_id_id
+
+    def _get_cabinet_info(self, cabinet_id):
+        # 사물함 상태 인덱스 우선 조회, 없으면 DB 조회 후 인덱스에 저장
+        cabinet_info = cabinet_status_index_redis_repository.get_cabinet(cabinet_id)
+        if cabinet_info:
+            return cabinet_info
+
+        cabinet_info = cabinet_repository.get_cabinet_by_id(cabinet_id)
 
         if not cabinet_info:
             raise CabinetNotFoundException(cabinet_id=cabinet_id)
-        
-        # Redis에서 북마크 존재 여부 확인
-        bookmark_exists = cabinet_bookmark_redis_repository.get_existing_active_bookmark(
-            user_info=user_auth_info,
-            cabinet_info=cabinet_info
-        )
-        
-        if bookmark_exists:
+
+        cabinet_status_index_redis_repository.set_cabinet(cabinet_info)
+        return cabinet_info
+
+    def _has_active_bookmark(self, user_id, cabinet_id):
+        # Redis 사용자 북마크 집합으로 확인, 캐시되지 않은 사용자만 DB 확인
+        is_bookmarked = cabinet_bookmark_redis_repository.is_bookmarked(user_id, cabinet_id)
+        if is_bookmarked is None:
+            return cabinet_bookmark_repository.has_active_bookmark(user_id, cabinet_id)
+        return is_bookmarked
+
+    def add_bookmark(self, cabinet_id, student_number, user_id=None):
+        user_id = self._get_user_id(student_number, user_id)
+        cabinet_info = self._get_cabinet_info(cabinet_id)
+
+        if self._has_active_bookmark(user_id, cabinet_info.id):
             raise CabinetBookmarkAlreadyExistsException(cabinet_id=cabinet_info.id)
 
         bookmark_data = cabinet_bookmark_redis_repository.add_bookmark(
-            user_info=user_auth_info,
+            user_info=user_id,
             cabinet_info=cabinet_info
         )
         
         return bookmark_data
     
-    def remove_bookmark(self, cabinet_id, student_number):
-
-        # 사용자 정보 조회
-        user_auth_info = authn_service.get_authn_by_student_number(student_number)
+    def remove_bookmark(self, cabinet_id, student_number, user_id=None):
+        user_id = self._get_user_id(student_number, user_id)
+        cabinet_info = self._get_cabinet_info(cabinet_id)
 
-        if not user_auth_info:
-            raise UserNotFoundException(student_number=student_number)
-        
-        cabinet_info = cabinet_repository.get_cabinet_by_id(cabinet_id) 
-
-        if not cabinet_info:
-            raise CabinetNotFoundException(cabinet_id=cabinet_id)
-
-        # Redis에서 북마크 존재 여부 확인
-        bookmark_exists = cabinet_bookmark_redis_repository.get_existing_active_bookmark(
-            user_info=user_auth_info,
-            cabinet_info=cabinet_info
-        )
-        
-        if not bookmark_exists:
-            from cabinet.exceptions import CabinetBookmarkNotFoundException
+        if not self._has_active_bookmark(user_id, cabinet_info.id):
             raise CabinetBookmarkNotFoundException(cabinet_id=cabinet_info.id)
         
         # Redis에서 북마크 삭제
         redis_result = cabinet_bookmark_redis_repository.remove_bookmark(
-            user_info=user_auth_info,
+            user_info=user_id,
             cabinet_info=cabinet_info
         )
         
-        # 추가: DB에서도 동기화하여 삭제 (즉시 처리)
+        # 추가: DB에서도 동기화하여 삭제 (즉시 처리, Redis 캐시가 비었을 때 삭제된 북마크가 복구되지 않도록)
         try:
-            cabinet_bookmark_repository.remove_bookmark(
-                user_info=user_auth_info,
-                cabinet_info=cabinet_info
-            )
+            cabinet_bookmark_repository.remove_bookmark_by_ids(user_id, cabinet_info.id)
         except Exception as e:
             # DB 삭제 실패 시에도 Redis 삭제 결과는 반환
-            import logging
-            logger = logging.getLogger(__name__)
             logger.error(f"DB 북마크 삭제 실패: {e}")
         
         return redis_result
     
-    def get_bookmarks(self, student_number):
-        # 사용자 정보 조회
-        user_auth_info = authn_service.get_authn_by_student_number(student_number)
-
-        if not user_auth_info:
-            raise UserNotFoundException(student_number=student_number)
+    def get_bookmarks(self, student_number, user_id=None):
+        user_id = self._get_user_id(student_number, user_id)
         
         # Redis에서 북마크 목록 조회
-        bookmarks = cabinet_bookmark_redis_repository.get_bookmarks(user_info=user_auth_info)
+        bookmarks = cabinet_bookmark_redis_repository.get_bookmarks(user_info=user_id)
+        if bookmarks is not None:
+            return bookmarks
         
-        # Redis에 데이터가 없으면 DB에서 조회하고 Redis에 캐싱
-        if not bookmarks:
-            db_bookmarks = cabinet_bookmark_repository.get_bookmarks(user_info=user_auth_info)
-            
-            # DB 데이터를 Redis에 캐싱 (북마크 상태 유효성 검사 추가)
-            if db_bookmarks:
-                for bookmark in db_bookmarks:
-                    # 삭제된 북마크인지 확인 (deleted_at이 null이 아닌 경우 건너뜀)
-                    if hasattr(bookmark, 'deleted_at') and bookmark.deleted_at is not None:
-                        continue
-                    
-                    cabinet_info = bookmark.cabinet_id
-                    
-                    cabinet_bookmark_redis_repository.add_bookmark(
-                        user_info=user_auth_info,
-                        cabinet_info=cabinet_info
-                    )
-                
-                # 다시 Redis에서 조회
-                bookmarks = cabinet_bookmark_redis_repository.get_bookmarks(user_info=user_auth_info)
+        # Redis에 적재되지 않은 사용자는 DB에서 조회하여 한 번에 적재 (북마크가 없어도 적재 표시)
+        db_bookmarks = list(cabinet_bookmark_repository.get_bookmarks_by_user_id(user_id))
+        if cabinet_bookmark_redis_repository.load_bookmarks(user_id, db_bookmarks):
+            # 아직 동기화되지 않은 Redis 변경까지 반영된 목록으로 다시 조회
+            bookmarks = cabinet_bookmark_redis_repository.get_bookmarks(user_info=user_id)
+            if bookmarks is not None:
+                return bookmarks
         
-        return bookmarks
\ No newline at end of file
+        # Redis를 사용할 수 없으면 DB 결과 반환 (BROKEN 상태의 캐비닛 제외)
+        return [
+            bookmark for bookmark in db_bookmarks
+            if bookmark.cabinet_id.status != CabinetStatusEnum.BROKEN.value
+        ]
@@ -9,8 +9,10 @@ cabinet_repository = CabinetRepository()
 cabinet_history_repository = CabinetHistoryRepository()
 
 class CabinetHistoryService :
-    def get_cabinet_histories_by_student_number(self, student_number : str):
+    def get_cabinet_histories_by_student_number(self, student_number : str, user_id : int = None):
 
-        user_id = authn_service.get_authn_user_id_by_student_number(student_number)
+        # 인증 정보에 users ID가 있으면 조회 생략
+        if user_id is None:
+            user_id = authn_service.get_authn_user_id_by_student_number(student_number)
 
         return cabinet_history_repository.get_cabinet_histories_by_user_id(user_id)
\ No newline at end of file
@@ -1,18 +1,21 @@
 import logging
 import time
-from cabinet.exceptions import CabinetAlreadyRentedException, CabinetNotFoundException, CabinetRentFailedException, CabinetReturnFailedException, UserHasRentalException
+from cabinet.exceptions import CabinetAlreadyRentedException, CabinetNotFoundException, CabinetRentFailedException, CabinetRentResultNotFoundException, CabinetReturnFailedException, UserHasRentalException
 from cabinet.persistence.cabinet_repository import CabinetRepository
 from cabinet.persistence.cabinet_history_repository import CabinetHistoryRepository
+from cabinet.persistence.cabinet_floor_map_redis_repository import CabinetFloorMapRedisRepository
 
 from authn.business.authn_service import AuthnService
 from core.exception.exceptions import GlobalRedisLockException
 from user.exceptions import UserNotFoundException
 
+from django.conf import settings
 from django.db import transaction
-from django_redis import get_redis_connection
 from cabinet.util.cabinet_kafka_rent_producer import CabinetRentProducer
 from core.config.redis_lock import RedisLock
-from cabinet.util.worker_pool import CabinetThreadPool
+from cabinet.util.cabinet_rental_dispatcher import CabinetRentalDispatcher
+from cabinet.util.cabinet_rental_state import CabinetRentalState
+from cabinet.util.cabinet_rent_availability import CabinetRentAvailability
 
 from cabinet.util.cabinet_async_result_manager import AsyncResultManager
 
@@ -20,6 +23,7 @@ authn_service = AuthnService()
 
 cabinet_repository = CabinetRepository()
 cabinet_history_repository = CabinetHistoryRepository()
+cabinet_floor_map_redis_repository = CabinetFloorMapRedisRepository()
 
 logger = logging.getLogger(__name__)
 
@@ -27,8 +31,20 @@ class CabinetService :
     """사물함 서비스"""
     
     def get_cabinets_by_building_ids(self, building_id: int):
-        """건물 ID로 사물함 목록 조회"""
-        return cabinet_repository.get_cabinets_by_building_ids(building_id)
+        """건물 ID로 사물함 목록 조회 (대여 가능 여부 포함)"""
+        return CabinetRentAvailability().annotate(cabinet_repository.get_cabinets_by_building_ids(building_id))
+
+    def get_cabinet_detail_by_id(self, cabinet_id: int):
+        """사물함 ID로 상세 정보 조회 (사용자, 현재 대여 만료일 포함)"""
+        return cabinet_repository.get_cabinet_detail_by_id(cabinet_id, CabinetRentAvailability())
+
+    def get_cached_floor_maps(self, building_ids: list):
+        """건물 ID별 캐시된 배치도(캐시 없는 건물은 None)와 조회 시점의 배치도 버전"""
+        return cabinet_floor_map_redis_repository.get_floor_maps(building_ids)
+
+    def cache_floor_maps(self, floor_maps: dict, versions: dict):
+        """건물 ID별 직렬화된 배치도 캐시 저장 (조회 후 무효화된 건물은 제외)"""
+        return cabinet_floor_map_redis_repository.set_floor_maps(floor_maps, versions)
 
     def get_cabinet_by_id(self, cabinet_id: int):
         """사물함 ID로 정보 조회"""
@@ -36,51 +52,30 @@ class CabinetService :
 
     def request_rent_cabinet(self, cabinet_id: int, student_number: str, check_result=True):
         """사물함 대여 요청 - 완전 비동기 방식"""
-        redis_conn = get_redis_connection("default")
-        processing_key = f"cabinet:processing:{cabinet_id}"
-        status_key = f"cabinet:status:{cabinet_id}"
+        rental_state = CabinetRentalState()
 
-        # 이미 처리 중인지 확인
-        if redis_conn.get(processing_key):
+        # 처리 중 여부, 사용자 대여 여부 확인과 선점을 한 번에 수행
+        claim = rental_state.claim_rent(cabinet_id, student_number)
+        if claim == CabinetRentalState.USER_HAS_RENTAL:
+            raise UserHasRentalException(student_number=student_number)
+        if claim == CabinetRentalState.CABINET_RENTED:
+            raise CabinetAlreadyRentedException(cabinet_id=cabinet_id)
+        if claim != CabinetRentalState.CLAIMED:
             raise CabinetRentFailedException(cabinet_id)
 
+        dispatched = False
         try:
-            # 처리 중으로 표시
-            redis_conn.set(processing_key, student_number, ex=15)
-            redis_conn.set(status_key, f"renting:{student_number}", ex=60)
-            
             # 기본 검증 (가벼운 검증만 수행)
             user_auth_info = authn_service.get_authn_by_student_number(student_number)
             if not user_auth_info:
-                redis_conn.delete(processing_key)
-                redis_conn.delete(status_key)
                 raise UserNotFoundException(student_number=student_number)
                 
             # 비동기 작업 ID 생성
             task_id = f"rental-{int(time.time())}-{cabinet_id}-{student_number}"
             
-            # 1. 스레드 풀 작업 등록
-            thread_pool = CabinetThreadPool()
-            thread_pool.start()
-            thread_pool.add_rental_task(cabinet_id, student_number, task_id)
-            logger.info(f"사물함 {cabinet_id} 대여 작업이 스레드 풀에 추가됨 (작업 ID: {task_id})")
-            
-            # 2. Celery 작업 등록 (백업)
-            try:
-                from cabinet.util.cabinet_celery_task import process_cabinet_rental
-                celery_task = process_cabinet_rental.delay(cabinet_id, student_number, task_id)
-                logger.info(f"Celery 대여 작업 등록 완료 (작업 ID: {celery_task.id})")
-            except Exception as e:
-                logger.warning(f"Celery 작업 등록 건너뜀: {str(e)}")
-            
-            # 3. Kafka 메시지 발행 (추가 백업)
-            try:
-                producer = CabinetRentProducer()
-                if producer.available:
-                    producer.send_rental_request(cabinet_id, student_number)
-                    logger.info(f"Kafka 메시지 전송 완료 (사물함 ID: {cabinet_id})")
-            except Exception as e:
-                logger.warning(f"Kafka 메시지 전송 건너뜀: {str(e)}")
+            # 설정된 백엔드 하나로만 작업 전달 (작업 ID 기준 중복 제거)
+            CabinetRentalDispatcher().dispatch(cabinet_id, student_number, task_id)
+            dispatched = True
             
             # 비동기 작업 결과 확인 (API 호출에서만)
             if check_result and task_id:
@@ -94,18 +89,15 @@ class CabinetService :
                         'status': 'processing'
                     }
                 
-                # 결과에 따라 처리
+                # 결과에 따라 처리 (Redis 상태 전이는 작업 실행 측에서 완료)
                 if result.get("status") == "success":
-                    # 성공 시 상태 업데이트 후 결과 반환
-                    redis_conn.set(status_key, f"rented:{student_number}", ex=3600)
                     return {
                         'message': '사물함 대여가 완료되었습니다.',
                         'cabinet_id': cabinet_id,
                         'status': 'success'
                     }
                 else:
-                    # 실패 시 상태 제거 및 예외 발생
-                    redis_conn.delete(status_key)
+                    # 실패 시 예외 발생
                     exception_class = result.get("exception_class", "")
                     message = result.get("message", "알 수 없는 오류가 발생했습니다")
                     
@@ -126,20 +118,85 @@ class CabinetService :
                 'status': 'accepted'
             }
         except Exception as e:
-            # 모든 오류 상황에서 상태 키 제거
-            redis_conn.delete(status_key)
+            # 작업 전달 전 실패한 경우에만 선점 해제 (전달 후에는 작업 실행 측에서 해제)
+            if not dispatched:
+                rental_state.complete_rent(cabinet_id, student_number, success=False)
             logger.error(f"대여 요청 처리 중 오류: {str(e)}")
             raise
-        finally:
-            # 처리 중 키는 항상 삭제하지 않음 (비동기 처리가 진행 중이므로)
-            # 실제 처리 메서드에서 삭제하도록 함
-            pass
     
-    @transaction.atomic
+    def get_rent_result(self, task_id: str, student_number: str, wait: int = 0):
+        """
+        대여 작업 결과 조회 (wait초 동안 결과 알림 대기)
+
+        작업 ID는 요청한 학번으로 끝나므로 본인의 작업만 조회할 수 있습니다.
+        결과도 없고 전달 기록도 없는 작업 ID는 처리 중이 아닌 알 수 없는 작업으로 보고 404로 응답합니다.
+        """
+        if not task_id.endswith(f"-{student_number}"):
+            raise CabinetRentResultNotFoundException(task_id=task_id)
+        
+        result = AsyncResultManager.get_result(task_id, timeout=wait)
+        if not result:
+            if not CabinetRentalDispatcher.is_dispatched(task_id):
+                raise CabinetRentResultNotFoundException(task_id=task_id)
+            return {
+                'taskId': task_id,
+                'status': 'processing',
+                'message': '사물함 대여 요청이 처리 중입니다.'
+            }
+        
+        if str(result.get('student_number')) != str(student_number):
+            raise CabinetRentResultNotFoundException(task_id=task_id)
+        
+        response = {
+            'taskId': task_id,
+            'status': result.get('status'),
+            'cabinetId': result.get('cabinet_id'),
+            'message': result.get('message'),
+        }
+        if result.get('status') != 'success':
+            response['errorCode'] = result.get('error_code', 'unknown_error')
+        return response
+    
     def rent_cabinet(self, cabinet_id: int, student_number: str):
         """
         사물함 대여 처리 (실제 DB 반영)
+
+        CABINET_RENTAL_LOCK_MODE 설정에 따라 RedisLock 또는 DB 행 잠금으로 동시성을 제어합니다.
         """
+        if getattr(settings, 'CABINET_RENTAL_LOCK_MODE', 'redis') == 'db':
+            return self._rent_cabinet_with_row_lock(cabinet_id, student_number)
+        return self._rent_cabinet_with_redis_lock(cabinet_id, student_number)
+
+    @transaction.atomic
+    def _rent_cabinet_with_row_lock(self, cabinet_id: int, student_number: str):
+        """사물함 대여 처리 - 행 잠금, 상태 확인, 이력 생성을 한 트랜잭션에서 수행"""
+        user_auth_info = authn_service.get_authn_by_student_number(student_number)
+        if not user_auth_info:
+            raise UserNotFoundException(student_number=student_number)
+
+        # 사물함 행 잠금 (이미 잠겨 있으면 즉시 실패)
+        cabinet = cabinet_repository.get_cabinet_for_rent(cabinet_id)
+        if not cabinet:
+            raise CabinetNotFoundException(cabinet_id=cabinet_id)
+
+        # 사용자가 이미 대여한 사물함 확인
+        if cabinet_repository.get_renting_user_ids([user_auth_info.user_id_id]):
+            raise UserHasRentalException(student_number=student_number)
+
+        if cabinet.status != 'AVAILABLE':
+            raise CabinetAlreadyRentedException(cabinet_id=cabinet_id)
+
+        cabinet_history_repository.rent_cabinet(cabinet, user_auth_info.user_id)
+
+        # 조건부 UPDATE로 상태 변경 (행 잠금을 지원하지 않는 DB에서도 중복 대여 방지)
+        cabinet_repository.rent_cabinet_if_available(cabinet_id, user_auth_info.user_id_id)
+
+        logger.info(f"사물함 {cabinet_id} 대여 완료 (사용자: {student_number}, 행 잠금)")
+        return cabinet
+
+    @transaction.atomic
+    def _rent_cabinet_with_redis_lock(self, cabinet_id: int, student_number: str):
+        """사물함 대여 처리 - RedisLock 방식"""
         # 락 획득
         lock_name = f"cabinet:{cabinet_id}:rent"
         try:
@@ -180,63 +237,102 @@ class CabinetService :
             logger.error(f"사물함 대여 실패 (트랜잭션 롤백): {str(e)}")
             raise
 
+    def rent_cabinets_in_batch(self, rental_requests: list):
+        """
+        여러 대여 요청을 한 트랜잭션으로 처리 (배치 대여 워커용)
+
+        rental_requests: (사물함 ID, 학번) 목록
+        반환: 요청 순서대로 성공 시 None, 실패 시 예외 객체
+        """
+        outcomes = [None] * len(rental_requests)
+        student_numbers = {student_number for _, student_number in rental_requests}
+        authn_map = {
+            authn.student_number: authn
+            for authn in authn_service.get_authns_by_student_numbers(list(student_numbers))
+        }
+
+        with transaction.atomic():
+            cabinet_map = {
+                cabinet.id: cabinet
+                for cabinet in cabinet_repository.get_cabinets_for_update_by_ids(
+                    list({cabinet_id for cabinet_id, _ in rental_requests})
+                )
+            }
+            renting_user_ids = cabinet_repository.get_renting_user_ids(
+                [authn.user_id_id for authn in authn_map.values()]
+            )
+
+            rented_cabinets = []
+            for index, (cabinet_id, student_number) in enumerate(rental_requests):
+                authn = authn_map.get(student_number)
+                cabinet = cabinet_map.get(cabinet_id)
+                if not authn:
+                    outcomes[index] = UserNotFoundException(student_number=student_number)
+                elif authn.user_id_id in renting_user_ids:
+                    outcomes[index] = UserHasRentalException(student_number=student_number)
+                elif not cabinet:
+                    outcomes[index] = CabinetNotFoundException(cabinet_id=cabinet_id)
+                elif cabinet.status != 'AVAILABLE':
+                    outcomes[index] = CabinetAlreadyRentedException(cabinet_id=cabinet_id)
+                else:
+                    # 같은 배치 내 후속 요청이 중복 대여하지 않도록 메모리 상태 갱신
+                    cabinet.status = 'USING'
+                    cabinet.user_id_id = authn.user_id_id
+                    renting_user_ids.add(authn.user_id_id)
+                    rented_cabinets.append(cabinet)
+
+            if rented_cabinets:
+                cabinet_history_repository.bulk_rent_cabinets(
+                    [(cabinet, cabinet.user_id_id) for cabinet in rented_cabinets]
+                )
+                cabinet_repository.bulk_update_cabinet_rentals(rented_cabinets)
+
+        logger.info(f"사물함 배치 대여 완료: {len(rented_cabinets)}/{len(rental_requests)}건 성공")
+        return outcomes
+
     @transaction.atomic
     def return_cabinet(self, cabinet_id: int, student_number: str):
         """사물함 반납 처리 (동기 방식)"""
-        redis_conn = get_redis_connection("default")
-        status_key = f"cabinet:status:{cabinet_id}"
-        processing_key = f"cabinet:processing:{cabinet_id}"
+        rental_state = CabinetRentalState()
         
-        # 대여 진행 중인지 먼저 확인
-        status = redis_conn.get(status_key)
-        if status and status.decode('utf-8').startswith('renting:'):
-            # 대여 진행 중이면 완료될 때까지 대기 (최대 5초)
-            wait_start = time.time()
-            while time.time() - wait_start < 5:
-                # 상태 다시 확인
-                status = redis_conn.get(status_key)
-                if not status or not status.decode('utf-8').startswith('renting:'):
-                    break
-                time.sleep(0.2)  # 200ms 대기
+        # 반납 선점 (대여 진행 중이면 완료될 때까지 최대 5초 대기)
+        claim, status = rental_state.claim_return(cabinet_id, student_number)
+        wait_start = time.time()
+        while claim == CabinetRentalState.BUSY and time.time() - wait_start < 5:
+            time.sleep(0.2)  # 200ms 대기
+            claim, status = rental_state.claim_return(cabinet_id, student_number)
         
-        # 대여 상태 확인
-        status = redis_conn.get(status_key)
-        # 아직도 대여 진행 중이면 오류
-        if status and status.decode('utf-8').startswith('renting:'):
+        # 아직도 대여 진행 중이거나 다른 반납이 처리 중이면 오류
+        if claim != CabinetRentalState.CLAIMED:
             raise CabinetReturnFailedException(cabinet_id=cabinet_id)
         
-        # DB에서도 대여 상태 확인
         try:
-            cabinet = cabinet_repository.get_cabinet_by_id(cabinet_id)
-            if not cabinet:
-                raise CabinetNotFoundException(cabinet_id=cabinet_id)
-                
-            if cabinet.status != 'USING':
-                # DB에는 대여 상태가 아니지만 Redis에는 대여 완료 표시가 있는 경우
-                if status and status.decode('utf-8').startswith('rented:'):
-                    # Redis 정보를 신뢰하고 사용자에게 알림
-                    extracted_student = status.decode('utf-8').split(':')[1]
-                    if extracted_student == student_number:
-                        # 상태 불일치 로그 남기고 진행
-                        logger.warning(f"사물함 {cabinet_id} 상태 불일치: Redis=rented, DB={cabinet.status}")
-                        # 여기서 DB 동기화 시도할 수 있음
+            # DB에서도 대여 상태 확인
+            try:
+                cabinet = cabinet_repository.get_cabinet_by_id(cabinet_id)
+                if not cabinet:
+                    raise CabinetNotFoundException(cabinet_id=cabinet_id)
+                    
+                if cabinet.status != 'USING':
+                    # DB에는 대여 상태가 아니지만 Redis에는 대여 완료 표시가 있는 경우
+                    if status.startswith('rented:'):
+                        # Redis 정보를 신뢰하고 사용자에게 알림
+                        extracted_student = status.split(':')[1]
+                        if extracted_student == student_number:
+                            # 상태 불일치 로그 남기고 진행
+                            logger.warning(f"사물함 {cabinet_id} 상태 불일치: Redis=rented, DB={cabinet.status}")
+                            # 여기서 DB 동기화 시도할 수 있음
+                        else:
+                            raise CabinetReturnFailedException(cabinet_id=cabinet_id)
                     else:
                         raise CabinetReturnFailedException(cabinet_id=cabinet_id)
-                else:
-                    raise CabinetReturnFailedException(cabinet_id=cabinet_id)
-        except CabinetReturnFailedException:
-            raise
-        except CabinetNotFoundException:
-            raise
-        except Exception as e:
-            logger.error(f"사물함 {cabinet_id} 조회 실패: {str(e)}")
-            raise CabinetNotFoundException(cabinet_id=cabinet_id)
-        
-        # 반납 처리 락 획득
-        lock_name = f"cabinet:{cabinet_id}:return"
-        with RedisLock(lock_name, expire_time=10) as lock:
-            if not lock.acquired:
-                raise GlobalRedisLockException("사물함 반납 처리를 위한 락을 획득할 수 없습니다")
+            except CabinetReturnFailedException:
+                raise
+            except CabinetNotFoundException:
+                raise
+            except Exception as e:
+                logger.error(f"사물함 {cabinet_id} 조회 실패: {str(e)}")
+                raise CabinetNotFoundException(cabinet_id=cabinet_id)
 
             # 사용자 정보 조회
             user_auth_info = authn_service.get_authn_by_student_number(student_number)
@@ -253,44 +349,49 @@ class CabinetService :
                 # 이력 생성 실패해도 상태 변경은 진행
 
             # 캐비넷 상태 변경
-            cabinet_repository.update_cabinet_status(cabinet_id, user_id=None, status='AVAILABLE')
-            
-            # Redis 상태 업데이트
-            redis_conn.delete(status_key)
-            redis_conn.delete(processing_key)
+            cabinet_repository.update_cabinet_status(
+                cabinet_id, user_id=None, status='AVAILABLE', previous_user_id=user_auth_info.user_id_id
+            )
+        except Exception:
+            # 반납 실패 시 선점만 해제
+            rental_state.complete_return(cabinet_id, student_number, success=False)
+            raise
+        
+        # DB 커밋 이후 Redis 대여 상태 삭제 및 선점 해제
+        transaction.on_commit(lambda: rental_state.complete_return(cabinet_id, student_number, success=True))
+        
+        # Kafka 메시지 발행 (반납 완료 알림)
+        try:
+            producer = CabinetRentProducer()
+            if producer.available:
+                producer.send_return_request(cabinet_id, student_number)
+        except Exception as e:
+            logger.warning(f"Kafka 반납 완료 메시지 전송 실패: {str(e)}")
             
-            # Celery 작업 취소 시도 (이미 진행 중인 작업이 있다면)
-            try:
-                # 관련 스레드 풀 작업 결과 정리
-                AsyncResultManager.set_result(f"rental-*-{cabinet_id}-*", {
-                    "status": "cancelled",
-                    "message": f"사물함 {cabinet_id}가 수동으로 반납되었습니다."
-                })
-                
-                # Kafka 메시지 발행 (반납 완료 알림)
-                try:
-                    producer = CabinetRentProducer()
-                    if producer.available:
-                        producer.send_return_request(cabinet_id, student_number)
-                except Exception as e:
-                    logger.warning(f"Kafka 반납 완료 메시지 전송 실패: {str(e)}")
-            except Exception as e:
-                logger.warning(f"비동기 작업 정리 실패: {str(e)}")
-                
-            return cabinet
+        return cabinet
 
 
     def search_cabinet(self, keyword : str):
         if keyword.isdigit():
-            return cabinet_repository.get_cabinets_exact_match_by_cabinet_number(int(keyword))
+            cabinet_list = cabinet_repository.get_cabinets_exact_match_by_cabinet_number(int(keyword))
         else:
-            return cabinet_repository.get_cabinets_contains_by_building_name(keyword)
+            cabinet_list = cabinet_repository.get_cabinets_contains_by_building_name(keyword)
+        return CabinetRentAvailability().annotate(cabinet_list)
         
     def get_all_cabinets(self):
         return cabinet_repository.get_all_cabinets()
     
     def return_cabinets_by_ids(self, cabinet_ids : list):
-        return cabinet_repository.return_cabinets_by_ids(cabinet_ids)
+        result = cabinet_repository.return_cabinets_by_ids(cabinet_ids)
+        # 관리자 반납된 사물함의 Redis 대여 상태 정리
+        self._release_rental_states(result[0])
+        return result
+
+    def _release_rental_states(self, changed_cabinets):
+        """반납/상태 변경에 성공한 사물함만 커밋 후 Redis 대여 상태 정리 (실패한 ID의 상태는 유지)"""
+        cabinet_ids = [cabinet.id for cabinet in changed_cabinets]
+        if cabinet_ids:
+            transaction.on_commit(lambda: CabinetRentalState().release_cabinets(cabinet_ids))
     
     def assign_cabinet_to_user(self, cabinet_id : int, student_number : str, status : str):
         # 사용자 정보 조회
@@ -302,7 +403,10 @@ class CabinetService :
         return cabinet_repository.assign_cabinet_to_user(cabinet_id, user_auth_info, status)
     
     def change_cabinet_status_by_ids(self, cabinet_ids : list, new_status : str, reason : str):
-        return cabinet_repository.change_cabinet_status_by_ids(cabinet_ids, new_status, reason)
+        result = cabinet_repository.change_cabinet_status_by_ids(cabinet_ids, new_status, reason)
+        # 상태가 변경된 사물함의 Redis 대여 상태 정리
+        self._release_rental_states(result[0])
+        return result
     
     def get_cabinet_statistics(self):
         return cabinet_repository.get_cabinet_statistics()
@@ -0,0 +1,32 @@
+from rest_framework import serializers
+
+from core.validate.base import BaseValidatedSerializer
+
+from core.exception.exceptions import GlobalDtoValidationException
+
+class CabinetRentResultDto(BaseValidatedSerializer):
+    taskId = serializers.CharField(help_text='대여 작업 ID', max_length=100)
+    wait = serializers.IntegerField(
+        required=False,
+        default=0,
+        help_text='결과 대기 시간 (초, 0이면 즉시 응답, 최대 10초)'
+    )
+
+    MAX_WAIT = 10
+
+    def validate_taskId(self, value):
+        if not value.startswith('rental-'):
+            raise serializers.ValidationError('유효하지 않은 작업 ID입니다.')
+        return value
+
+    def validate_wait(self, value):
+        """대기 시간을 0~10초로 제한 (범위를 벗어난 값은 거부하지 않고 경계값 사용)"""
+        return min(max(value, 0), self.MAX_WAIT)
+
+    @classmethod
+    def create_validated(cls, data):
+        """DTO를 생성하고 검증, 실패 시 예외 발생"""
+        instance = cls(data=data)
+        if not instance.is_valid():
+            raise GlobalDtoValidationException(instance.errors)
+        return instance
@@ -2,6 +2,7 @@
 from .CabinetInfoQueryParamDto import CabinetInfoQueryParamDto
 from .CabinetInfoDetailDto import CabinetInfoDetailDto
 from .CabinetRentDto import CabinetRentDto
+from .CabinetRentResultDto import CabinetRentResultDto
 from .CabinetReturnDto import CabinetReturnDto
 from .CabinetSearchDetailDto import CabinetSearchDetailDto
 from .CabinetSearchDto import CabinetSearchDto
@@ -15,6 +16,7 @@ __all__ = [
     'CabinetInfoQueryParamDto',
     'CabinetInfoDetailDto', 
     'CabinetRentDto',
+    'CabinetRentResultDto',
     'CabinetReturnDto',
     'CabinetSearchDetailDto',
     'CabinetSearchDto',
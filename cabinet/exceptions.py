@@ -107,4 +107,12 @@ class CabinetNotFoundException(BadRequestError):
     
     def __init__(self, cabinet_id=None):
         detail = f" (ID: {cabinet_id})" if cabinet_id else ""
-        super().__init__(f"사물함을 찾을 수 없습니다{detail}")
\ No newline at end of file
+        super().__init__(f"사물함을 찾을 수 없습니다{detail}")
+
+class CabinetRentResultNotFoundException(NotFoundError):
+    """대여 작업 결과를 찾을 수 없는 예외"""
+    error_code = "cabinet_rent_result_not_found"
+    
+    def __init__(self, task_id=None):
+        detail = f" (작업 ID: {task_id})" if task_id else ""
+        super().__init__(f"대여 작업 결과를 찾을 수 없습니다{detail}")
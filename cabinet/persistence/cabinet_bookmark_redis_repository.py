@@ -1,349 +1,514 @@
 from django.utils import timezone
 from django_redis import get_redis_connection
 import json
-from datetime import timedelta
+import struct
+from datetime import datetime
 import logging
+from building.persistence.building_repository import BuildingRepository
 from cabinet.type import CabinetStatusEnum
 
 logger = logging.getLogger(__name__)
 
+
+class BookmarkBuildingRecord:
+    """북마크 목록 응답용 건물 정보"""
+    __slots__ = ('id', 'name', 'floor')
+
+    def __init__(self, id=None, name=None, floor=None):
+        self.id = id
+        self.name = name
+        self.floor = floor
+
+
+class BookmarkCabinetRecord:
+    """북마크 목록 응답용 사물함 정보"""
+    __slots__ = ('id', 'cabinet_number', 'status', 'building_id')
+
+    def __init__(self, id=None, cabinet_number=None, status=None, building_id=None):
+        self.id = id
+        self.cabinet_number = cabinet_number
+        self.status = status
+        self.building_id = building_id
+
+
+class BookmarkRecord:
+    """
+    북마크 목록 응답용 레코드
+
+    CabinetBookmarkListSerializer의 source 경로(cabinet_id.building_id.name 등)를
+    그대로 따를 수 있도록 모델과 같은 속성 이름을 사용합니다.
+    """
+    __slots__ = ('id', 'cabinet_id', 'created_at', 'updated_at')
+
+    def __init__(self, id=None, cabinet_id=None, created_at=None, updated_at=None):
+        self.id = id
+        self.cabinet_id = cabinet_id
+        self.created_at = created_at
+        self.updated_at = updated_at
+
+
+class BookmarkEntryCodec:
+    """
+    북마크 항목 바이너리 인코딩 (21바이트)
+
+    버전, 북마크 상태, 사물함 상태, 사물함 번호, 건물 ID, 생성/수정/삭제 시각(epoch 초)을
+    고정 길이 struct로 저장합니다. 건물 이름/층은 건물 인덱스에서 따로 조회합니다.
+    값이 없는(None) 사물함 번호/건물 ID/삭제 시각은 필드 최댓값(NONE_SHORT, NONE_INT)으로 저장하여
+    실제 값 0과 구분합니다.
+    """
+    VERSION = 2
+    # 0을 None으로 저장하던 이전 형식 (TTL이 남은 항목만 읽음)
+    LEGACY_VERSION = 1
+    ENTRY = struct.Struct('<BBBHIIII')
+
+    BOOKMARK_STATUSES = ('deleted', 'active')
+    CABINET_STATUSES = tuple(status.value for status in CabinetStatusEnum)
+    UNKNOWN = 255
+    NONE_SHORT = 0xFFFF
+    NONE_INT = 0xFFFFFFFF
+
+    @staticmethod
+    def _pack_optional(value, none):
+        return none if value is None else value
+
+    @staticmethod
+    def _unpack_optional(value, none):
+        return None if value == none else value
+
+    @classmethod
+    def encode(cls, entry):
+        cabinet_status = entry.get('cabinet_status')
+        return cls.ENTRY.pack(
+            cls.VERSION,
+            cls.BOOKMARK_STATUSES.index(entry['bookmark_status']),
+            cls.CABINET_STATUSES.index(cabinet_status) if cabinet_status in cls.CABINET_STATUSES else cls.UNKNOWN,
+            cls._pack_optional(entry.get('cabinet_number'), cls.NONE_SHORT),
+            cls._pack_optional(entry.get('building_id'), cls.NONE_INT),
+            entry.get('created_at') or 0,
+            entry.get('updated_at') or 0,
+            cls._pack_optional(entry.get('deleted_at'), cls.NONE_INT),
+        )
+
+    @classmethod
+    def decode(cls, raw):
+        version, bookmark_status, cabinet_status, cabinet_number, building_id, created_at, updated_at, deleted_at = (
+            cls.ENTRY.unpack(raw)
+        )
+        if version == cls.VERSION:
+            cabinet_number = cls._unpack_optional(cabinet_number, cls.NONE_SHORT)
+            building_id = cls._unpack_optional(building_id, cls.NONE_INT)
+            deleted_at = cls._unpack_optional(deleted_at, cls.NONE_INT)
+        elif version == cls.LEGACY_VERSION:
+            cabinet_number, building_id, deleted_at = cabinet_number or None, building_id or None, deleted_at or None
+        else:
+            raise ValueError(f"지원하지 않는 북마크 인코딩 버전: {version}")
+        return {
+            'bookmark_status': cls.BOOKMARK_STATUSES[bookmark_status],
+            'cabinet_status': cls.CABINET_STATUSES[cabinet_status] if cabinet_status != cls.UNKNOWN else None,
+            'cabinet_number': cabinet_number,
+            'building_id': building_id,
+            'created_at': created_at,
+            'updated_at': updated_at,
+            'deleted_at': deleted_at,
+        }
+
+
 class CabinetBookmarkRedisRepository:
+    """
+    북마크 Redis 저장소
+
+    - cabinet:user_bookmark_entries:{user_id} : 사물함 ID -> BookmarkEntryCodec 항목 해시
+      (_loaded 필드는 DB에서 적재한 적이 있음을 표시, 북마크가 없는 사용자도 캐시)
+    - cabinet:building_index                   : 건물 ID -> 건물 이름/층 JSON (모든 사용자가 공유)
+    - cabinet:bookmarks:changed                : DB 동기화 대기 중인 {user_id}:{cabinet_id}
+    - cabinet:bookmarks:processing             : 동기화 중인 변경 키 (DB 커밋 후 제거)
+    """
+    LOADED_FIELD = "_loaded"
+    CHANGED_KEY = "cabinet:bookmarks:changed"
+    PROCESSING_KEY = "cabinet:bookmarks:processing"
+
+    # 변경 목록에서 꺼낸 키를 처리 중 목록으로 원자적으로 옮김 (워커가 비정상 종료되어도 키가 남음)
+    POP_SCRIPT = """
+    local keys = redis.call('SPOP', KEYS[1], ARGV[1])
+    if #keys > 0 then
+        redis.call('SADD', KEYS[2], unpack(keys))
+    end
+    return keys
+    """
+
     def __init__(self):
         self.redis_conn = get_redis_connection("default")
-        self.bookmark_key_prefix = "cabinet:bookmark:"
-        self.user_bookmarks_key_prefix = "cabinet:user_bookmarks:"
+        self.user_bookmarks_key_prefix = "cabinet:user_bookmark_entries:"
+        self.building_index_key = "cabinet:building_index"
+        # 이전 JSON 형식 북마크 키 (동기화 대기 중인 변경 처리용)
+        self.legacy_bookmark_key_prefix = "cabinet:bookmark:"
         # 12시간 = 43200초
-        self.ttl = 43200  
-
-    def _get_bookmark_key(self, user_id, cabinet_id):
-        """개별 북마크의 키 생성"""
-        # ID가 객체일 수 있으므로 문자열로 변환
-        user_id = str(user_id)
-        cabinet_id = str(cabinet_id)
-        return f"{self.bookmark_key_prefix}{user_id}:{cabinet_id}"
-    
+        self.ttl = 43200
+
     def _get_user_bookmarks_key(self, user_id):
-        """사용자별 북마크 목록 키 생성"""
-        user_id = str(user_id)
+        """사용자별 북마크 해시 키 생성"""
         return f"{self.user_bookmarks_key_prefix}{user_id}"
-    
-    def get_existing_active_bookmark(self, user_info, cabinet_info):
-        """활성화된 북마크가 있는지 확인"""
+
+    def _get_legacy_bookmark_key(self, user_id, cabinet_id):
+        """이전 JSON 형식의 개별 북마크 키 생성"""
+        return f"{self.legacy_bookmark_key_prefix}{user_id}:{cabinet_id}"
+
+    def _extract_user_id(self, user_info):
+        """사용자 ID 추출 (ID 값, authns 또는 users 객체)"""
+        if isinstance(user_info, (int, str)):
+            return user_info
+        # authns 객체는 FK 값(user_id_id)을 바로 사용하여 users 조회를 피함
+        if hasattr(user_info, 'user_id_id'):
+            return user_info.user_id_id
+        if hasattr(user_info, 'user_id'):
+            if hasattr(user_info.user_id, 'id'):
+                return user_info.user_id.id
+            return user_info.user_id
+        return user_info.id
+
+    @staticmethod
+    def _to_epoch(value=None):
+        return int((value or timezone.now()).timestamp())
+
+    def _build_entry(self, cabinet_info, created_at=None):
+        """사물함 정보로 활성 북마크 항목 생성"""
+        now = self._to_epoch()
+        building = getattr(cabinet_info, 'building_id', None)
+        return {
+            'bookmark_status': 'active',
+            'cabinet_status': getattr(cabinet_info, 'status', None),
+            'cabinet_number': getattr(cabinet_info, 'cabinet_number', None),
+            'building_id': getattr(building, 'id', None),
+            'created_at': self._to_epoch(created_at) if created_at else now,
+            'updated_at': now,
+            'deleted_at': None,
+        }
+
+    def _queue_building(self, pipeline, cabinet_info):
+        """사물함의 건물 정보를 공유 건물 인덱스에 기록 (파이프라인에 추가)"""
+        building = getattr(cabinet_info, 'building_id', None)
+        if building is None or getattr(building, 'id', None) is None:
+            return
+        pipeline.hset(
+            self.building_index_key, str(building.id),
+            json.dumps({'name': building.name, 'floor': building.floor})
+        )
+        pipeline.expire(self.building_index_key, self.ttl)
+
+    def _to_bookmark_data(self, user_id, cabinet_id, entry):
+        """저장 항목을 이전과 같은 북마크 데이터 딕셔너리 형식으로 변환"""
+        return {
+            'id': cabinet_id,
+            'user_id': user_id,
+            'cabinet_id': cabinet_id,
+            **entry,
+        }
+
+    def is_bookmarked(self, user_id, cabinet_id):
+        """
+        사용자 북마크 해시로 활성 북마크 여부 확인 (왕복 1회)
+
+        DB에서 적재되지 않은 사용자는 해시만으로 판단할 수 없으므로 None을 반환합니다.
+        """
         try:
-            # user_id 추출
-            if hasattr(user_info, 'user_id'):
-                if hasattr(user_info.user_id, 'id'):
-                    user_id = user_info.user_id.id
-                else:
-                    user_id = user_info.user_id
-            else:
-                user_id = user_info.id
-            
-            cabinet_id = cabinet_info.id
-            
-            bookmark_key = self._get_bookmark_key(user_id, cabinet_id)
-            bookmark_data_json = self.redis_conn.get(bookmark_key)
-            
-            if not bookmark_data_json:
-                return None
-            
-            bookmark_data = json.loads(bookmark_data_json)
-            if bookmark_data.get('bookmark_status') == 'active':
-                return bookmark_data
-            return None
+            raw_entry, loaded = self.redis_conn.hmget(
+                self._get_user_bookmarks_key(user_id), [str(cabinet_id), self.LOADED_FIELD]
+            )
         except Exception as e:
             logger.error(f"북마크 확인 중 오류 발생: {str(e)}")
             return None
-    
+
+        if raw_entry and BookmarkEntryCodec.decode(raw_entry)['bookmark_status'] == 'active':
+            return True
+        return False if loaded else None
+
     def add_bookmark(self, user_info, cabinet_info):
         """Redis에 북마크 추가"""
         try:
-            # user_id 추출
-            if hasattr(user_info, 'user_id'):
-                if hasattr(user_info.user_id, 'id'):
-                    user_id = user_info.user_id.id
-                else:
-                    user_id = user_info.user_id
-            else:
-                user_id = user_info.id
-                
+            user_id = self._extract_user_id(user_info)
             cabinet_id = cabinet_info.id
-            
+
             # 캐비닛 상태 확인 - BROKEN 상태인 경우 북마크 불가
             cabinet_status = getattr(cabinet_info, 'status', None)
             if cabinet_status == CabinetStatusEnum.BROKEN.value:
                 logger.warning(f"캐비닛이 BROKEN 상태이므로 북마크 추가 불가: user_id={user_id}, cabinet_id={cabinet_id}")
                 return None
-            
+
             logger.info(f"북마크 추가 시작: user_id={user_id}, cabinet_id={cabinet_id}, cabinet_status={cabinet_status}")
-            
-            # 캐비닛 정보 추출 - 시리얼라이저에 필요한 형식으로 저장
-            cabinet_data = {}
-            try:
-                cabinet_data = {
-                    'id': cabinet_info.id,
-                    'cabinet_number': getattr(cabinet_info, 'cabinet_number', None),
-                    'status': cabinet_status  # 실제 캐비닛 상태 저장
-                }
-                
-                # building_id 정보 추출
-                if hasattr(cabinet_info, 'building_id'):
-                    building = cabinet_info.building_id
-                    if building:
-                        cabinet_data['building'] = {
-                            'id': getattr(building, 'id', None),
-                            'name': getattr(building, 'name', None),
-                            'floor': getattr(building, 'floor', None)
-                        }
-            except Exception as e:
-                logger.warning(f"캐비닛 데이터 추출 중 오류: {str(e)}")
-                cabinet_data = {
-                    'id': cabinet_id,
-                    'status': cabinet_status
-                }
-            
-            bookmark_key = self._get_bookmark_key(user_id, cabinet_id)
+
             user_bookmarks_key = self._get_user_bookmarks_key(user_id)
-            
-            # 북마크 데이터 설정
-            bookmark_data = {
-                'id': cabinet_id,
-                'user_id': user_id,
-                'cabinet_id': cabinet_data,
-                'bookmark_status': 'active',  # 북마크 상태는 'active'
-                'cabinet_status': cabinet_status,  # 캐비닛 상태는 실제 캐비닛 상태
-                'created_at': timezone.now().isoformat(),
-                'updated_at': timezone.now().isoformat(),
-                'deleted_at': None
-            }
-            
-            # JSON으로 직렬화
-            try:
-                bookmark_json = json.dumps(bookmark_data)
-                logger.info(f"북마크 데이터 직렬화 성공: {bookmark_key}")
-            except TypeError as e:
-                logger.error(f"북마크 직렬화 오류: {str(e)}")
-                # 간소화된 데이터 저장
-                simplified_data = {
-                    'id': cabinet_id,
-                    'user_id': user_id,
-                    'cabinet_id': {'id': cabinet_id, 'status': cabinet_status},
-                    'bookmark_status': 'active',
-                    'cabinet_status': cabinet_status,
-                    'created_at': timezone.now().isoformat(),
-                    'updated_at': timezone.now().isoformat(),
-                    'deleted_at': None
-                }
-                bookmark_json = json.dumps(simplified_data)
-                bookmark_data = simplified_data
-            
+            entry = self._build_entry(cabinet_info)
+
             # 파이프라인으로 여러 명령 한번에 실행
-            pipeline = self.redis_conn.pipeline()
-            
             try:
-                pipeline.set(bookmark_key, bookmark_json, ex=self.ttl)
-                pipeline.sadd(user_bookmarks_key, str(cabinet_id))
+                pipeline = self.redis_conn.pipeline()
+                pipeline.hset(user_bookmarks_key, str(cabinet_id), BookmarkEntryCodec.encode(entry))
                 pipeline.expire(user_bookmarks_key, self.ttl)
-                pipeline.sadd("cabinet:bookmarks:changed", f"{user_id}:{cabinet_id}")
+                self._queue_building(pipeline, cabinet_info)
+                pipeline.sadd(self.CHANGED_KEY, f"{user_id}:{cabinet_id}")
                 pipeline.execute()
-                logger.info(f"북마크 Redis에 저장 성공: {bookmark_key}")
+                logger.info(f"북마크 Redis에 저장 성공: {user_bookmarks_key}:{cabinet_id}")
             except Exception as e:
                 logger.error(f"Redis 저장 오류: {str(e)}")
                 return None
-            
-            return bookmark_data
-            
+
+            return self._to_bookmark_data(user_id, cabinet_id, entry)
+
         except Exception as e:
             logger.error(f"북마크 추가 중 예상치 못한 오류: {str(e)}")
             return None
-    
+
     def remove_bookmark(self, user_info, cabinet_info):
         """Redis에서 북마크 상태를 deleted로 변경"""
         try:
-            # user_id 추출
-            if hasattr(user_info, 'user_id'):
-                if hasattr(user_info.user_id, 'id'):
-                    user_id = user_info.user_id.id
-                else:
-                    user_id = user_info.user_id
-            else:
-                user_id = user_info.id
-                
+            user_id = self._extract_user_id(user_info)
             cabinet_id = cabinet_info.id
             cabinet_status = getattr(cabinet_info, 'status', None)
-            
+
             logger.info(f"북마크 삭제 시작: user_id={user_id}, cabinet_id={cabinet_id}, cabinet_status={cabinet_status}")
-            
-            bookmark_key = self._get_bookmark_key(user_id, cabinet_id)
+
             user_bookmarks_key = self._get_user_bookmarks_key(user_id)
-            
+
             # 현재 저장된 북마크 정보 조회
-            bookmark_data_json = self.redis_conn.get(bookmark_key)
-            if not bookmark_data_json:
-                logger.warning(f"삭제할 북마크를 찾을 수 없음: {bookmark_key}")
+            raw_entry = self.redis_conn.hget(user_bookmarks_key, str(cabinet_id))
+            if not raw_entry:
+                logger.warning(f"삭제할 북마크를 찾을 수 없음: {user_bookmarks_key}:{cabinet_id}")
                 return None
-            
-            bookmark_data = json.loads(bookmark_data_json)
-            bookmark_data['bookmark_status'] = 'deleted'  # 북마크 상태만 'deleted'로 변경
-            bookmark_data['cabinet_status'] = cabinet_status  # 캐비닛 상태 업데이트
-            bookmark_data['deleted_at'] = timezone.now().isoformat()
-            bookmark_data['updated_at'] = timezone.now().isoformat()
-            
-            # 파이프라인으로 여러 명령 한번에 실행
+
+            now = self._to_epoch()
+            entry = BookmarkEntryCodec.decode(raw_entry)
+            entry['bookmark_status'] = 'deleted'  # 북마크 상태만 'deleted'로 변경
+            entry['cabinet_status'] = cabinet_status  # 캐비닛 상태 업데이트
+            entry['deleted_at'] = now
+            entry['updated_at'] = now
+
+            # 삭제 항목은 DB 동기화를 위해 해시에 남겨 두고 사용자 해시 TTL과 함께 만료
             pipeline = self.redis_conn.pipeline()
-            pipeline.set(bookmark_key, json.dumps(bookmark_data), ex=self.ttl)
-            pipeline.srem(user_bookmarks_key, str(cabinet_id))
-            pipeline.sadd("cabinet:bookmarks:changed", f"{user_id}:{cabinet_id}")
-            # 중요: user_bookmarks_key가 비어있게 되면 키 자체를 삭제
-            pipeline.scard(user_bookmarks_key)  # 남은 항목 수 확인
-            result = pipeline.execute()
-            
-            remaining_items = result[-1]  # scard 결과
-            if remaining_items == 0:
-                # 북마크가 없으면 키 자체를 삭제
-                self.redis_conn.delete(user_bookmarks_key)
-                logger.info(f"북마크가 모두 삭제되어 키 제거: {user_bookmarks_key}")
-            
-            logger.info(f"북마크 삭제 완료: {bookmark_key}")
-            return bookmark_data
-            
+            pipeline.hset(user_bookmarks_key, str(cabinet_id), BookmarkEntryCodec.encode(entry))
+            pipeline.expire(user_bookmarks_key, self.ttl)
+            pipeline.sadd(self.CHANGED_KEY, f"{user_id}:{cabinet_id}")
+            pipeline.execute()
+
+            logger.info(f"북마크 삭제 완료: {user_bookmarks_key}:{cabinet_id}")
+            return self._to_bookmark_data(user_id, cabinet_id, entry)
+
         except Exception as e:
             logger.error(f"북마크 삭제 중 예상치 못한 오류: {str(e)}")
             return None
-    
+
     def get_bookmarks(self, user_info=None):
-        """사용자의 북마크 목록 조회"""
+        """
+        사용자의 북마크 목록 조회 (HGETALL 2회를 파이프라인으로 묶어 왕복 1회)
+
+        DB에서 적재되지 않은 경우 None을 반환하여 호출자가 load_bookmarks로 적재하도록 합니다.
+        """
         try:
-            # user_id 추출
-            if hasattr(user_info, 'user_id'):
-                if hasattr(user_info.user_id, 'id'):
-                    user_id = user_info.user_id.id
-                else:
-                    user_id = user_info.user_id
-            else:
-                user_id = user_info.id
-            
+            user_id = self._extract_user_id(user_info)
+
             logger.info(f"북마크 목록 조회 시작: user_id={user_id}")
-            
-            user_bookmarks_key = self._get_user_bookmarks_key(user_id)
-            
-            # 사용자의 북마크 캐비닛 ID 목록 조회
-            cabinet_ids = self.redis_conn.smembers(user_bookmarks_key)
-            logger.info(f"사용자({user_id})의 북마크 수: {len(cabinet_ids)}")
-            
-            # 시리얼라이저에 필요한 형식으로 변환된 북마크 객체들
-            transformed_bookmarks = []
-            
-            # 각 북마크의 상세 정보 조회
-            for cabinet_id in cabinet_ids:
-                cabinet_id = cabinet_id.decode() if isinstance(cabinet_id, bytes) else cabinet_id
-                bookmark_key = self._get_bookmark_key(user_id, cabinet_id)
-                bookmark_data_json = self.redis_conn.get(bookmark_key)
-                
-                if bookmark_data_json:
-                    bookmark_data = json.loads(bookmark_data_json)
-                    # 북마크 상태가 active인 것만 포함
-                    if bookmark_data.get('bookmark_status') == 'active':
-                        # BROKEN 상태의 캐비닛은 포함하지 않음
-                        cabinet_status = bookmark_data.get('cabinet_status')
-                        if cabinet_status != CabinetStatusEnum.BROKEN.value:
-                            # 시리얼라이저에 맞는 객체 형태로 변환
-                            bookmark_obj = self._transform_to_serializable_format(bookmark_data)
-                            transformed_bookmarks.append(bookmark_obj)
-            
+
+            pipeline = self.redis_conn.pipeline(transaction=False)
+            pipeline.hgetall(self._get_user_bookmarks_key(user_id))
+            pipeline.hgetall(self.building_index_key)
+            raw_entries, raw_buildings = pipeline.execute()
+
+            raw_entries = {
+                (field.decode() if isinstance(field, bytes) else field): value
+                for field, value in raw_entries.items()
+            }
+            if self.LOADED_FIELD not in raw_entries:
+                logger.info(f"사용자({user_id})의 북마크가 Redis에 적재되지 않음")
+                return None
+            del raw_entries[self.LOADED_FIELD]
+
+            logger.info(f"사용자({user_id})의 북마크 수: {len(raw_entries)}")
+
+            entries = []
+            for cabinet_id, raw_entry in raw_entries.items():
+                entry = BookmarkEntryCodec.decode(raw_entry)
+                # 북마크 상태가 active인 것만 포함
+                if entry['bookmark_status'] != 'active':
+                    continue
+                # BROKEN 상태의 캐비닛은 포함하지 않음
+                if entry['cabinet_status'] == CabinetStatusEnum.BROKEN.value:
+                    continue
+                entries.append((int(cabinet_id), entry))
+
+            buildings = self._resolve_buildings(
+                raw_buildings, {entry['building_id'] for _, entry in entries if entry['building_id']}
+            )
+
+            transformed_bookmarks = [
+                self._transform_to_serializable_format(cabinet_id, entry, buildings)
+                for cabinet_id, entry in sorted(entries, key=lambda item: item[1]['created_at'])
+            ]
+
             logger.info(f"변환된 북마크 객체 수: {len(transformed_bookmarks)}")
             return transformed_bookmarks
-            
+
         except Exception as e:
             logger.error(f"북마크 목록 조회 중 예상치 못한 오류: {str(e)}")
+            return None
+
+    def _resolve_buildings(self, raw_buildings, building_ids):
+        """건물 인덱스에서 건물 정보 조회, 없는 건물만 DB에서 읽어 인덱스에 추가"""
+        buildings = {}
+        for building_id, raw_building in raw_buildings.items():
+            building_id = int(building_id)
+            if building_id in building_ids:
+                buildings[building_id] = json.loads(raw_building)
+
+        missing_ids = building_ids - buildings.keys()
+        if missing_ids:
+            mapping = {}
+            for building in BuildingRepository().get_buildings_by_ids(missing_ids):
+                buildings[building.id] = {'name': building.name, 'floor': building.floor}
+                mapping[str(building.id)] = json.dumps(buildings[building.id])
+            if mapping:
+                try:
+                    pipeline = self.redis_conn.pipeline()
+                    pipeline.hset(self.building_index_key, mapping=mapping)
+                    pipeline.expire(self.building_index_key, self.ttl)
+                    pipeline.execute()
+                except Exception as e:
+                    logger.error(f"건물 인덱스 저장 중 오류: {str(e)}")
+        return buildings
+
+    def _transform_to_serializable_format(self, cabinet_id, entry, buildings):
+        """저장 항목을 시리얼라이저가 기대하는 형식(BookmarkRecord)으로 변환"""
+        building = buildings.get(entry['building_id'], {})
+        return BookmarkRecord(
+            id=cabinet_id,
+            cabinet_id=BookmarkCabinetRecord(
+                id=cabinet_id,
+                cabinet_number=entry['cabinet_number'],
+                status=entry['cabinet_status'],  # 캐비닛의 실제 상태
+                building_id=BookmarkBuildingRecord(
+                    id=entry['building_id'],
+                    name=building.get('name'),
+                    floor=building.get('floor'),
+                ),
+            ),
+            created_at=datetime.fromtimestamp(entry['created_at']),
+            updated_at=datetime.fromtimestamp(entry['updated_at']),
+        )
+
+    def load_bookmarks(self, user_id, bookmarks):
+        """
+        DB 북마크 목록을 파이프라인 한 번으로 Redis에 적재 (read-through)
+
+        DB와 이미 같은 상태이므로 변경 목록에는 추가하지 않으며, 아직 동기화되지 않은
+        Redis 북마크를 덮어쓰지 않도록 HSETNX를 사용합니다. 북마크가 없어도 적재 표시 필드를
+        남겨 다음 조회에서 DB를 다시 읽지 않도록 합니다.
+        """
+        user_bookmarks_key = self._get_user_bookmarks_key(user_id)
+        try:
+            pipeline = self.redis_conn.pipeline()
+            for bookmark in bookmarks:
+                cabinet_info = bookmark.cabinet_id
+                entry = self._build_entry(cabinet_info, created_at=bookmark.created_at)
+                pipeline.hsetnx(user_bookmarks_key, str(cabinet_info.id), BookmarkEntryCodec.encode(entry))
+                self._queue_building(pipeline, cabinet_info)
+            pipeline.hset(user_bookmarks_key, self.LOADED_FIELD, 1)
+            pipeline.expire(user_bookmarks_key, self.ttl)
+            pipeline.execute()
+            logger.info(f"사용자({user_id})의 북마크 {len(bookmarks)}개 Redis 적재 완료")
+            return True
+        except Exception as e:
+            logger.error(f"북마크 Redis 적재 중 오류: {str(e)}")
+            return False
+
+    def pop_changed_bookmarks(self, count):
+        """
+        변경 목록에서 최대 count개를 꺼내 북마크 데이터와 함께 반환 (SPOP + HGET 파이프라인)
+
+        꺼낸 키는 처리 중 목록으로 옮겨지며, DB 커밋 후 ack_changed_bookmarks로 제거하거나
+        실패 시 requeue_changed_bookmarks로 되돌려야 합니다.
+        꺼낸 뒤 다시 변경된 북마크는 변경 목록에 새로 추가되므로 다음 동기화에서 반영됩니다.
+        새 형식 항목이 없으면 이전 JSON 형식 키를 읽습니다.
+        반환값: [(변경 키, 북마크 데이터 또는 None), ...]
+        """
+        changed_keys = self.redis_conn.eval(self.POP_SCRIPT, 2, self.CHANGED_KEY, self.PROCESSING_KEY, count)
+        if not changed_keys:
             return []
-    
-    def _transform_to_serializable_format(self, bookmark_data):
-        """Redis 데이터를 시리얼라이저가 기대하는 형식으로 변환"""
-        # 기본 객체 생성
-        bookmark_obj = type('CabinetBookmarkObj', (), {})()
-        
-        # 필수 속성 설정
-        bookmark_obj.id = bookmark_data.get('id')
-        bookmark_obj.created_at = bookmark_data.get('created_at')
-        bookmark_obj.updated_at = bookmark_data.get('updated_at')
-        
-        # cabinet_id 객체 생성
-        cabinet_obj = type('CabinetObj', (), {})()
-        cabinet_data = bookmark_data.get('cabinet_id', {})
-        
-        if isinstance(cabinet_data, dict):
-            # 딕셔너리인 경우 (복잡한 정보가 저장된 경우)
-            cabinet_obj.id = cabinet_data.get('id')
-            cabinet_obj.cabinet_number = cabinet_data.get('cabinet_number')
-            cabinet_obj.status = cabinet_data.get('status')  # 캐비닛의 실제 상태
-            
-            # building_id 객체 생성
-            building_obj = type('BuildingObj', (), {})()
-            building_data = cabinet_data.get('building', {})
-            
-            if isinstance(building_data, dict):
-                building_obj.id = building_data.get('id')
-                building_obj.name = building_data.get('name')
-                building_obj.floor = building_data.get('floor')
+
+        changed_keys = [key.decode() if isinstance(key, bytes) else key for key in changed_keys]
+        pipeline = self.redis_conn.pipeline(transaction=False)
+        for key in changed_keys:
+            user_id, _, cabinet_id = key.partition(':')
+            pipeline.hget(self._get_user_bookmarks_key(user_id), cabinet_id)
+        raw_entries = pipeline.execute()
+
+        changed_bookmarks = {}
+        legacy_keys = []
+        for key, raw_entry in zip(changed_keys, raw_entries):
+            user_id, _, cabinet_id = key.partition(':')
+            if raw_entry:
+                changed_bookmarks[key] = self._to_bookmark_data(
+                    user_id, cabinet_id, BookmarkEntryCodec.decode(raw_entry)
+                )
             else:
-                # 기본값 설정
-                building_obj.id = None
-                building_obj.name = None
-                building_obj.floor = None
-            
-            cabinet_obj.building_id = building_obj
-        else:
-            # 간단한 정보만 저장된 경우 (cabinet_id가 정수인 경우)
-            cabinet_obj.id = cabinet_data
-            cabinet_obj.cabinet_number = None
-            # 캐비닛 상태 설정 (bookmark_data에서 직접 가져옴)
-            cabinet_obj.status = bookmark_data.get('cabinet_status')
-            
-            building_obj = type('BuildingObj', (), {})()
-            building_obj.id = None
-            building_obj.name = None
-            building_obj.floor = None
-            cabinet_obj.building_id = building_obj
-        
-        # 북마크 객체에 캐비닛 객체 연결
-        bookmark_obj.cabinet_id = cabinet_obj
-        
-        return bookmark_obj
-    
-    def get_changed_bookmarks(self):
-        """변경된 북마크 목록 조회 (DB 동기화용)"""
+                legacy_keys.append(key)
+
+        if legacy_keys:
+            legacy_data = self.redis_conn.mget([
+                self._get_legacy_bookmark_key(*key.split(':', 1)) for key in legacy_keys
+            ])
+            for key, bookmark_data_json in zip(legacy_keys, legacy_data):
+                changed_bookmarks[key] = json.loads(bookmark_data_json) if bookmark_data_json else None
+
+        return [(key, changed_bookmarks[key]) for key in changed_keys]
+
+    def ack_changed_bookmarks(self, keys):
+        """DB에 커밋된 북마크를 처리 중 목록에서 제거"""
+        if not keys:
+            return 0
         try:
-            changed_keys = self.redis_conn.smembers("cabinet:bookmarks:changed")
-            logger.info(f"변경된 북마크 키 수: {len(changed_keys)}")
-            
-            changed_bookmarks = []
-            
-            for key in changed_keys:
-                key = key.decode() if isinstance(key, bytes) else key
-                user_id, cabinet_id = key.split(':')
-                bookmark_key = self._get_bookmark_key(user_id, cabinet_id)
-                bookmark_data_json = self.redis_conn.get(bookmark_key)
-                
-                if bookmark_data_json:
-                    bookmark_data = json.loads(bookmark_data_json)
-                    changed_bookmarks.append(bookmark_data)
-                else:
-                    logger.warning(f"변경 목록에는 있지만 데이터를 찾을 수 없음: {key}")
-            
-            return changed_bookmarks
-            
+            return self.redis_conn.srem(self.PROCESSING_KEY, *keys)
         except Exception as e:
-            logger.error(f"변경된 북마크 목록 조회 중 예상치 못한 오류: {str(e)}")
-            return []
-    
+            # 처리 중 목록에 남은 키는 다음 동기화에서 다시 반영됨 (같은 상태로 덮어쓰므로 안전)
+            logger.error(f"북마크 처리 완료 표시 중 오류 ({len(keys)}개): {str(e)}")
+            return 0
+
+    def requeue_changed_bookmarks(self, keys):
+        """동기화에 실패한 북마크를 처리 중 목록에서 변경 목록으로 되돌림"""
+        if not keys:
+            return 0
+        try:
+            pipeline = self.redis_conn.pipeline()
+            pipeline.sadd(self.CHANGED_KEY, *keys)
+            pipeline.srem(self.PROCESSING_KEY, *keys)
+            return pipeline.execute()[0]
+        except Exception as e:
+            logger.error(f"북마크 변경 목록 복구 중 오류 ({len(keys)}개): {str(e)}")
+            return 0
+
+    def recover_processing_bookmarks(self):
+        """
+        이전 동기화가 커밋/복구하지 못하고 남긴 처리 중 키를 변경 목록으로 되돌림
+
+        동기화 락을 잡은 상태에서만 호출해야 다른 워커가 처리 중인 키를 가져오지 않습니다.
+        """
+        pipeline = self.redis_conn.pipeline()
+        pipeline.scard(self.PROCESSING_KEY)
+        pipeline.sunionstore(self.CHANGED_KEY, [self.CHANGED_KEY, self.PROCESSING_KEY])
+        pipeline.delete(self.PROCESSING_KEY)
+        return pipeline.execute()[0]
+
+    def count_changed_bookmarks(self):
+        """동기화 대기 중인 북마크 변경 수 (이전 동기화가 남긴 처리 중 키 포함)"""
+        pipeline = self.redis_conn.pipeline(transaction=False)
+        pipeline.scard(self.CHANGED_KEY)
+        pipeline.scard(self.PROCESSING_KEY)
+        return sum(pipeline.execute())
+
     def clear_changed_bookmarks(self, processed_keys):
         """처리 완료된 북마크를 변경 목록에서 제거"""
         if not processed_keys:
             return 0
-            
+
         try:
-            result = self.redis_conn.srem("cabinet:bookmarks:changed", *processed_keys)
+            result = self.redis_conn.srem(self.CHANGED_KEY, *processed_keys)
             logger.info(f"처리 완료된 북마크 {len(processed_keys)}개 중 {result}개가 변경 목록에서 제거됨")
             return result
         except Exception as e:
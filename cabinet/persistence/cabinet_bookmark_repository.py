@@ -14,6 +14,13 @@ class CabinetBookmarkRepository:
             deleted_at__isnull=True
         ).first()
     
+    def has_active_bookmark(self, user_id, cabinet_id):
+        return cabinet_bookmarks.objects.filter(
+            user_id=user_id,
+            cabinet_id=cabinet_id,
+            deleted_at__isnull=True
+        ).exists()
+
     def get_deleted_bookmark(self, user_info, cabinet_info):
         # 삭제된 북마크가 있는지 확인
         return cabinet_bookmarks.objects.filter(
@@ -67,8 +74,37 @@ class CabinetBookmarkRepository:
             raise CabinetBookmarkNotFoundException(cabinet_id=cabinet_info.id)
         
     
+    def remove_bookmark_by_ids(self, user_id, cabinet_id):
+        # 활성 북마크 삭제 (조회 없이 UPDATE 1회)
+        now = timezone.now()
+        return cabinet_bookmarks.objects.filter(
+            user_id=user_id,
+            cabinet_id=cabinet_id,
+            deleted_at__isnull=True
+        ).update(deleted_at=now, updated_at=now)
+
+    def get_bookmarks_by_user_and_cabinet_ids(self, user_ids, cabinet_ids):
+        # 동기화 대상 (사용자, 사물함) 조합의 기존 북마크를 한 번에 조회 (삭제된 북마크 포함)
+        return cabinet_bookmarks.objects.filter(
+            user_id__in=user_ids,
+            cabinet_id__in=cabinet_ids
+        ).order_by('id')
+
+    def bulk_create_bookmarks(self, bookmark_list):
+        return cabinet_bookmarks.objects.bulk_create(bookmark_list)
+
+    def bulk_update_bookmarks(self, bookmark_list):
+        # bulk_update는 save()를 거치지 않으므로 updated_at을 직접 설정
+        now = timezone.now()
+        for bookmark in bookmark_list:
+            bookmark.updated_at = now
+        return cabinet_bookmarks.objects.bulk_update(bookmark_list, ['deleted_at', 'updated_at'])
+
     def get_bookmarks(self, user_info):
+        return self.get_bookmarks_by_user_id(user_info.user_id_id)
+
+    def get_bookmarks_by_user_id(self, user_id):
         return cabinet_bookmarks.objects.filter(
-            user_id=user_info.user_id,
+            user_id=user_id,
             deleted_at__isnull=True
         ).select_related('cabinet_id', 'cabinet_id__building_id')
\ No newline at end of file
@@ -0,0 +1,170 @@
+from django.utils import timezone
+from django_redis import get_redis_connection
+import json
+from datetime import timedelta
+import logging
+
+logger = logging.getLogger(__name__)
+
+# KEYS: 배치도, 배치도 버전 / ARGV: 조회 시점의 버전, TTL, 사물함 ID와 직렬화 결과 쌍...
+# DB 조회 후 버전이 바뀌지 않았을 때만 배치도 저장 (그 사이 커밋된 변경의 무효화를 덮어쓰지 않음)
+SET_FLOOR_MAP_IF_VERSION_SCRIPT = """
+local version = redis.call('GET', KEYS[2]) or '0'
+if version ~= ARGV[1] then
+    return 0
+end
+redis.call('DEL', KEYS[1])
+for i = 3, #ARGV, 2 do
+    redis.call('HSET', KEYS[1], ARGV[i], ARGV[i + 1])
+end
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return 1
+"""
+
+# KEYS: 배치도, 배치도 버전 / ARGV: 사물함 ID, 사용자 ID(ownerId), 이름 공개 여부(1/0), 사용자 이름
+# 해당 사물함 항목이 있고 아직 같은 사용자 소유일 때만 isVisible/username을 변경
+# (버전을 올려 변경 전에 DB를 읽은 요청이 이전 값을 저장하지 못하게 함)
+PATCH_OWNER_VISIBILITY_SCRIPT = """
+redis.call('INCR', KEYS[2])
+local raw = redis.call('HGET', KEYS[1], ARGV[1])
+if not raw then
+    return 0
+end
+local entry = cjson.decode(raw)
+if tostring(entry['ownerId']) ~= ARGV[2] then
+    return 0
+end
+entry['isVisible'] = ARGV[3] == '1'
+entry['username'] = ARGV[4]
+redis.call('HSET', KEYS[1], ARGV[1], cjson.encode(entry))
+return 1
+"""
+
+class CabinetFloorMapRedisRepository:
+    """
+    층별(건물 ID별) 사물함 배치도 캐시
+
+    cabinet:floormap:{building_id} 해시에 사물함 ID별 직렬화 결과를 저장합니다.
+    대여 가능 여부(isRentAvailable)는 00시/13시를 기준으로 바뀌므로
+    TTL은 다음 기준 시각을 넘지 않도록 설정합니다.
+
+    cabinet:floormap:version:{building_id}는 무효화/갱신마다 증가하는 버전이며(만료 없음),
+    조회 시점의 버전이 그대로일 때만 DB에서 만든 배치도를 저장하여
+    무효화 이후에 이전 배치도가 다시 저장되지 않도록 합니다.
+    """
+    # 빈 층도 캐시로 인식하기 위한 표시 필드
+    LOADED_FIELD = "_loaded"
+
+    def __init__(self):
+        self.redis_conn = get_redis_connection("default")
+        self.floor_map_key_prefix = "cabinet:floormap:"
+        # 최대 1시간
+        self.max_ttl = 3600
+
+    def _get_floor_map_key(self, building_id):
+        return f"{self.floor_map_key_prefix}{building_id}"
+
+    def _get_version_key(self, building_id):
+        return f"{self.floor_map_key_prefix}version:{building_id}"
+
+    def _get_ttl(self):
+        """다음 대여 가능 판정 기준 시각(00시 또는 13시)까지 남은 초"""
+        now = timezone.now()
+        if now.hour < 13:
+            boundary = now.replace(hour=13, minute=0, second=0, microsecond=0)
+        else:
+            boundary = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+        return max(1, min(self.max_ttl, int((boundary - now).total_seconds())))
+
+    def get_floor_maps(self, building_ids):
+        """
+        건물 ID별 캐시된 배치도와 배치도 버전 조회
+
+        반환값: ({building_id: [entry, ...] 또는 None}, {building_id: 버전} 또는 Redis 오류 시 None)
+        버전은 DB 조회 후 set_floor_maps에 그대로 전달합니다.
+        """
+        try:
+            pipeline = self.redis_conn.pipeline(transaction=False)
+            for building_id in building_ids:
+                pipeline.hgetall(self._get_floor_map_key(building_id))
+                pipeline.get(self._get_version_key(building_id))
+            results = pipeline.execute()
+        except Exception as e:
+            logger.error(f"배치도 캐시 조회 중 오류 발생: {str(e)}")
+            return {building_id: None for building_id in building_ids}, None
+
+        floor_maps = {}
+        versions = {}
+        for building_id, raw_map, version in zip(building_ids, results[::2], results[1::2]):
+            versions[building_id] = version.decode() if isinstance(version, bytes) else (version or '0')
+            if not raw_map:
+                floor_maps[building_id] = None
+                continue
+            floor_maps[building_id] = [
+                json.loads(value)
+                for field, value in raw_map.items()
+                if field not in (self.LOADED_FIELD, self.LOADED_FIELD.encode())
+            ]
+        return floor_maps, versions
+
+    def set_floor_maps(self, floor_maps, versions):
+        """
+        건물 ID별 배치도({building_id: [entry, ...]}) 저장
+
+        versions는 get_floor_maps가 반환한 조회 시점의 버전이며,
+        그 사이 무효화된 건물의 배치도는 저장하지 않습니다. 저장한 건물 수를 반환합니다.
+        """
+        if versions is None:
+            return 0
+        try:
+            ttl = self._get_ttl()
+            pipeline = self.redis_conn.pipeline(transaction=False)
+            for building_id, entries in floor_maps.items():
+                args = [versions.get(building_id, '0'), ttl, self.LOADED_FIELD, 1]
+                for entry in entries:
+                    args.extend((str(entry['id']), json.dumps(entry)))
+                pipeline.eval(
+                    SET_FLOOR_MAP_IF_VERSION_SCRIPT, 2,
+                    self._get_floor_map_key(building_id), self._get_version_key(building_id), *args
+                )
+            stored = sum(pipeline.execute())
+            if stored < len(floor_maps):
+                logger.debug(f"조회 중 무효화된 배치도 {len(floor_maps) - stored}개는 저장하지 않음")
+            return stored
+        except Exception as e:
+            logger.error(f"배치도 캐시 저장 중 오류 발생: {str(e)}")
+            return 0
+
+    def patch_owner_visibility(self, building_id, cabinet_id, owner_id, is_visible, username):
+        """
+        캐시된 배치도에서 사물함 한 개의 isVisible/username만 갱신 (배치도 전체를 다시 만들지 않음)
+
+        갱신되었으면 True, 캐시가 없거나 소유자가 바뀌었으면 False를 반환합니다.
+        """
+        try:
+            patched = self.redis_conn.eval(
+                PATCH_OWNER_VISIBILITY_SCRIPT, 2,
+                self._get_floor_map_key(building_id), self._get_version_key(building_id),
+                str(cabinet_id), str(owner_id), '1' if is_visible else '0', username or ''
+            )
+            return bool(patched)
+        except Exception as e:
+            logger.error(f"배치도 캐시 갱신 중 오류 발생: {str(e)}")
+            # 갱신하지 못한 배치도는 삭제하여 다음 조회 시 다시 만들도록 함
+            self.invalidate([building_id])
+            return False
+
+    def invalidate(self, building_ids):
+        """배치도 캐시 삭제 (버전을 올려 삭제 전에 DB를 읽은 요청의 저장도 막음)"""
+        building_ids = [building_id for building_id in building_ids if building_id is not None]
+        if not building_ids:
+            return
+        try:
+            pipeline = self.redis_conn.pipeline()
+            for building_id in building_ids:
+                pipeline.incr(self._get_version_key(building_id))
+            pipeline.delete(*[self._get_floor_map_key(building_id) for building_id in building_ids])
+            pipeline.execute()
+            logger.debug(f"배치도 캐시 삭제: {building_ids}")
+        except Exception as e:
+            logger.error(f"배치도 캐시 삭제 중 오류 발생: {str(e)}")
@@ -1,3 +1,6 @@
+from django.db import transaction
+from django.db.models import F, Q
+from django.db.models.signals import post_save
 from django.utils import timezone
 
 from cabinet.models import cabinet_histories
@@ -34,6 +37,53 @@ class CabinetHistoryRepository:
             raise CabinetNotFoundException()
         return result
         
+    def bulk_rent_cabinets(self, rentals : list):
+        """
+        (사물함, 사용자 ID) 목록의 대여 이력을 한 번에 기록
+
+        rent_cabinet과 같이 동일 사용자/사물함 이력이 있으면 갱신하고 없으면 생성합니다.
+        bulk_create는 post_save를 발생시키지 않으므로 커밋 후 생성된 이력에 대해 직접 발송합니다.
+        """
+        now = timezone.now()
+        expired_at = now + timezone.timedelta(days=120)
+
+        existing = {}
+        pair_filter = Q()
+        for cabinet, user_id in rentals:
+            pair_filter |= Q(cabinet_id=cabinet.id, user_id=user_id)
+        for history in cabinet_histories.objects.filter(pair_filter).order_by('id'):
+            existing[(history.cabinet_id_id, history.user_id_id)] = history
+
+        to_create = []
+        to_update = []
+        for cabinet, user_id in rentals:
+            history = existing.get((cabinet.id, user_id))
+            if history is None:
+                to_create.append(cabinet_histories(
+                    user_id_id=user_id,
+                    cabinet_id=cabinet,
+                    expired_at=expired_at,
+                    ended_at=None,
+                ))
+            else:
+                history.expired_at = expired_at
+                history.ended_at = None
+                history.created_at = now
+                history.updated_at = now
+                to_update.append(history)
+
+        created = cabinet_histories.objects.bulk_create(to_create)
+        if to_update:
+            cabinet_histories.objects.bulk_update(to_update, ['expired_at', 'ended_at', 'created_at', 'updated_at'])
+
+        def send_created_signals():
+            for history in created:
+                post_save.send(sender=cabinet_histories, instance=history, created=True, raw=False,
+                               using=cabinet_histories.objects.db, update_fields=None)
+        transaction.on_commit(send_created_signals)
+
+        return created + to_update
+        
     def return_cabinet(self, cabinet : object, user_id : int):
         result = cabinet_histories.objects.update_or_create(
             user_id=user_id,
@@ -50,10 +100,49 @@ class CabinetHistoryRepository:
             raise CabinetReturnFailedException(cabinet_id=cabinet.id)
         return result
     
+    def end_active_histories(self, cabinet_ids : list, now=None):
+        """사물함 목록의 활성 대여 이력을 하나의 UPDATE로 종료"""
+        now = now or timezone.now()
+        return cabinet_histories.objects.filter(
+            cabinet_id__in=cabinet_ids,
+            ended_at=None
+        ).update(expired_at=now, ended_at=now, updated_at=now)
+
+    def bulk_return_cabinets(self, cabinet_list : list):
+        """
+        사물함 목록의 활성 대여 이력을 한 번에 종료
+
+        활성 이력은 하나의 UPDATE로 종료하고, return_cabinet과 같이 사용자가 있지만 그 사용자의 활성 이력이
+        없던 사물함(has_active_history 주석이 False)에는 종료된 이력을 생성합니다.
+        """
+        now = timezone.now()
+        self.end_active_histories([cabinet.id for cabinet in cabinet_list], now=now)
+
+        created = cabinet_histories.objects.bulk_create([
+            cabinet_histories(
+                user_id_id=cabinet.user_id_id,
+                cabinet_id=cabinet,
+                expired_at=now,
+                ended_at=now,
+            )
+            for cabinet in cabinet_list
+            if cabinet.user_id_id and not getattr(cabinet, 'has_active_history', True)
+        ])
+
+        def send_created_signals():
+            for history in created:
+                post_save.send(sender=cabinet_histories, instance=history, created=True, raw=False,
+                               using=cabinet_histories.objects.db, update_fields=None)
+        if created:
+            transaction.on_commit(send_created_signals)
+
+        return created
+
     def get_cabinet_histories_by_user_id(self, user_id : int):
-        return cabinet_histories.objects.filter(user_id=user_id).order_by(
-            'ended_at'
-        ).extra(select={'ended_at_null': 'ended_at IS NULL'}, order_by=['-ended_at_null', '-ended_at'])
+        """사용자 대여 이력 (사용 중인 이력 먼저, 이후 종료일 내림차순)"""
+        return cabinet_histories.objects.filter(user_id=user_id).select_related(
+            'cabinet_id__building_id'
+        ).order_by(F('ended_at').desc(nulls_first=True), '-id')
 
     
     def get_cabinet_histories_by_cabinet_id(self, cabinet_id : int):
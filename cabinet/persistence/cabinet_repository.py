@@ -1,16 +1,36 @@
+from django.db import DatabaseError, transaction
 from django.utils import timezone
-from cabinet.models import cabinets
-from django.db.models import Count, Case, When
-from cabinet.exceptions import CabinetNotFoundException, CabinetAlreadyRentedException, CabinetNotRentedException, CabinetReturnFailedException, CabinetStatusUpdateException, UserHasRentalException, CabinetReturnException
+from cabinet.models import cabinets, cabinet_histories
+from django.db.models import Count, Case, When, Exists, F, OuterRef, Subquery
+from cabinet.exceptions import CabinetNotFoundException, CabinetAlreadyRentedException, CabinetNotRentedException, CabinetRentFailedException, CabinetStatusUpdateException, UserHasRentalException, CabinetReturnException
 
 from cabinet.persistence.cabinet_history_repository import CabinetHistoryRepository
+from cabinet.persistence.cabinet_floor_map_redis_repository import CabinetFloorMapRedisRepository
+from cabinet.persistence.cabinet_status_index_redis_repository import CabinetStatusIndexRedisRepository
 from cabinet.type import CabinetStatusEnum
+from user.persistence.user_profile_redis_repository import UserProfileRedisRepository
 
 cabinet_history_repository = CabinetHistoryRepository()
 
-from cabinet.exceptions import CabinetNotFoundException, CabinetAlreadyRentedException, UserHasRentalException
 
 class CabinetRepository:
+    def _on_cabinets_changed(self, cabinet_ids=None, building_ids=None, user_ids=None):
+        """
+        사물함 상태/사용자 변경 시 커밋 후 해당 층 배치도 캐시와 사물함 상태 인덱스 무효화
+
+        user_ids(이전/새 사용자)가 주어지면 해당 사용자의 프로필(현재 대여 정보) 캐시도 무효화합니다.
+        """
+        if building_ids is None:
+            building_ids = cabinets.objects.filter(id__in=cabinet_ids).values_list('building_id', flat=True)
+        building_ids = set(building_ids)
+        transaction.on_commit(lambda: CabinetFloorMapRedisRepository().invalidate(building_ids))
+        if cabinet_ids:
+            cabinet_ids = set(cabinet_ids)
+            transaction.on_commit(lambda: CabinetStatusIndexRedisRepository().invalidate(cabinet_ids))
+        if user_ids:
+            user_ids = {getattr(user_id, 'id', user_id) for user_id in user_ids}
+            transaction.on_commit(lambda: UserProfileRedisRepository().invalidate(user_ids))
+
     def get_cabinets_by_building_ids(self, building_ids):
         return cabinets.objects.filter(
             building_id__in=building_ids
@@ -19,6 +39,31 @@ class CabinetRepository:
     def get_cabinet_by_id(self, cabinet_id : int):
         return cabinets.objects.filter(id=cabinet_id).select_related('user_id', 'cabinet_positions', 'building_id').first()
 
+    def get_cabinets_by_ids(self, cabinet_ids : list):
+        return cabinets.objects.filter(id__in=cabinet_ids)
+
+    def get_cabinet_detail_by_id(self, cabinet_id : int, availability=None):
+        """
+        사물함 상세 조회 (단일 쿼리)
+
+        건물, 사용자와 사용자 인증 정보를 함께 조인하고,
+        현재 대여 중인 이력의 만료일을 active_expired_at으로 주석 처리합니다.
+        availability(CabinetRentAvailability)가 주어지면 대여 가능 여부도 함께 계산합니다.
+        """
+        active_history = cabinet_histories.objects.filter(
+            cabinet_id=OuterRef('pk'),
+            ended_at__isnull=True
+        ).order_by('-created_at')
+
+        queryset = cabinets.objects.filter(id=cabinet_id).select_related(
+            'user_id', 'user_id__authn_info', 'building_id'
+        ).annotate(
+            active_expired_at=Subquery(active_history.values('expired_at')[:1])
+        )
+        if availability is not None:
+            queryset = availability.annotate(queryset)
+        return queryset.first()
+
     #TODO: 이력 조회를 위한 메소드로 변경함에 따라 이후 로직 변경
     def check_valid_rental(self, user_id : int, cabinet_id : int):
         if cabinet_history_repository.get_renting_cabinet_history_by_user_id(user_id) is None :
@@ -39,7 +84,7 @@ class CabinetRepository:
         if self.get_cabinet_by_id(cabinet_id=cabinet_id) is None :
             raise CabinetNotFoundException(cabinet_id=cabinet_id)
         
-    def update_cabinet_status(self, cabinet_id : int, user_id : int, status : str):
+    def update_cabinet_status(self, cabinet_id : int, user_id : int, status : str, previous_user_id : int = None):
         result =  cabinets.objects.filter(id=cabinet_id).update(
             status=status, 
             user_id_id=user_id,
@@ -48,65 +93,154 @@ class CabinetRepository:
 
         if not result:
             raise CabinetStatusUpdateException(cabinet_id=cabinet_id)
+        self._on_cabinets_changed(cabinet_ids=[cabinet_id], user_ids=[user_id, previous_user_id])
+        return result
+    
+    def get_cabinet_for_rent(self, cabinet_id : int):
+        """대여를 위해 사물함 행 잠금 (다른 트랜잭션이 잠근 경우 대기하지 않고 실패)"""
+        try:
+            return cabinets.objects.select_for_update(nowait=True).filter(id=cabinet_id).first()
+        except DatabaseError:
+            raise CabinetRentFailedException(cabinet_id=cabinet_id)
+
+    def rent_cabinet_if_available(self, cabinet_id : int, user_id : int):
+        """대여 가능한 상태일 때만 사용 중으로 변경 (UPDATE ... WHERE status='AVAILABLE')"""
+        result = cabinets.objects.filter(id=cabinet_id, status='AVAILABLE').update(
+            status='USING',
+            user_id_id=user_id,
+            updated_at=timezone.now()
+        )
+
+        if not result:
+            raise CabinetAlreadyRentedException(cabinet_id=cabinet_id)
+        self._on_cabinets_changed(cabinet_ids=[cabinet_id], user_ids=[user_id])
+        return result
+
+    def get_cabinets_for_update_by_ids(self, cabinet_ids : list):
+        """대여 배치 처리를 위해 사물함 행 잠금 후 조회 (트랜잭션 내에서 호출)"""
+        return cabinets.objects.select_for_update().filter(id__in=cabinet_ids)
+
+    def get_renting_user_ids(self, user_ids : list):
+        """주어진 사용자 중 사물함을 사용 중인 사용자 ID 집합"""
+        return set(
+            cabinets.objects.filter(user_id__in=user_ids, status='USING').values_list('user_id', flat=True)
+        )
+
+    def bulk_update_cabinet_rentals(self, cabinet_list : list):
+        """대여 처리된 사물함의 사용자/상태를 한 번에 반영"""
+        now = timezone.now()
+        for cabinet in cabinet_list:
+            cabinet.updated_at = now
+        result = cabinets.objects.bulk_update(cabinet_list, ['user_id', 'status', 'updated_at'])
+        self._on_cabinets_changed(
+            cabinet_ids=[cabinet.id for cabinet in cabinet_list],
+            building_ids=[cabinet.building_id_id for cabinet in cabinet_list],
+            user_ids=[cabinet.user_id_id for cabinet in cabinet_list]
+        )
         return result
     
     def get_cabinets_exact_match_by_cabinet_number(self, cabinet_number : int):
-        return cabinets.objects.filter(cabinet_number__exact=cabinet_number)
+        return cabinets.objects.filter(cabinet_number__exact=cabinet_number).select_related('building_id')
     
     def get_cabinets_contains_by_building_name(self, building_name : str):
-        return cabinets.objects.filter(building_id__name__contains=building_name)
+        return cabinets.objects.filter(building_id__name__contains=building_name).select_related('building_id')
     
     def get_all_cabinets(self) :
         return cabinets.objects.all().order_by('id')
     
+    def _get_cabinets_for_transition(self, cabinet_ids: list):
+        """
+        상태 변경 대상 사물함 행 잠금 후 조회 (트랜잭션 내에서 호출)
+
+        현재 사용자의 활성 대여 이력 존재 여부를 has_active_history로 주석 처리합니다.
+        """
+        active_history = cabinet_histories.objects.filter(
+            cabinet_id=OuterRef('pk'),
+            user_id=OuterRef('user_id'),
+            ended_at__isnull=True
+        )
+        return {
+            cabinet.id: cabinet
+            for cabinet in cabinets.objects.select_for_update().filter(id__in=cabinet_ids).annotate(
+                has_active_history=Exists(active_history)
+            )
+        }
+
+    def _get_changed_cabinets(self, cabinet_ids: list):
+        """응답용으로 변경된 사물함을 건물/사용자 정보와 함께 요청 순서대로 재조회"""
+        cabinet_map = {
+            cabinet.id: cabinet
+            for cabinet in cabinets.objects.filter(id__in=cabinet_ids).select_related('building_id', 'user_id')
+        }
+        return [cabinet_map[cabinet_id] for cabinet_id in cabinet_ids if cabinet_id in cabinet_map]
+
     def return_cabinets_by_ids(self, cabinet_ids: list):
         """
         특정 ID 목록의 사물함을 반납처리하고 성공/실패한 캐비닛 정보 반환
+
+        사물함 수와 관계없이 한 트랜잭션에서 다음 쿼리로 처리합니다.
+        1) 대상 사물함 행 잠금 + 반납 가능 여부 분류 (활성 이력 존재 여부 주석)
+        2) 활성 대여 이력 일괄 종료
+        3) 사물함 상태 일괄 변경 (USING/OVERDUE인 행만 AVAILABLE로)
+        4) 응답용 사물함 재조회 (건물 정보 포함)
         """
+        cabinet_ids = list(dict.fromkeys(cabinet_ids))
         failed_ids = []
-        successful_cabinets = []
-        
-        for cabinet_id in cabinet_ids:
-            try:
-                # 먼저 해당 ID의 캐비닛이 존재하는지 확인
-                cabinet = self.get_cabinet_by_id(cabinet_id)
-                if not cabinet:
-                    raise CabinetNotFoundException(cabinet_id=cabinet_id)
-                
-                # USING 또는 OVERDUE 상태인지 확인
-                if cabinet.status not in ['USING', 'OVERDUE'] or not cabinet.user_id:
+
+        with transaction.atomic():
+            cabinet_map = self._get_cabinets_for_transition(cabinet_ids)
+
+            returnable_cabinets = []
+            for cabinet_id in cabinet_ids:
+                cabinet = cabinet_map.get(cabinet_id)
+                if cabinet is None:
                     failed_ids.append({
                         'id': cabinet_id,
-                        'reason': '반납 가능한 상태(USING 또는 OVERDUE)가 아닙니다'
+                        'reason': '해당 ID의 사물함이 존재하지 않습니다'
                     })
-                    continue
-                
-                # 활성 대여 이력 종료
-                cabinet_history_repository.return_cabinet(cabinet, cabinet.user_id)
-            
-                # 사물함 상태 업데이트
-                updated = self.update_cabinet_status(cabinet_id, None, 'AVAILABLE')
-                
-                if updated:
-                    cabinet.refresh_from_db()
-                    successful_cabinets.append(cabinet)
-                else:
+                elif cabinet.status not in ['USING', 'OVERDUE'] or not cabinet.user_id_id:
                     failed_ids.append({
-                        'id': cabinet_id, 
-                        'reason': '업데이트 실패'
+                        'id': cabinet_id,
+                        'reason': '반납 가능한 상태(USING 또는 OVERDUE)가 아닙니다'
                     })
-                    
-            except cabinets.DoesNotExist:
-                failed_ids.append({
-                    'id': cabinet_id, 
-                    'reason': '해당 ID의 사물함이 존재하지 않습니다'
-                })
-        
-        return successful_cabinets, failed_ids
-    
+                else:
+                    returnable_cabinets.append(cabinet)
+
+            if not returnable_cabinets:
+                return [], failed_ids
+
+            # 활성 대여 이력 종료
+            cabinet_history_repository.bulk_return_cabinets(returnable_cabinets)
+
+            # 사물함 상태 업데이트
+            returnable_ids = [cabinet.id for cabinet in returnable_cabinets]
+            cabinets.objects.filter(id__in=returnable_ids, status__in=['USING', 'OVERDUE']).update(
+                status='AVAILABLE',
+                user_id_id=None,
+                updated_at=timezone.now()
+            )
+            self._on_cabinets_changed(
+                cabinet_ids=returnable_ids,
+                building_ids=[cabinet.building_id_id for cabinet in returnable_cabinets],
+                user_ids=[cabinet.user_id_id for cabinet in returnable_cabinets]
+            )
+
+        return self._get_changed_cabinets(returnable_ids), failed_ids
+
+    # 관리자 일괄 상태 변경에서 허용하는 전이 (변경할 상태 -> 변경 가능한 현재 상태)
+    ADMIN_STATUS_TRANSITIONS = {
+        'AVAILABLE': ('USING', 'OVERDUE', 'BROKEN'),
+        'BROKEN': ('AVAILABLE', 'USING', 'OVERDUE'),
+    }
+
     def change_cabinet_status_by_ids(self, cabinet_ids, new_status, reason=''):
         """
         관리자용: 여러 사물함의 상태를 변경합니다.
+
+        전이 가능 여부를 메모리에서 검증한 뒤, 활성 대여 이력 종료와 상태 변경을
+        각각 하나의 UPDATE로 처리합니다. 배치도 캐시는 영향받은 층마다 한 번 무효화됩니다.
+        - BROKEN: 활성 대여 이력 종료, 사유 기록
+        - AVAILABLE: 활성 대여 이력 종료(사용자가 있던 사물함은 반납 이력 보장), 사용자와 사유 초기화
         
         Args:
             cabinet_ids: 상태를 변경할 사물함 ID 목록
@@ -117,68 +251,62 @@ class CabinetRepository:
             successful_cabinets: 성공적으로 상태가 변경된 사물함 목록
             failed_ids: 상태 변경에 실패한 사물함 ID와 실패 사유
         """
-        successful_cabinets = []
+        cabinet_ids = list(dict.fromkeys(cabinet_ids))
+        allowed_statuses = self.ADMIN_STATUS_TRANSITIONS.get(new_status)
+        if allowed_statuses is None:
+            return [], [
+                {"id": cabinet_id, "reason": f"{new_status} 상태로는 일괄 변경할 수 없습니다."}
+                for cabinet_id in cabinet_ids
+            ]
+
         failed_ids = []
-        
-        for cabinet_id in cabinet_ids:
-            try:
-                cabinet = self.get_cabinet_by_id(cabinet_id)
-                
-                if not cabinet:
+        with transaction.atomic():
+            cabinet_map = self._get_cabinets_for_transition(cabinet_ids)
+
+            changed_cabinets = []
+            for cabinet_id in cabinet_ids:
+                cabinet = cabinet_map.get(cabinet_id)
+                if cabinet is None:
                     failed_ids.append({
                         "id": cabinet_id,
                         "reason": "사물함을 찾을 수 없습니다."
                     })
-                    continue
-                
-                # 단일 사물함 상태 변경 처리
-                updated_cabinet = self.update_cabinet_status_with_history(
-                    cabinet, new_status, reason
-                )
-                
-                successful_cabinets.append(updated_cabinet)
-                
-            except Exception as e:
-                failed_ids.append({
-                    "id": cabinet_id,
-                    "reason": str(e)
-                })
-        
-        return successful_cabinets, failed_ids
-    
-    def update_cabinet_status_with_history(self, cabinet, new_status, reason=''):
-        # 상태별 처리 로직 분리 호출
-        if new_status == "BROKEN":
-            self.handle_broken_status(cabinet, reason)
-        elif new_status == "AVAILABLE":
-            self.handle_available_status(cabinet, cabinet.user_id)
-        
-        # DB 업데이트 (save 호출 대신 update 사용)
-        self.update_cabinet_status_and_reason(cabinet)
-        
-        return cabinet
+                elif cabinet.status == new_status:
+                    failed_ids.append({
+                        "id": cabinet_id,
+                        "reason": f"이미 {new_status} 상태입니다."
+                    })
+                elif cabinet.status not in allowed_statuses:
+                    failed_ids.append({
+                        "id": cabinet_id,
+                        "reason": f"{cabinet.status} 상태에서 {new_status} 상태로 변경할 수 없습니다."
+                    })
+                else:
+                    changed_cabinets.append(cabinet)
 
-    def handle_broken_status(self, cabinet, reason):
-        current_history = cabinet_history_repository.get_cabinet_histories_by_cabinet_id(cabinet.id)
-        if current_history:
-            self.update_cabinet_history_ended(current_history)
+            if not changed_cabinets:
+                return [], failed_ids
 
-    def handle_available_status(self, cabinet, old_user):
-        current_history = cabinet_history_repository.get_cabinet_histories_by_cabinet_id(cabinet.id)
-        if current_history:
-            self.update_cabinet_history_ended(current_history)
-        
-        # 사용자 정보 초기화
-        cabinet.reason = None
-        cabinet.user_id = None
-        
-        # 사용자가 있었다면 반납 처리
-        if old_user:
-            try:
-                cabinet_history_repository.return_cabinet(cabinet, old_user)
-            except CabinetReturnFailedException:
-                # 이미 반납된 경우 무시 (히스토리에서 이미 처리됨)
-                pass
+            changed_ids = [cabinet.id for cabinet in changed_cabinets]
+            now = timezone.now()
+
+            # 활성 대여 이력 종료
+            if new_status == "AVAILABLE":
+                cabinet_history_repository.bulk_return_cabinets(changed_cabinets)
+                updates = {'status': new_status, 'reason': None, 'user_id_id': None}
+            else:
+                cabinet_history_repository.end_active_histories(changed_ids, now=now)
+                updates = {'status': new_status, 'reason': reason}
+
+            # 검증 이후 다른 요청이 상태를 바꾸지 않았는지 조건부로 변경
+            cabinets.objects.filter(id__in=changed_ids, status__in=allowed_statuses).update(updated_at=now, **updates)
+            self._on_cabinets_changed(
+                cabinet_ids=changed_ids,
+                building_ids=[cabinet.building_id_id for cabinet in changed_cabinets],
+                user_ids=[cabinet.user_id_id for cabinet in changed_cabinets]
+            )
+
+        return self._get_changed_cabinets(changed_ids), failed_ids
 
     def update_cabinet_history_ended(self, history):
         history.ended_at = timezone.now()
@@ -188,22 +316,6 @@ class CabinetRepository:
         if not result:
             raise CabinetReturnException(cabinet_id=history.cabinet_id.id)
         return result
-
-    def update_cabinet_status_and_reason(self, cabinet):
-        """
-        캐비닛 변경사항 저장 (save 대신 update 사용)
-        """
-        # update 메소드 사용하여 DB 직접 업데이트
-        result = cabinets.objects.filter(id=cabinet.id).update(
-            status=cabinet.status,
-            reason=cabinet.reason,
-            user_id=cabinet.user_id,
-            updated_at=timezone.now()
-        )
-
-        if not result:
-            raise CabinetStatusUpdateException(cabinet_id=cabinet.id)
-        return result
         
 
     def assign_cabinet_to_user(self, cabinet_id, user_auth_info, status="USING"):
@@ -281,6 +393,8 @@ class CabinetRepository:
             user_id: 할당 대상 사용자 ID
             status: 변경할 상태
         """
+        previous_user_id = cabinet.user_id_id
+
         # 메모리 상의 객체 업데이트
         cabinet.user_id = user_id
         cabinet.status = status
@@ -295,6 +409,11 @@ class CabinetRepository:
         
         # 메모리 객체의 updated_at 필드도 업데이트
         cabinet.updated_at = timezone.now()
+        self._on_cabinets_changed(
+            cabinet_ids=[cabinet.id],
+            building_ids=[cabinet.building_id_id],
+            user_ids=[previous_user_id, cabinet.user_id_id]
+        )
 
     def create_cabinet_history(self, cabinet, user_id, status):
         """
@@ -341,63 +460,34 @@ class CabinetRepository:
     
     def get_cabinets_by_status(self, status_param):
         """
-        특정 상태의 사물함 목록을 조회합니다.
+        특정 상태의 사물함 목록 QuerySet을 조회합니다.
+
+        건물/사용자/위치는 JOIN으로, 진행 중인 대여 이력의 날짜는 Subquery로 함께 조회하여
+        페이지 단위로 잘라도 한 번의 쿼리로 처리됩니다.
+        - OVERDUE: rentalStartDate(대여 시작일), overDate(반납 기한)
+        - BROKEN: rentalStartDate(대여 시작일), brokenDate(BROKEN으로 변경된 시점 = updated_at)
         """
-        # 해당 상태의 모든 사물함 조회
         cabinets_qs = cabinets.objects.filter(
             status=status_param
-        ).select_related('building_id', 'user_id')
-        
+        ).select_related('building_id', 'user_id', 'cabinet_positions')
+
         if not cabinets_qs.exists():
             raise CabinetNotFoundException()
-        
-        results = []
-        for cabinet in cabinets_qs:
-            cabinet_data = {
-                'id': cabinet.id,
-                'building': cabinet.building_id.name if cabinet.building_id else None,
-                'floor': cabinet.building_id.floor if cabinet.building_id else None,
-                'section': cabinet.building_id.section if hasattr(cabinet.building_id, 'section') else None,
-                'position': {
-                    'x': cabinet.cabinet_positions.cabinet_x_pos,
-                    'y': cabinet.cabinet_positions.cabinet_y_pos
-                } if hasattr(cabinet, 'cabinet_positions') and cabinet.cabinet_positions else None,
-                'cabinetNumber': cabinet.cabinet_number,
-                'status': cabinet.status,
-                'reason': cabinet.reason,
-                'user': None,
-            }
-            
-            # 사용자 정보 추가 (사용중인 경우)
-            if cabinet.user_id:
-                user = cabinet.user_id
-                cabinet_data['user'] = {
-                    'studentNumber': user.student_number if hasattr(user, 'student_number') else None,
-                    'name': user.name if hasattr(user, 'name') else None
-                }
-            
-            # 상태별 추가 정보
+
+        if status_param in ('OVERDUE', 'BROKEN'):
+            active_history = cabinet_histories.objects.filter(
+                cabinet_id=OuterRef('pk'),
+                ended_at__isnull=True
+            ).order_by('id')
+            cabinets_qs = cabinets_qs.annotate(
+                rentalStartDate=Subquery(active_history.values('created_at')[:1])
+            )
             if status_param == 'OVERDUE':
-                rental_history = cabinet_history_repository.get_cabinet_histories_by_cabinet_id(cabinet.id)
-                
-                if rental_history:
-                    cabinet_data['rentalStartDate'] = rental_history.created_at
-                    cabinet_data['overDate'] = rental_history.expired_at
-            
-            elif status_param == "BROKEN":
-                # BROKEN 상태일 때 날짜 처리 방식 수정
-                # 1. 먼저 현재 사용 중인 히스토리가 있는지 확인
-                current_history = cabinet_history_repository.get_cabinet_histories_by_cabinet_id(cabinet.id)
-                
-                if current_history:
-                    cabinet_data['rentalStartDate'] = current_history.created_at
-                
-                # 2. 항상 cabinet의 updated_at을 brokenDate로 사용 (BROKEN으로 상태가 변경된 시점)
-                cabinet_data['brokenDate'] = cabinet.updated_at
-            
-            results.append(cabinet_data)
-        
-        return results    
+                cabinets_qs = cabinets_qs.annotate(overDate=Subquery(active_history.values('expired_at')[:1]))
+            else:
+                cabinets_qs = cabinets_qs.annotate(brokenDate=F('updated_at'))
+
+        return cabinets_qs
 
     def get_cabinet_by_user_id(self, user_id):
         """
@@ -0,0 +1,78 @@
+from django_redis import get_redis_connection
+import json
+import logging
+
+from cabinet.persistence.cabinet_bookmark_redis_repository import BookmarkBuildingRecord, BookmarkCabinetRecord
+
+logger = logging.getLogger(__name__)
+
+class CabinetStatusIndexRedisRepository:
+    """
+    사물함 상태 인덱스 캐시
+
+    cabinet:status_index 해시에 사물함 ID별 상태, 번호, 건물 정보를 저장하여
+    북마크 추가/삭제 시 DB 조회 없이 사물함 존재 여부와 상태를 확인합니다.
+    사물함 상태/사용자 변경 시 CabinetRepository가 커밋 후 해당 필드를 삭제합니다.
+    """
+
+    def __init__(self):
+        self.redis_conn = get_redis_connection("default")
+        self.index_key = "cabinet:status_index"
+        # 12시간 = 43200초
+        self.ttl = 43200
+
+    def get_cabinet(self, cabinet_id):
+        """캐시된 사물함 정보 조회 (없거나 Redis 오류 시 None)"""
+        try:
+            raw = self.redis_conn.hget(self.index_key, str(cabinet_id))
+        except Exception as e:
+            logger.error(f"사물함 상태 인덱스 조회 중 오류 발생: {str(e)}")
+            return None
+
+        if not raw:
+            return None
+
+        data = json.loads(raw)
+        building = data.get('building') or {}
+        return BookmarkCabinetRecord(
+            id=data.get('id'),
+            cabinet_number=data.get('cabinet_number'),
+            status=data.get('status'),
+            building_id=BookmarkBuildingRecord(
+                id=building.get('id'),
+                name=building.get('name'),
+                floor=building.get('floor'),
+            ),
+        )
+
+    def set_cabinet(self, cabinet):
+        """사물함 모델 객체를 인덱스에 저장"""
+        building = cabinet.building_id
+        data = {
+            'id': cabinet.id,
+            'cabinet_number': cabinet.cabinet_number,
+            'status': cabinet.status,
+            'building': {
+                'id': building.id,
+                'name': building.name,
+                'floor': building.floor,
+            } if building else None,
+        }
+        try:
+            pipeline = self.redis_conn.pipeline()
+            pipeline.hset(self.index_key, str(cabinet.id), json.dumps(data))
+            pipeline.expire(self.index_key, self.ttl)
+            pipeline.execute()
+        except Exception as e:
+            logger.error(f"사물함 상태 인덱스 저장 중 오류 발생: {str(e)}")
+
+    def invalidate(self, cabinet_ids):
+        """변경된 사물함 정보 삭제"""
+        cabinet_ids = [str(cabinet_id) for cabinet_id in cabinet_ids if cabinet_id is not None]
+        if not cabinet_ids:
+            return
+        try:
+            self.redis_conn.hdel(self.index_key, *cabinet_ids)
+            logger.debug(f"사물함 상태 인덱스 삭제: {cabinet_ids}")
+        except Exception as e:
+            logger.error(f"사물함 상태 인덱스 삭제 중 오류 발생: {str(e)}")
@@ -3,7 +3,7 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 from django_redis import get_redis_connection
-from core.middleware.authentication import IsLoginUser
+from core.middleware.authentication import IsStatelessLoginUser
 from authn.admin import IsAdmin
 import logging
 from django.conf import settings
@@ -13,7 +13,7 @@ logger = logging.getLogger(__name__)
 
 class CabinetOperationsMonitorView(APIView):
     permission_classes = [IsAuthenticated, IsAdmin]
-    authentication_classes = [IsLoginUser]
+    authentication_classes = [IsStatelessLoginUser]
     
     def get(self, request):
         """Get status of current cabinet operations"""
@@ -60,6 +60,7 @@ class CabinetOperationsMonitorView(APIView):
                 'task_statuses': task_statuses,
                 'worker_config': {
                     'use_threaded': getattr(settings, 'CABINET_USE_THREADED_PROCESSING', False),
+                    'rental_backend': getattr(settings, 'CABINET_RENTAL_BACKEND', 'thread_pool'),
                     'celery_broker': settings.CELERY_BROKER_URL,
                 }
             }, status=status.HTTP_200_OK)
@@ -3,12 +3,14 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 
+from django.conf import settings
+
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 import logging
 
 from cabinet.exceptions import CabinetAlreadyReturnedException, CabinetRentFailedException
-from core.util.pagination import paginate_data, CabinetPagination
+from core.util.pagination import paginate_queryset, CabinetPagination
 
 
 from cabinet.serializer import (CabinetDetailSerializer,
@@ -26,6 +28,7 @@ from cabinet.serializer import (CabinetDetailSerializer,
 from cabinet.dto import (CabinetInfoQueryParamDto,
                          CabinetInfoDetailDto,
                          CabinetRentDto,
+                         CabinetRentResultDto,
                          CabinetReturnDto,
                          CabinetSearchDetailDto,
                          CabinetSearchDto,
@@ -34,7 +37,7 @@ from cabinet.dto import (CabinetInfoQueryParamDto,
                          CabinetStatusSearchDto,
                          CabinetBookmarkDto)
 
-from core.middleware.authentication import IsAdminUser, IsLoginUser
+from core.middleware.authentication import IsAdminUser, IsLoginUser, IsStatelessLoginUser
 from authn.admin import IsAdmin
 
 logger = logging.getLogger(__name__)
@@ -53,7 +56,7 @@ cabinet_history_service = CabinetHistoryService()
 
 class CabinetInfoView(APIView):
     permission_classes = [IsAuthenticated]
-    authentication_classes = [IsLoginUser]
+    authentication_classes = [IsStatelessLoginUser]
 
     @swagger_auto_schema(
         tags=['사물함 정보 조회'],
@@ -106,29 +109,61 @@ class CabinetInfoView(APIView):
         # 건물 ID 목록 가져오기
         building_ids = list(buildings_data.values_list('id', flat=True))
         
-        # 캐비넷 정보 가져오기
-        cabinets_data = cabinet_service.get_cabinets_by_building_ids(building_ids)
-        
         # 층별로 그룹화된 건물 정보
         buildings_by_floor = {
             building.floor: building for building in buildings_data
         }
         
+        context = {
+            'request': request, 
+            'buildings': buildings_data,
+            'buildings_by_floor': buildings_by_floor
+        }
+        
+        if getattr(settings, 'CABINET_FLOOR_MAP_CACHE_ENABLED', True):
+            return Response(self._get_floor_map(request, building_ids, context), status=status.HTTP_200_OK)
+        
+        # 캐비넷 정보 가져오기
+        cabinets_data = cabinet_service.get_cabinets_by_building_ids(building_ids)
+        
         serializer = CabinetInfoSerializer(
             instance=cabinets_data,
             many=True,
-            context={
-                'request': request, 
-                'buildings': buildings_data,
-                'buildings_by_floor': buildings_by_floor
-            }
+            context=context
         )
         
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    def _get_floor_map(self, request, building_ids, context):
+        """캐시된 층별 배치도 조회 (캐시 없는 층만 DB 조회 후 저장), isMine만 요청마다 계산"""
+        # 버전은 DB 조회보다 먼저 읽어야 그 사이의 무효화를 감지할 수 있음
+        floor_maps, versions = cabinet_service.get_cached_floor_maps(building_ids)
+        
+        missing_ids = [building_id for building_id, entries in floor_maps.items() if entries is None]
+        if missing_ids:
+            loaded = {building_id: [] for building_id in missing_ids}
+            cabinets_data = list(cabinet_service.get_cabinets_by_building_ids(missing_ids))
+            serializer = CabinetInfoSerializer(instance=cabinets_data, many=True, context=context)
+            for cabinet, entry in zip(cabinets_data, serializer.data):
+                entry = dict(entry)
+                entry['ownerId'] = cabinet.user_id_id
+                loaded[cabinet.building_id_id].append(entry)
+            cabinet_service.cache_floor_maps(loaded, versions)
+            floor_maps.update(loaded)
+        
+        user_id = request.user.user_id_id
+        entries = sorted(
+            (entry for entries in floor_maps.values() for entry in entries),
+            key=lambda entry: entry['id']
+        )
+        for entry in entries:
+            owner_id = entry.pop('ownerId', None)
+            entry['isMine'] = owner_id is not None and owner_id == user_id
+        return entries
+
 class CabinetInfoDetailView(APIView):
     permission_classes = [IsAuthenticated]
-    authentication_classes = [IsLoginUser]
+    authentication_classes = [IsStatelessLoginUser]
 
     @swagger_auto_schema(
         tags=['사물함 상세 정보 조회'],
@@ -169,7 +204,7 @@ class CabinetInfoDetailView(APIView):
     def get(self, request):
         dto = CabinetInfoDetailDto.create_validated(data=request.query_params)
 
-        cabinet = cabinet_service.get_cabinet_by_id(dto.validated_data.get('cabinetId'))
+        cabinet = cabinet_service.get_cabinet_detail_by_id(dto.validated_data.get('cabinetId'))
 
         serializer = CabinetDetailSerializer(cabinet, context={'request': request})
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -220,9 +255,17 @@ class CabinetRentView(APIView):
                 check_result=True
             )
             
+            # 대기 시간 내에 처리되지 않은 경우 작업 ID를 반환 (rent/result로 조회)
+            if result.get('status') == 'processing':
+                return Response({
+                    'message': result.get('message'),
+                    'taskId': result.get('task_id'),
+                    'status': 'processing'
+                }, status=status.HTTP_202_ACCEPTED)
+            
             # 성공 시 캐비넷 정보 반환
             serializer = CabinetDetailSerializer(
-                cabinet_service.get_cabinet_by_id(dto.validated_data.get('cabinetId')), 
+                cabinet_service.get_cabinet_detail_by_id(dto.validated_data.get('cabinetId')), 
                 context={'request': request}
             )
             return Response(serializer.data, status=status.HTTP_200_OK)
@@ -233,6 +276,54 @@ class CabinetRentView(APIView):
             # 사물함이 이미 대여 중인 경우
             return Response({"error": str(e)}, status=status.HTTP_409_CONFLICT)
 
+class CabinetRentResultView(APIView):
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [IsStatelessLoginUser]
+
+    @swagger_auto_schema(
+        tags=['사물함 대여'],
+        query_serializer=CabinetRentResultDto,
+        responses={
+            200: openapi.Response(
+                description="대여 작업 처리 완료 (성공 또는 실패)",
+                schema=openapi.Schema(type=openapi.TYPE_OBJECT, properties={
+                    'taskId': openapi.Schema(type=openapi.TYPE_STRING),
+                    'status': openapi.Schema(type=openapi.TYPE_STRING),
+                    'cabinetId': openapi.Schema(type=openapi.TYPE_INTEGER),
+                    'message': openapi.Schema(type=openapi.TYPE_STRING),
+                    'errorCode': openapi.Schema(type=openapi.TYPE_STRING),
+                })
+            ),
+            202: openapi.Response(
+                description="대여 작업 처리 중",
+                schema=openapi.Schema(type=openapi.TYPE_OBJECT, properties={
+                    'taskId': openapi.Schema(type=openapi.TYPE_STRING),
+                    'status': openapi.Schema(type=openapi.TYPE_STRING),
+                    'message': openapi.Schema(type=openapi.TYPE_STRING),
+                })
+            ),
+            404: openapi.Response(
+                description="작업 결과를 찾을 수 없는 경우",
+                schema=openapi.Schema(type=openapi.TYPE_OBJECT, properties={
+                    'error': openapi.Schema(type=openapi.TYPE_STRING)
+                })
+            ),
+        }
+    )
+    def get(self, request):
+        dto = CabinetRentResultDto.create_validated(data=request.query_params)
+
+        # wait > 0 이면 결과 알림이 올 때까지 대기 (롱 폴링)
+        result = cabinet_service.get_rent_result(
+            task_id=dto.validated_data.get('taskId'),
+            student_number=request.user.student_number,
+            wait=dto.validated_data.get('wait')
+        )
+
+        if result.get('status') == 'processing':
+            return Response(result, status=status.HTTP_202_ACCEPTED)
+        return Response(result, status=status.HTTP_200_OK)
+
 #TODO: isMine 필드 변경
 class CabinetReturnView(APIView):
     permission_classes = [IsAuthenticated]
@@ -267,12 +358,12 @@ class CabinetReturnView(APIView):
 
         cabinet_service.return_cabinet(cabinet_id=dto.validated_data.get('cabinetId'), student_number=request.user.student_number)
 
-        serializer = CabinetDetailSerializer(cabinet_service.get_cabinet_by_id(dto.validated_data.get('cabinetId')), context={'request': request})
+        serializer = CabinetDetailSerializer(cabinet_service.get_cabinet_detail_by_id(dto.validated_data.get('cabinetId')), context={'request': request})
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 class CabinetSearchView(APIView):
     permission_classes = [IsAuthenticated]
-    authentication_classes = [IsLoginUser]
+    authentication_classes = [IsStatelessLoginUser]
 
     @swagger_auto_schema(
         tags=['사물함 검색 결과'],
@@ -319,7 +410,7 @@ class CabinetSearchView(APIView):
 
 class CabinetSearchDetailView(APIView):
     permission_classes = [IsAuthenticated]
-    authentication_classes = [IsLoginUser]
+    authentication_classes = [IsStatelessLoginUser]
 
     @swagger_auto_schema(
         tags=['사물함 구체적인 검색 결과'],
@@ -345,6 +436,13 @@ class CabinetSearchDetailView(APIView):
                 description='페이지 크기', 
                 required=False
             ),
+            openapi.Parameter(
+                'cursor', 
+                openapi.IN_QUERY, 
+                type=openapi.TYPE_STRING, 
+                description='커서 (빈 값이면 첫 페이지부터 커서 방식으로 조회, 이후 응답의 next 사용)', 
+                required=False
+            ),
         ],
         responses={
             200: openapi.Response(
@@ -382,18 +480,18 @@ class CabinetSearchDetailView(APIView):
 
         cabinet_info = cabinet_service.search_cabinet(dto.validated_data.get('keyword'))
 
-        cabinet_serializer = CabinetSearchSerializer(cabinet_info, many=True)
-
-        return paginate_data(
-            data=cabinet_info,
+        # 현재 페이지만 DB에서 조회하여 직렬화
+        return paginate_queryset(
+            queryset=cabinet_info,
             request=request,
-            serialized_data=cabinet_serializer.data,
+            serializer_class=CabinetSearchSerializer,
+            ordering=('id',)
         )
 
 
 class CabinetHistoryView(APIView):
     permission_classes = [IsAuthenticated]
-    authentication_classes = [IsLoginUser]
+    authentication_classes = [IsStatelessLoginUser]
 
     @swagger_auto_schema(
         tags=['사물함 이력 조회'],
@@ -412,6 +510,13 @@ class CabinetHistoryView(APIView):
                 description='페이지 크기', 
                 required=False
             ),
+            openapi.Parameter(
+                'cursor', 
+                openapi.IN_QUERY, 
+                type=openapi.TYPE_STRING, 
+                description='커서 (빈 값이면 첫 페이지부터 커서 방식으로 조회, 이후 응답의 next 사용)', 
+                required=False
+            ),
         ],
         responses={
             200: openapi.Response(
@@ -434,20 +539,21 @@ class CabinetHistoryView(APIView):
     )
     def get(self, request):
         cabinet_histories_infos = cabinet_history_service.get_cabinet_histories_by_student_number(
-            student_number=request.user.student_number
+            student_number=request.user.student_number,
+            user_id=request.user.user_id_id
             )
 
-        serializer = CabinetHistorySerializer(cabinet_histories_infos, many=True)
-
-        return paginate_data(
-            data=cabinet_histories_infos,
+        # 현재 페이지만 DB에서 조회하여 직렬화 (사용 중인 이력 먼저, 종료일 내림차순)
+        return paginate_queryset(
+            queryset=cabinet_histories_infos,
             request=request,
-            serialized_data=serializer.data
+            serializer_class=CabinetHistorySerializer,
+            ordering=('-ended_at', '-id')
         )
 
 class CabinetFindAll(APIView):
     permission_classes = [IsAuthenticated]
-    authentication_classes = [IsLoginUser]
+    authentication_classes = [IsStatelessLoginUser]
     
     pagination_class = CabinetPagination
 
@@ -468,6 +574,13 @@ class CabinetFindAll(APIView):
                 description='페이지 크기', 
                 required=False
             ),
+            openapi.Parameter(
+                'cursor', 
+                openapi.IN_QUERY, 
+                type=openapi.TYPE_STRING, 
+                description='커서 (빈 값이면 첫 페이지부터 커서 방식으로 조회, 이후 응답의 next 사용)', 
+                required=False
+            ),
         ],
         responses={
             200: openapi.Response(
@@ -501,12 +614,14 @@ class CabinetFindAll(APIView):
         }
     )
     def get(self, request):
-        cabinet_infos = cabinet_service.get_all_cabinets()
-        serializer = CabinetSearchSerializer(cabinet_infos, many=True)
-        return paginate_data(
-            data=cabinet_infos,
+        cabinet_infos = cabinet_service.get_all_cabinets().select_related('building_id')
+        # 현재 페이지만 DB에서 조회하여 직렬화
+        return paginate_queryset(
+            queryset=cabinet_infos,
             request=request,
-            serialized_data=serializer.data
+            serializer_class=CabinetSearchSerializer,
+            ordering=('id',),
+            count_mode='cached'
         )
     
 
@@ -710,7 +825,7 @@ class CabinetAdminChangeStatusView(APIView):
 
 class CabinetDashboardView(APIView):
     permission_classes = [IsAuthenticated, IsAdmin]
-    authentication_classes = [IsLoginUser]
+    authentication_classes = [IsStatelessLoginUser]
 
     @swagger_auto_schema(
         tags=['사물함 관리 (관리자)'],
@@ -757,7 +872,7 @@ class CabinetDashboardView(APIView):
 
 class CabinetStatusSearchView(APIView):
     permission_classes = [IsAuthenticated]
-    authentication_classes = [IsLoginUser]
+    authentication_classes = [IsStatelessLoginUser]
     pagination_class = CabinetPagination
     
     @swagger_auto_schema(
@@ -785,6 +900,13 @@ class CabinetStatusSearchView(APIView):
                 description='페이지 크기', 
                 required=False
             ),
+            openapi.Parameter(
+                'cursor', 
+                openapi.IN_QUERY, 
+                type=openapi.TYPE_STRING, 
+                description='커서 (빈 값이면 첫 페이지부터 커서 방식으로 조회, 이후 응답의 next 사용)', 
+                required=False
+            ),
         ],
         responses={
             200: openapi.Response(
@@ -842,15 +964,14 @@ class CabinetStatusSearchView(APIView):
         # DTO로 입력 데이터 검증
         dto = CabinetStatusSearchDto.create_validated(data=request.query_params)
         cabinets_data = cabinet_service.get_cabinets_by_status(dto.validated_data.get('status'))
-        
-        # 페이지네이션 적용
-        paginator = self.pagination_class()
-        paginated_cabinets = paginator.paginate_queryset(cabinets_data, request)
-        
-        # 시리얼라이저로 응답 데이터 형식화
-        serializer = CabinetStatusDetailSerializer(paginated_cabinets, many=True)
-        
-        return paginator.get_paginated_response(serializer.data)
+
+        # 현재 페이지만 DB에서 조회하여 직렬화
+        return paginate_queryset(
+            queryset=cabinets_data,
+            request=request,
+            serializer_class=CabinetStatusDetailSerializer,
+            ordering=('id',)
+        )
     
 
 class CabinetBookmarkAddView(APIView):
@@ -890,7 +1011,11 @@ class CabinetBookmarkAddView(APIView):
     def post(self, request):
         dto = CabinetBookmarkDto.create_validated(data=request.data)
 
-        cabinet_bookmark_service.add_bookmark(cabinet_id=dto.validated_data.get('cabinetId'), student_number=request.user.student_number)
+        cabinet_bookmark_service.add_bookmark(
+            cabinet_id=dto.validated_data.get('cabinetId'),
+            student_number=request.user.student_number,
+            user_id=request.user.user_id_id
+        )
 
         return Response({"isBookmark": True}, status=status.HTTP_200_OK)
     
@@ -931,14 +1056,18 @@ class CabinetBookmarkRemoveView(APIView):
     def post(self, request):
         dto = CabinetBookmarkDto.create_validated(data=request.data)
 
-        cabinet_bookmark_service.remove_bookmark(cabinet_id=dto.validated_data.get('cabinetId'), student_number=request.user.student_number)
+        cabinet_bookmark_service.remove_bookmark(
+            cabinet_id=dto.validated_data.get('cabinetId'),
+            student_number=request.user.student_number,
+            user_id=request.user.user_id_id
+        )
 
         return Response({"isBookmark": False}, status=status.HTTP_200_OK)
     
 
 class CabinetBookmarkListView(APIView):
     permission_classes = [IsAuthenticated]
-    authentication_classes = [IsLoginUser]
+    authentication_classes = [IsStatelessLoginUser]
 
     @swagger_auto_schema(
         tags=['사물함 즐겨찾기 조회'],
@@ -956,9 +1085,10 @@ class CabinetBookmarkListView(APIView):
         }
     )
     def get(self, request):
-        bookmarks = cabinet_bookmark_service.get_bookmarks(student_number=request.user.student_number)
-
-        print(f"bookmarks: {bookmarks}")
+        bookmarks = cabinet_bookmark_service.get_bookmarks(
+            student_number=request.user.student_number,
+            user_id=request.user.user_id_id
+        )
 
         serializer = CabinetBookmarkListSerializer(bookmarks, many=True)
 
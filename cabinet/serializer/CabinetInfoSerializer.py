@@ -1,9 +1,8 @@
 from rest_framework import serializers
 from cabinet.models import cabinets
-from django.utils import timezone
-import datetime
+from cabinet.util.cabinet_rent_availability import CabinetRentAvailabilityMixin
 
-class CabinetInfoSerializer(serializers.ModelSerializer):
+class CabinetInfoSerializer(CabinetRentAvailabilityMixin, serializers.ModelSerializer):
     id = serializers.IntegerField(read_only=True)
     isVisible = serializers.SerializerMethodField()
     username = serializers.SerializerMethodField()
@@ -23,52 +22,18 @@ class CabinetInfoSerializer(serializers.ModelSerializer):
     def get_username(self, obj):
         return obj.user_id.name if obj.user_id else None
 
-    #TODO: Implement this method
+    def _get_request_user_id(self):
+        """요청 사용자의 users ID (요청당 한 번만 계산하여 context에 보관)"""
+        if 'request_user_id' not in self.context:
+            request = self.context.get('request')
+            user = getattr(request, 'user', None)
+            self.context['request_user_id'] = getattr(user, 'user_id_id', None)
+        return self.context['request_user_id']
+
     def get_isMine(self, obj):
-        request = self.context.get('request')
-        # request가 None인 경우 처리
-        if not request:
-            return False
-            
-        user_id = cabinets.objects.filter(id=obj.id).values('user_id').first().get('user_id')
-        return user_id is not None and user_id == request.user.id if user_id else False
+        # select_related로 이미 로드된 user_id 값을 사용 (행마다 추가 조회 없음)
+        user_id = self._get_request_user_id()
+        return user_id is not None and obj.user_id_id == user_id
     
-    def get_isRentAvailable(self, obj):
-
-        
-        # 기본 조건: 상태가 'AVAILABLE'이고 payable이 'FREE'여야 함
-        if obj.status != 'AVAILABLE' or obj.payable != 'FREE':
-            return False
-        
-        try:
-            # 날짜 비교만 수행하여 시간대 문제 회피
-            # (1) 현재 시간
-            current_time = timezone.now()
-            
-            # (2) 마지막 업데이트 시간에서 날짜 부분만 추출
-            updated_date = obj.updated_at.date()
-            
-            # (3) 다음 날 계산
-            next_day = updated_date + datetime.timedelta(days=1)
-            
-            # (4) 현재 날짜
-            current_date = current_time.date()
-            
-            # (5) 현재 시간이 다음 날보다 이후인 경우 무조건 대여 가능
-            if current_date > next_day:
-                return True
-            
-            # (6) 현재 날짜가 다음 날과 같고, 시간이 13시 이후인 경우 대여 가능
-            if current_date == next_day and current_time.hour >= 13:
-                return True
-            
-            # 그 외의 경우 대여 불가능
-            return False
-            
-        except Exception as e:
-            # 오류 발생 시 로그 기록 후 대여 불가능 반환
-            print(f"Error in get_isRentAvailable: {str(e)}")
-            return False
-        
     def get_isFree(self, obj):
        return obj.payable == 'FREE'
\ No newline at end of file
@@ -7,20 +7,25 @@ class CabinetUserSerializer(serializers.Serializer):
 
 class CabinetPositionSerializer(serializers.Serializer):
     """캐비닛 위치 정보 시리얼라이저"""
-    x = serializers.IntegerField()
-    y = serializers.IntegerField()
+    x = serializers.IntegerField(source='cabinet_x_pos')
+    y = serializers.IntegerField(source='cabinet_y_pos')
 
 class CabinetStatusDetailSerializer(serializers.Serializer):
-    """캐비닛 상태 상세 정보 시리얼라이저"""
+    """
+    캐비닛 상태 상세 정보 시리얼라이저
+
+    CabinetRepository.get_cabinets_by_status의 QuerySet 행을 직렬화하며,
+    상태별 날짜(rentalStartDate, overDate, brokenDate)는 annotate되지 않은 경우 null로 응답합니다 (기존 응답과 동일).
+    """
     id = serializers.IntegerField()
-    building = serializers.CharField(allow_null=True)
-    floor = serializers.IntegerField(allow_null=True)
-    section = serializers.CharField(allow_null=True)
-    position = CabinetPositionSerializer(allow_null=True)
-    cabinetNumber = serializers.CharField()
+    building = serializers.CharField(source='building_id.name', allow_null=True)
+    floor = serializers.IntegerField(source='building_id.floor', allow_null=True)
+    section = serializers.CharField(source='building_id.section', allow_null=True)
+    position = CabinetPositionSerializer(source='cabinet_positions', allow_null=True)
+    cabinetNumber = serializers.CharField(source='cabinet_number')
     status = serializers.CharField()
     reason = serializers.CharField(allow_null=True)
-    user = CabinetUserSerializer(allow_null=True)
+    user = CabinetUserSerializer(source='user_id', allow_null=True)
     rentalStartDate = serializers.DateTimeField(allow_null=True, required=False)
     overDate = serializers.DateTimeField(allow_null=True, required=False)
     brokenDate = serializers.DateTimeField(allow_null=True, required=False)
\ No newline at end of file
@@ -1,9 +1,14 @@
+import datetime
+import json
 import threading
 import time
 import random
 import logging
-from django.test import TestCase, TransactionTestCase
-from django.db import transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import DatabaseError, connection, transaction
+from django.db.models.signals import post_save
+from unittest import mock
 from django_redis import get_redis_connection
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
@@ -11,11 +16,34 @@ from cabinet.models import cabinets, cabinet_histories, buildings
 from user.models import users
 from authn.models import RoleEnum, authns
 from cabinet.business.cabinet_service import CabinetService
+from cabinet.persistence.cabinet_repository import CabinetRepository
+from cabinet.exceptions import CabinetAlreadyRentedException, CabinetBookmarkAlreadyExistsException
+from cabinet.util.cabinet_rent_availability import CabinetRentAvailability
 from building.type.BuildingNameEnum import BuildingNameEnum
 from cabinet.type import CabinetStatusEnum, CabinetPayableEnum
+from core.tests.fixtures import CabinetFixtureMixin, FakeRedisMixin
+from cabinet.util.cabinet_async_result_manager import AsyncResultManager
+from cabinet.util.cabinet_rental_dispatcher import CabinetRentalDispatcher
+from cabinet.util.cabinet_rental_state import CabinetRentalState
+from cabinet.util.cabinet_rental_batcher import CabinetRentalBatcher
+from cabinet.persistence.cabinet_floor_map_redis_repository import CabinetFloorMapRedisRepository
+from cabinet.persistence.cabinet_bookmark_redis_repository import BookmarkEntryCodec, CabinetBookmarkRedisRepository
+from cabinet.persistence.cabinet_status_index_redis_repository import CabinetStatusIndexRedisRepository
+from cabinet.business import cabinet_bookmark_service
+from cabinet.business.cabinet_bookmark_service import CabinetBookmarkService
+from cabinet.util.cabinet_bookmark_sync_manager import BookmarkSyncManager
+from cabinet.util.cabinet_bookmark_sync_scheduler import BookmarkSyncScheduler
+from core.config.redis_lock import RedisLock
 
-from cabinet.models import cabinet_histories, cabinets, users
+from cabinet.models import cabinet_histories, cabinets, cabinet_positions, cabinet_bookmarks, users
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import serializers
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from core.util.pagination import paginate_queryset
+from cabinet.persistence.cabinet_history_repository import CabinetHistoryRepository
+from cabinet.serializer import CabinetStatusDetailSerializer
 
 # 로깅 설정
 logging.basicConfig(level=logging.INFO)
@@ -423,4 +451,1085 @@ class CabinetBlockchainTest(TestCase):
         
         # 로그를 통해 확인 (실제 블록체인 기록은 개발 모드에서 수행되지 않음)
         self.assertIsNotNone(history)
-        # 여기서는 signal이 오류 없이 실행되었는지만 간접적으로 확인
\ No newline at end of file
+        # 여기서는 signal이 오류 없이 실행되었는지만 간접적으로 확인
+
+@override_settings(CABINET_RENTAL_LOCK_MODE='db')
+class CabinetRowLockRentTest(CabinetFixtureMixin, TestCase):
+    """DB 행 잠금 방식 사물함 대여 테스트 (Redis 미사용)"""
+
+    def setUp(self):
+        self.building = self.create_building()
+        self.cabinet = self.create_cabinet(1)
+        self.first_user = self.create_user("20240001")
+        self.second_user = self.create_user("20240002")
+        self.cabinet_service = CabinetService()
+
+    def test_rent_cabinet_with_row_lock(self):
+        """행 잠금 방식으로 대여 시 상태와 이력이 함께 반영되는지 확인"""
+        self.cabinet_service.rent_cabinet(self.cabinet.id, "20240001")
+
+        self.cabinet.refresh_from_db()
+        self.assertEqual(self.cabinet.status, CabinetStatusEnum.USING.value)
+        self.assertEqual(self.cabinet.user_id_id, self.first_user.id)
+        self.assertTrue(cabinet_histories.objects.filter(
+            cabinet_id=self.cabinet, user_id=self.first_user, ended_at=None
+        ).exists())
+
+    def test_rent_already_rented_cabinet_rolls_back(self):
+        """이미 대여된 사물함은 대여할 수 없고 이력도 남지 않아야 함"""
+        self.cabinet_service.rent_cabinet(self.cabinet.id, "20240001")
+
+        with self.assertRaises(CabinetAlreadyRentedException):
+            self.cabinet_service.rent_cabinet(self.cabinet.id, "20240002")
+
+        self.assertFalse(cabinet_histories.objects.filter(user_id=self.second_user).exists())
+
+    def test_conditional_update_rejects_stale_status(self):
+        """조건부 UPDATE는 AVAILABLE 상태가 아닌 사물함을 변경하지 않아야 함"""
+        cabinets.objects.filter(id=self.cabinet.id).update(status=CabinetStatusEnum.USING.value)
+
+        with self.assertRaises(CabinetAlreadyRentedException):
+            CabinetRepository().rent_cabinet_if_available(self.cabinet.id, self.second_user.id)
+
+
+@override_settings(CABINET_FLOOR_MAP_CACHE_ENABLED=False)
+@override_settings(CABINET_FLOOR_MAP_CACHE_ENABLED=False)
+class CabinetInfoViewQueryCountTest(FakeRedisMixin, CabinetFixtureMixin, TestCase):
+    """층별 사물함 조회 API 쿼리 수 회귀 테스트 (DB 조회 경로, 캐시 경로는 CabinetFloorMapCacheTest)"""
+
+    # 건물 조회 4회 + 사물함 조회 1회 (사물함 수와 무관해야 함)
+    EXPECTED_QUERY_COUNT = 5
+
+    def setUp(self):
+        super().setUp()
+        self.building = self.create_building()
+        self.user = self.create_user("20240001")
+        self.authn = self.user.authn_info
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.authn)
+
+    def _create_cabinets(self, count):
+        start = cabinets.objects.count()
+        for number in range(start + 1, start + count + 1):
+            cabinet = self.create_cabinet(number)
+            cabinet_positions.objects.create(cabinet_id=cabinet, cabinet_x_pos=number, cabinet_y_pos=0)
+
+    def _get_floor_map(self):
+        with self.assertNumQueries(self.EXPECTED_QUERY_COUNT):
+            response = self.client.get('/cabinet/', {'building': BuildingNameEnum.가온관.value, 'floors': '1'})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_query_count_is_constant(self):
+        """사물함 수가 늘어나도 쿼리 수가 일정해야 함"""
+        self._create_cabinets(3)
+        self.assertEqual(len(self._get_floor_map()), 3)
+
+        self._create_cabinets(27)
+        self.assertEqual(len(self._get_floor_map()), 30)
+
+    def test_is_mine_uses_loaded_owner(self):
+        """본인이 대여한 사물함만 isMine이 True여야 함"""
+        self._create_cabinets(3)
+        mine = cabinets.objects.order_by('id').first()
+        cabinets.objects.filter(id=mine.id).update(user_id=self.user, status=CabinetStatusEnum.USING.value)
+
+        data = self._get_floor_map()
+        self.assertEqual([cabinet['id'] for cabinet in data if cabinet['isMine']], [mine.id])
+
+
+class CabinetInfoDetailViewTest(FakeRedisMixin, CabinetFixtureMixin, TestCase):
+    """사물함 상세 조회 API 테스트"""
+
+    def setUp(self):
+        super().setUp()
+        self.building = self.create_building()
+        self.user = self.create_user("20240001")
+        self.cabinet = self.create_cabinet(1, user=self.user, status=CabinetStatusEnum.USING.value)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user.authn_info)
+
+    def _create_history(self, days_ago, expires_in_days, ended=False):
+        now = timezone.now()
+        history = cabinet_histories.objects.create(
+            user_id=self.user, cabinet_id=self.cabinet,
+            expired_at=now + datetime.timedelta(days=expires_in_days),
+            ended_at=now if ended else None,
+        )
+        # created_at은 auto_now_add이므로 생성 후 순서를 지정
+        cabinet_histories.objects.filter(id=history.id).update(created_at=now - datetime.timedelta(days=days_ago))
+        return history
+
+    def test_detail_loads_in_single_query_with_active_expiry(self):
+        """상세 조회는 쿼리 1회로 끝나고, 만료일은 종료되지 않은 가장 최근 이력에서 가져와야 함"""
+        self._create_history(days_ago=30, expires_in_days=5)
+        active = self._create_history(days_ago=10, expires_in_days=20)
+        # 더 최근에 만들어졌지만 이미 종료된 이력은 무시되어야 함
+        self._create_history(days_ago=1, expires_in_days=90, ended=True)
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/cabinet/detail', {'cabinetId': self.cabinet.id})
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(parse_datetime(data['expiredAt']), active.expired_at)
+        self.assertTrue(data['isMine'])
+        self.assertEqual(data['building'], BuildingNameEnum.가온관.value)
+
+    def test_detail_without_active_history(self):
+        """진행 중인 대여 이력이 없으면 만료일은 null이어야 함"""
+        self._create_history(days_ago=1, expires_in_days=90, ended=True)
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/cabinet/detail', {'cabinetId': self.cabinet.id})
+
+        self.assertIsNone(response.json()['expiredAt'])
+
+
+class CabinetRentAvailabilityTest(CabinetFixtureMixin, TestCase):
+    """대여 가능 여부 판정 (Python / SQL 결과 일치) 테스트"""
+
+    def setUp(self):
+        self.building = self.create_building()
+        self.cabinet = self.create_cabinet(1)
+        # 3월 9일 10시에 마지막으로 변경된 사물함
+        cabinets.objects.filter(id=self.cabinet.id).update(updated_at=datetime.datetime(2025, 3, 9, 10, 0))
+        self.cabinet.refresh_from_db()
+
+    def _assert_available(self, now, expected):
+        availability = CabinetRentAvailability(now=now)
+        self.assertEqual(availability.is_available(self.cabinet), expected)
+        annotated = availability.annotate(cabinets.objects.filter(id=self.cabinet.id)).get()
+        self.assertEqual(annotated.is_rent_available, expected)
+
+    def test_available_from_next_day_13(self):
+        """다음 날 13시부터 대여 가능해야 함"""
+        self._assert_available(datetime.datetime(2025, 3, 9, 23, 0), False)
+        self._assert_available(datetime.datetime(2025, 3, 10, 12, 59), False)
+        self._assert_available(datetime.datetime(2025, 3, 10, 13, 0), True)
+        self._assert_available(datetime.datetime(2025, 3, 11, 0, 0), True)
+
+    def test_not_available_when_not_free(self):
+        """유료 사물함은 대여 불가능해야 함"""
+        cabinets.objects.filter(id=self.cabinet.id).update(payable=CabinetPayableEnum.PAID.value)
+        self.cabinet.refresh_from_db()
+        self._assert_available(datetime.datetime(2025, 3, 11, 0, 0), False)
+
+
+class CabinetBulkReturnTest(CabinetFixtureMixin, TestCase):
+    """관리자 일괄 반납/상태 변경 테스트"""
+
+    def setUp(self):
+        self.building = self.create_building()
+        self.repository = CabinetRepository()
+
+    def _create_rented_cabinets(self, count):
+        start = cabinets.objects.count()
+        rented = []
+        for number in range(start + 1, start + count + 1):
+            user = self.create_user(number, with_authn=False)
+            cabinet = self.create_cabinet(number, user=user, status=CabinetStatusEnum.USING.value)
+            cabinet_histories.objects.create(user_id=user, cabinet_id=cabinet, expired_at=timezone.now())
+            rented.append(cabinet.id)
+        return rented
+
+    def _count_return_queries(self, cabinet_ids):
+        with CaptureQueriesContext(connection) as queries:
+            successful_cabinets, failed_ids = self.repository.return_cabinets_by_ids(cabinet_ids)
+        self.assertEqual(len(successful_cabinets), len(cabinet_ids))
+        self.assertEqual(failed_ids, [])
+        return len(queries)
+
+    def test_query_count_is_constant(self):
+        """반납할 사물함 수가 늘어나도 쿼리 수가 일정해야 함"""
+        small = self._count_return_queries(self._create_rented_cabinets(2))
+        large = self._count_return_queries(self._create_rented_cabinets(20))
+        self.assertEqual(small, large)
+        self.assertFalse(cabinet_histories.objects.filter(ended_at=None).exists())
+        self.assertFalse(cabinets.objects.exclude(status=CabinetStatusEnum.AVAILABLE.value).exists())
+
+    def test_reports_failures_per_id(self):
+        """존재하지 않거나 반납 가능한 상태가 아닌 사물함은 ID별로 실패 처리되어야 함"""
+        rented_id = self._create_rented_cabinets(1)[0]
+        available = self.create_cabinet(100)
+
+        successful_cabinets, failed_ids = self.repository.return_cabinets_by_ids([rented_id, available.id, 9999])
+
+        self.assertEqual([cabinet.id for cabinet in successful_cabinets], [rented_id])
+        self.assertEqual([failed['id'] for failed in failed_ids], [available.id, 9999])
+
+    def test_change_status_to_broken(self):
+        """일괄 BROKEN 변경 시 대여 이력이 종료되고 같은 상태로의 변경은 실패해야 함"""
+        rented_ids = self._create_rented_cabinets(3)
+
+        with CaptureQueriesContext(connection) as queries:
+            successful_cabinets, failed_ids = self.repository.change_cabinet_status_by_ids(rented_ids, 'BROKEN', '점검')
+        self.assertEqual(len(successful_cabinets), 3)
+        self.assertEqual(failed_ids, [])
+        self.assertLessEqual(len(queries), 6)
+        self.assertEqual({cabinet.reason for cabinet in successful_cabinets}, {'점검'})
+        self.assertFalse(cabinet_histories.objects.filter(ended_at=None).exists())
+
+        successful_cabinets, failed_ids = self.repository.change_cabinet_status_by_ids(rented_ids[:1], 'BROKEN', '점검')
+        self.assertEqual(successful_cabinets, [])
+        self.assertEqual([failed['id'] for failed in failed_ids], rented_ids[:1])
+
+
+class HistoryIdSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+
+
+class CursorPaginationTest(CabinetFixtureMixin, TestCase):
+    """키셋(커서) 페이지네이션 테스트"""
+
+    def setUp(self):
+        self.building = self.create_building()
+        self.user = self.create_user("20240001", with_authn=False)
+        now = timezone.now()
+        for number in range(1, 12):
+            cabinet = self.create_cabinet(number)
+            # 사용 중인 이력(NULL)과 같은 종료일이 섞이도록 생성
+            ended_at = None if number % 5 == 0 else now - datetime.timedelta(days=number % 3)
+            cabinet_histories.objects.create(user_id=self.user, cabinet_id=cabinet, expired_at=now, ended_at=ended_at)
+        self.factory = APIRequestFactory()
+
+    def test_cursor_pages_cover_all_rows_in_order(self):
+        """커서를 따라가면 모든 이력이 정렬 순서대로 한 번씩, 페이지마다 한 번의 쿼리로 조회되어야 함"""
+        queryset = CabinetHistoryRepository().get_cabinet_histories_by_user_id(self.user.id)
+        expected = [history.id for history in queryset]
+
+        pages = []
+        url = '/cabinet/history/?cursor=&pageSize=3'
+        while url:
+            response = self._get_page(queryset, url)
+            pages.append([row['id'] for row in response.data['results']])
+            url = response.data['next']
+        self.assertEqual([history_id for page in pages for history_id in page], expected)
+
+        # previous 커서를 따라 첫 페이지까지 되돌아가도 같은 페이지가 조회되어야 함
+        url = response.data['previous']
+        for page in reversed(pages[:-1]):
+            response = self._get_page(queryset, url)
+            self.assertEqual([row['id'] for row in response.data['results']], page)
+            url = response.data['previous']
+        self.assertIsNone(url)
+
+    def _get_page(self, queryset, url):
+        request = Request(self.factory.get(url))
+        with self.assertNumQueries(1):
+            return paginate_queryset(
+                queryset, request, serializer_class=HistoryIdSerializer, ordering=('-ended_at', '-id')
+            )
+
+
+class CabinetStatusSearchQueryTest(CabinetFixtureMixin, TestCase):
+    """상태별 사물함 조회 쿼리 수 테스트"""
+
+    def setUp(self):
+        self.building = self.create_building()
+        self.factory = APIRequestFactory()
+
+    def _create_overdue_cabinets(self, count):
+        start = cabinets.objects.count()
+        for number in range(start + 1, start + count + 1):
+            user = self.create_user(number, with_authn=False)
+            cabinet = self.create_cabinet(number, user=user, status=CabinetStatusEnum.OVERDUE.value)
+            cabinet_positions.objects.create(cabinet_id=cabinet, cabinet_x_pos=number, cabinet_y_pos=0)
+            cabinet_histories.objects.create(user_id=user, cabinet_id=cabinet, expired_at=timezone.now())
+
+    def _get_page(self):
+        request = Request(self.factory.get('/cabinet/status/search/?status=OVERDUE&pageSize=5'))
+        with CaptureQueriesContext(connection) as queries:
+            response = paginate_queryset(
+                CabinetService().get_cabinets_by_status(CabinetStatusEnum.OVERDUE.value),
+                request,
+                serializer_class=CabinetStatusDetailSerializer
+            )
+        return response, len(queries)
+
+    def test_query_count_is_constant(self):
+        """사물함 수와 관계없이 존재 확인 + COUNT + 현재 페이지 조회 3번의 쿼리로 처리되어야 함"""
+        self._create_overdue_cabinets(3)
+        response, small = self._get_page()
+        self._create_overdue_cabinets(12)
+        response, large = self._get_page()
+
+        self.assertEqual(small, 3)
+        self.assertEqual(large, 3)
+        self.assertEqual(response.data['count'], 15)
+        first = response.data['results'][0]
+        self.assertEqual(first['position'], {'x': 1, 'y': 0})
+        self.assertEqual(first['user']['name'], '1')
+        self.assertIsNotNone(first['rentalStartDate'])
+        self.assertIsNotNone(first['overDate'])
+
+
+@override_settings(CABINET_RENTAL_LOCK_MODE='db')
+class CabinetRentalDispatcherTest(FakeRedisMixin, CabinetFixtureMixin, TestCase):
+    """대여 작업 디스패처 (백엔드 선택, 작업 ID 중복 제거, 실행 선점) 테스트"""
+
+    def setUp(self):
+        super().setUp()
+        CabinetRentalDispatcher._instance = None
+        self.addCleanup(setattr, CabinetRentalDispatcher, '_instance', None)
+        self.building = self.create_building()
+        self.user = self.create_user("20240001")
+        self.cabinet = self.create_cabinet(1)
+
+    def test_backend_selection(self):
+        """설정된 백엔드를 사용하고 알 수 없는 값은 스레드 풀로 대체해야 함"""
+        with override_settings(CABINET_RENTAL_BACKEND='celery'):
+            self.assertEqual(CabinetRentalDispatcher().backend, CabinetRentalDispatcher.BACKEND_CELERY)
+
+        CabinetRentalDispatcher._instance = None
+        with override_settings(CABINET_RENTAL_BACKEND='unknown'):
+            self.assertEqual(CabinetRentalDispatcher().backend, CabinetRentalDispatcher.BACKEND_THREAD_POOL)
+
+    def test_dispatch_once_per_task_id(self):
+        """같은 작업 ID는 한 번만 전달되고, 전달 실패 시에는 다시 전달할 수 있어야 함"""
+        dispatcher = CabinetRentalDispatcher()
+        with mock.patch.object(dispatcher, '_dispatch_thread_pool') as send:
+            self.assertTrue(dispatcher.dispatch(self.cabinet.id, "20240001", "task-1"))
+            self.assertFalse(dispatcher.dispatch(self.cabinet.id, "20240001", "task-1"))
+            self.assertEqual(send.call_count, 1)
+
+            send.side_effect = RuntimeError("queue full")
+            with self.assertRaises(RuntimeError):
+                dispatcher.dispatch(self.cabinet.id, "20240001", "task-2")
+            self.assertFalse(self.redis_conn.exists("cabinet:dispatch:task-2"))
+
+            send.side_effect = None
+            self.assertTrue(dispatcher.dispatch(self.cabinet.id, "20240001", "task-2"))
+
+    def test_execute_skips_processed_or_claimed_task(self):
+        """결과가 있거나 다른 워커가 선점한 작업은 다시 대여하지 않아야 함"""
+        AsyncResultManager.set_result("task-done", {"status": "success", "cabinet_id": self.cabinet.id})
+        self.redis_conn.set("cabinet:task:claim:task-claimed", "20240001")
+
+        with mock.patch.object(CabinetService, 'rent_cabinet') as rent_cabinet:
+            result = CabinetRentalDispatcher.execute(self.cabinet.id, "20240001", "task-done")
+            self.assertEqual(result["status"], "success")
+            self.assertIsNone(CabinetRentalDispatcher.execute(self.cabinet.id, "20240001", "task-claimed"))
+        rent_cabinet.assert_not_called()
+
+    def test_execute_releases_claim(self):
+        """성공/실패와 관계없이 실행이 끝나면 선점 키가 해제되고 결과가 남아야 함"""
+        result = CabinetRentalDispatcher.execute(self.cabinet.id, "20240001", "task-1")
+        self.assertEqual(result["status"], "success")
+        self.assertEqual(cabinets.objects.get(id=self.cabinet.id).user_id_id, self.user.id)
+        self.assertFalse(self.redis_conn.exists("cabinet:task:claim:task-1"))
+
+        self.create_user("20240002")
+        result = CabinetRentalDispatcher.execute(self.cabinet.id, "20240002", "task-2")
+        self.assertEqual(result["status"], "error")
+        self.assertEqual(AsyncResultManager.peek_result("task-2")["status"], "error")
+        self.assertFalse(self.redis_conn.exists("cabinet:task:claim:task-2"))
+
+    def test_execute_releases_claim_when_result_write_fails(self):
+        """결과 저장 중 Redis 오류가 나도 선점 키가 남지 않아 재전달된 작업이 처리될 수 있어야 함"""
+        with mock.patch.object(AsyncResultManager, 'set_result', side_effect=ConnectionError("redis down")):
+            with self.assertRaises(ConnectionError):
+                CabinetRentalDispatcher.execute(self.cabinet.id, "20240001", "task-1")
+        self.assertFalse(self.redis_conn.exists("cabinet:task:claim:task-1"))
+
+
+class CabinetRentResultViewTest(FakeRedisMixin, CabinetFixtureMixin, TestCase):
+    """대여 작업 결과 조회 API (롱 폴링) 테스트"""
+
+    def setUp(self):
+        super().setUp()
+        self.building = self.create_building()
+        self.user = self.create_user("20240001")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user.authn_info)
+        self.task_id = "rental-1700000000-1-20240001"
+
+    def _get_result(self, task_id=None, wait=0):
+        return self.client.get('/cabinet/rent/result', {'taskId': task_id or self.task_id, 'wait': wait})
+
+    def test_processing_then_result(self):
+        """전달된 작업은 결과 전 202, 결과 저장 후 200으로 응답해야 함"""
+        self.redis_conn.set(f"cabinet:dispatch:{self.task_id}", "thread_pool")
+        response = self._get_result()
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['status'], 'processing')
+
+        AsyncResultManager.set_result(self.task_id, {
+            "status": "success", "cabinet_id": 1, "student_number": "20240001", "message": "사물함 1 대여 성공"
+        })
+        response = self._get_result()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['status'], 'success')
+        self.assertEqual(response.json()['cabinetId'], 1)
+
+    def test_unknown_or_foreign_task_is_not_found(self):
+        """전달 기록이 없는 작업과 다른 사용자의 작업은 404로 응답해야 함"""
+        self.assertEqual(self._get_result().status_code, 404)
+        self.assertEqual(self._get_result(task_id="rental-1700000000-1-20249999").status_code, 404)
+
+    def test_wait_is_clamped(self):
+        """대기 시간은 0~10초로 제한되어야 함"""
+        with mock.patch.object(AsyncResultManager, 'get_result', return_value={
+            "status": "success", "cabinet_id": 1, "student_number": "20240001"
+        }) as get_result:
+            self.assertEqual(self._get_result(wait=30).status_code, 200)
+            self.assertEqual(self._get_result(wait=-5).status_code, 200)
+            self.assertEqual(self._get_result(wait=3).status_code, 200)
+        self.assertEqual([call.kwargs['timeout'] for call in get_result.call_args_list], [10, 0, 3])
+
+    def test_waiter_wakes_on_notification_and_restores_it(self):
+        """대기 중인 요청은 결과 알림으로 깨어나고, 다른 대기자를 위해 알림을 다시 넣어야 함"""
+        results = []
+        waiter = threading.Thread(target=lambda: results.append(AsyncResultManager.get_result(self.task_id, timeout=5)))
+        waiter.start()
+        time.sleep(0.2)
+        AsyncResultManager.set_result(self.task_id, {"status": "success", "student_number": "20240001"})
+        waiter.join(timeout=5)
+
+        self.assertEqual(results, [{"status": "success", "student_number": "20240001"}])
+        self.assertEqual(self.redis_conn.llen(f"cabinet:async:notify:{self.task_id}"), 1)
+
+
+class CabinetReleaseRentalStateTest(FakeRedisMixin, CabinetFixtureMixin, TestCase):
+    """관리자 반납/상태 변경 후 Redis 대여 상태 정리 테스트"""
+
+    def setUp(self):
+        super().setUp()
+        self.building = self.create_building()
+        self.user = self.create_user("20240001", with_authn=False)
+        self.rented = self.create_cabinet(1, user=self.user, status=CabinetStatusEnum.USING.value)
+        cabinet_histories.objects.create(user_id=self.user, cabinet_id=self.rented, expired_at=timezone.now())
+        self.available = self.create_cabinet(2)
+        self.redis_conn.set(f"cabinet:status:{self.rented.id}", "rented:20240001")
+        self.redis_conn.set("cabinet:user_rental:20240001", self.rented.id)
+        # 다른 사용자가 대여 중인(선점한) 사물함
+        self.redis_conn.set(f"cabinet:status:{self.available.id}", "renting:20240002")
+        self.redis_conn.set("cabinet:user_rental:20240002", self.available.id)
+
+    def test_release_only_changed_cabinets_after_commit(self):
+        """반납에 성공한 사물함의 상태만 커밋 후 정리하고, 실패한 사물함의 대여 선점은 유지해야 함"""
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            successful_cabinets, failed_ids = CabinetService().return_cabinets_by_ids([self.rented.id, self.available.id])
+            self.assertTrue(self.redis_conn.exists(f"cabinet:status:{self.rented.id}"))
+        for callback in callbacks:
+            callback()
+
+        self.assertEqual([cabinet.id for cabinet in successful_cabinets], [self.rented.id])
+        self.assertEqual([failed['id'] for failed in failed_ids], [self.available.id])
+        self.assertFalse(self.redis_conn.exists(f"cabinet:status:{self.rented.id}", "cabinet:user_rental:20240001"))
+        self.assertEqual(self.redis_conn.get(f"cabinet:status:{self.available.id}"), b"renting:20240002")
+        self.assertTrue(self.redis_conn.exists("cabinet:user_rental:20240002"))
+
+    def test_release_keeps_in_flight_claims(self):
+        """진행 중인 대여 선점(renting:)은 상태 변경 대상이어도 정리하지 않아야 함"""
+        CabinetRentalState().release_cabinets([self.rented.id, self.available.id])
+        self.assertFalse(self.redis_conn.exists(f"cabinet:status:{self.rented.id}"))
+        self.assertTrue(self.redis_conn.exists(f"cabinet:status:{self.available.id}", "cabinet:user_rental:20240002"))
+
+    def test_redis_error_does_not_fail_committed_change(self):
+        """커밋된 상태 변경은 Redis 오류가 나도 실패로 응답하지 않아야 함"""
+        with mock.patch.object(CabinetRentalState().redis_conn, 'mget', side_effect=ConnectionError("redis down")):
+            with self.captureOnCommitCallbacks(execute=True):
+                successful_cabinets, _ = CabinetService().change_cabinet_status_by_ids([self.rented.id], 'BROKEN', '점검')
+        self.assertEqual([cabinet.id for cabinet in successful_cabinets], [self.rented.id])
+        self.assertEqual(cabinets.objects.get(id=self.rented.id).status, CabinetStatusEnum.BROKEN.value)
+
+
+class CabinetRentalBatcherTest(FakeRedisMixin, CabinetFixtureMixin, TestCase):
+    """배치 대여 백엔드 테스트"""
+
+    def setUp(self):
+        super().setUp()
+        CabinetRentalBatcher._instance = None
+        self.addCleanup(setattr, CabinetRentalBatcher, '_instance', None)
+        self.batcher = CabinetRentalBatcher()
+        self.building = self.create_building()
+        self.users = [self.create_user(f"2024000{number}") for number in range(1, 4)]
+        self.cabinets = [self.create_cabinet(number) for number in range(1, 4)]
+        # 두 번째 사용자는 이미 세 번째 사물함을 사용 중
+        cabinets.objects.filter(id=self.cabinets[2].id).update(
+            user_id=self.users[1], status=CabinetStatusEnum.USING.value
+        )
+        self.batch = [
+            (self.cabinets[0].id, "20240001", "task-1"),
+            (self.cabinets[1].id, "20240002", "task-2"),
+            # 같은 배치 안에서 첫 번째 요청과 같은 사물함
+            (self.cabinets[0].id, "20240003", "task-3"),
+        ]
+        # 요청 경로와 같이 대여 선점
+        CabinetRentalState().claim_rent(self.cabinets[0].id, "20240001")
+        CabinetRentalState().claim_rent(self.cabinets[1].id, "20240002")
+
+    def _result(self, task_id):
+        return AsyncResultManager.peek_result(task_id)
+
+    def _assert_claims_released(self):
+        self.assertFalse(self.redis_conn.keys("cabinet:task:claim:*"))
+        self.assertFalse(self.redis_conn.keys("cabinet:processing:*"))
+
+    def test_mixed_batch(self):
+        """성공, 대여 중인 사용자, 같은 배치 내 중복 사물함이 요청별로 보고되어야 함"""
+        self.batcher._process_batch(self.batch)
+
+        self.assertEqual(self._result("task-1")["status"], "success")
+        self.assertEqual(self._result("task-2")["error_code"], "user_has_rental")
+        self.assertEqual(self._result("task-3")["error_code"], "cabinet_already_rented")
+        self.assertEqual(cabinets.objects.get(id=self.cabinets[0].id).user_id_id, self.users[0].id)
+        self.assertEqual(cabinets.objects.get(id=self.cabinets[1].id).status, CabinetStatusEnum.AVAILABLE.value)
+
+        self.assertEqual(self.redis_conn.get(f"cabinet:status:{self.cabinets[0].id}"), b"rented:20240001")
+        self.assertFalse(self.redis_conn.exists(f"cabinet:status:{self.cabinets[1].id}", "cabinet:user_rental:20240002"))
+        self._assert_claims_released()
+
+    def test_transaction_failure_fails_every_task(self):
+        """트랜잭션 전체가 실패하면 모든 작업이 실패로 보고되고 대여 선점이 해제되어야 함"""
+        with mock.patch.object(CabinetService, 'rent_cabinets_in_batch', side_effect=DatabaseError("deadlock")):
+            self.batcher._process_batch(self.batch)
+
+        self.assertEqual([self._result(task_id)["status"] for _, _, task_id in self.batch], ["error"] * 3)
+        self.assertFalse(self.redis_conn.keys("cabinet:status:*"))
+        self.assertFalse(cabinet_histories.objects.exists())
+        self._assert_claims_released()
+
+    def test_claim_failure_reports_errors(self):
+        """작업 선점 중 Redis 오류가 나도 모든 작업에 실패 결과를 남겨야 함"""
+        with mock.patch.object(self.batcher, '_claim', side_effect=ConnectionError("redis down")):
+            self.batcher._process_batch(self.batch)
+
+        self.assertEqual([self._result(task_id)["status"] for _, _, task_id in self.batch], ["error"] * 3)
+        self.assertFalse(self.redis_conn.keys("cabinet:status:*"))
+        self.assertFalse(cabinet_histories.objects.exists())
+
+    def test_result_write_failure_still_completes_rents(self):
+        """결과 저장에 실패해도 대여 상태 전이와 선점 해제는 수행되어야 함"""
+        with mock.patch.object(AsyncResultManager, 'set_results', side_effect=ConnectionError("redis down")):
+            with self.assertRaises(ConnectionError):
+                self.batcher._process_batch(self.batch)
+
+        self.assertEqual(self.redis_conn.get(f"cabinet:status:{self.cabinets[0].id}"), b"rented:20240001")
+        self.assertFalse(self.redis_conn.exists(f"cabinet:status:{self.cabinets[1].id}"))
+        self._assert_claims_released()
+
+    def test_bulk_rent_sends_post_save_only_for_created_histories(self):
+        """bulk_rent_cabinets는 커밋 후 새로 생성된 이력에 대해서만 post_save를 발송해야 함"""
+        returned = cabinet_histories.objects.create(
+            user_id=self.users[0], cabinet_id=self.cabinets[0],
+            expired_at=timezone.now(), ended_at=timezone.now()
+        )
+        sent = []
+
+        def receiver(sender, instance, created, **kwargs):
+            sent.append((instance.id, created))
+        post_save.connect(receiver, sender=cabinet_histories)
+        self.addCleanup(post_save.disconnect, receiver, sender=cabinet_histories)
+
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            histories = CabinetHistoryRepository().bulk_rent_cabinets([
+                (self.cabinets[0], self.users[0].id),
+                (self.cabinets[1], self.users[2].id),
+            ])
+        self.assertEqual(sent, [])
+        for callback in callbacks:
+            callback()
+
+        created = [history for history in histories if history.id != returned.id]
+        self.assertEqual(len(created), 1)
+        self.assertEqual(sent, [(created[0].id, True)])
+
+
+@override_settings(CABINET_FLOOR_MAP_CACHE_ENABLED=True, CABINET_RENTAL_LOCK_MODE='db')
+class CabinetFloorMapCacheTest(FakeRedisMixin, CabinetFixtureMixin, TestCase):
+    """층별 배치도 Redis 캐시 테스트"""
+
+    # 캐시 적중 시 건물 조회 4회만 수행 (사물함 조회 없음)
+    CACHED_QUERY_COUNT = 4
+
+    def setUp(self):
+        super().setUp()
+        self.building = self.create_building()
+        self.owner = self.create_user("20240001")
+        self.other = self.create_user("20240002")
+        for number in range(1, 4):
+            cabinet = self.create_cabinet(number)
+            cabinet_positions.objects.create(cabinet_id=cabinet, cabinet_x_pos=number, cabinet_y_pos=0)
+        self.cabinet = cabinets.objects.order_by('id').first()
+        self.floor_map_key = f"cabinet:floormap:{self.building.id}"
+
+    def _get_floor_map(self, user):
+        client = APIClient()
+        client.force_authenticate(user=user.authn_info)
+        response = client.get('/cabinet/', {'building': BuildingNameEnum.가온관.value, 'floors': '1'})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_miss_then_hit(self):
+        """첫 조회는 DB에서 만들어 저장하고, 다음 조회는 사물함을 DB에서 조회하지 않아야 함"""
+        self.assertEqual(len(self._get_floor_map(self.owner)), 3)
+        self.assertTrue(self.redis_conn.exists(self.floor_map_key))
+
+        with self.assertNumQueries(self.CACHED_QUERY_COUNT):
+            self.assertEqual(len(self._get_floor_map(self.owner)), 3)
+
+    def test_is_mine_is_computed_per_user(self):
+        """같은 캐시에서도 isMine은 요청 사용자 기준으로 계산되고 ownerId는 노출되지 않아야 함"""
+        cabinets.objects.filter(id=self.cabinet.id).update(user_id=self.owner, status=CabinetStatusEnum.USING.value)
+
+        owner_view = self._get_floor_map(self.owner)
+        other_view = self._get_floor_map(self.other)
+
+        self.assertEqual([entry['id'] for entry in owner_view if entry['isMine']], [self.cabinet.id])
+        self.assertFalse(any(entry['isMine'] for entry in other_view))
+        self.assertFalse(any('ownerId' in entry for entry in owner_view + other_view))
+
+    def test_stale_load_is_not_written_after_invalidation(self):
+        """DB를 읽은 뒤 커밋된 대여의 무효화 이후에는 읽어 둔 이전 배치도를 저장하지 않아야 함"""
+        service = CabinetService()
+        load_cabinets = CabinetService.get_cabinets_by_building_ids
+
+        def load_then_rent(self_, building_ids):
+            # 이전 상태를 읽은 직후 다른 요청의 대여가 커밋됨
+            loaded = list(load_cabinets(self_, building_ids))
+            with self.captureOnCommitCallbacks(execute=True):
+                service.rent_cabinet(self.cabinet.id, "20240001")
+            return loaded
+
+        with mock.patch.object(CabinetService, 'get_cabinets_by_building_ids', load_then_rent):
+            stale_view = self._get_floor_map(self.owner)
+        self.assertFalse(any(entry['isMine'] for entry in stale_view))
+        self.assertFalse(self.redis_conn.exists(self.floor_map_key))
+
+        self.assertEqual([entry['id'] for entry in self._get_floor_map(self.owner) if entry['isMine']], [self.cabinet.id])
+        self.assertTrue(self.redis_conn.exists(self.floor_map_key))
+
+    def test_set_skips_buildings_invalidated_after_read(self):
+        """조회 시점 이후 무효화된 건물만 저장에서 제외해야 함"""
+        repository = CabinetFloorMapRedisRepository()
+        other_building = self.create_building(floor=2)
+        building_ids = [self.building.id, other_building.id]
+        _, versions = repository.get_floor_maps(building_ids)
+
+        repository.invalidate([self.building.id])
+        stored = repository.set_floor_maps({building_id: [] for building_id in building_ids}, versions)
+
+        self.assertEqual(stored, 1)
+        floor_maps, _ = repository.get_floor_maps(building_ids)
+        self.assertEqual(floor_maps, {self.building.id: None, other_building.id: []})
+
+    def test_ttl_does_not_cross_rent_availability_boundary(self):
+        """TTL은 다음 00시/13시 기준 시각을 넘지 않고 최대 1시간이어야 함"""
+        repository = CabinetFloorMapRedisRepository()
+        cases = [
+            (datetime.datetime(2025, 3, 10, 12, 59, 30), 30),
+            (datetime.datetime(2025, 3, 10, 23, 59, 50), 10),
+            (datetime.datetime(2025, 3, 10, 1, 0, 0), repository.max_ttl),
+        ]
+        for now, expected in cases:
+            with mock.patch.object(timezone, 'now', return_value=now):
+                self.assertEqual(repository._get_ttl(), expected)
+
+    def test_rent_and_return_invalidate_after_commit(self):
+        """대여/반납이 커밋되면 해당 층 배치도 캐시가 삭제되어야 함"""
+        service = CabinetService()
+        self._get_floor_map(self.owner)
+        with self.captureOnCommitCallbacks(execute=True):
+            service.rent_cabinet(self.cabinet.id, "20240001")
+            self.assertTrue(self.redis_conn.exists(self.floor_map_key))
+        self.assertFalse(self.redis_conn.exists(self.floor_map_key))
+
+        self.assertTrue(self._get_floor_map(self.owner)[0]['isMine'])
+        # 반납 완료 Kafka 메시지 발행은 이 테스트 범위 밖이므로 대체
+        with mock.patch('cabinet.business.cabinet_service.CabinetRentProducer'), \
+                self.captureOnCommitCallbacks(execute=True):
+            service.return_cabinet(self.cabinet.id, "20240001")
+        self.assertFalse(self.redis_conn.exists(self.floor_map_key))
+        self.assertFalse(self._get_floor_map(self.owner)[0]['isMine'])
+
+
+class BookmarkSyncManagerTest(FakeRedisMixin, CabinetFixtureMixin, TestCase):
+    """북마크 Redis -> DB 동기화 테스트"""
+
+    def setUp(self):
+        super().setUp()
+        self.building = self.create_building()
+        self.user = self.create_user("20240001")
+        self.cabinets = [self.create_cabinet(number) for number in range(1, 5)]
+        self.redis_repo = CabinetBookmarkRedisRepository()
+        self.manager = BookmarkSyncManager()
+
+    def _bookmark_rows(self, cabinet):
+        return cabinet_bookmarks.objects.filter(user_id=self.user, cabinet_id=cabinet)
+
+    def _pending_keys(self, redis_key):
+        return {key.decode() for key in self.redis_conn.smembers(redis_key)}
+
+    def test_add_remove_readd_in_one_chunk(self):
+        """한 청크 안의 추가/삭제/재추가는 마지막 상태로 한 번씩 반영되어야 함"""
+        added, removed, readded, cancelled = self.cabinets
+        cabinet_bookmarks.objects.create(user_id=self.user, cabinet_id=removed)
+        cabinet_bookmarks.objects.create(user_id=self.user, cabinet_id=readded, deleted_at=timezone.now())
+
+        self.redis_repo.add_bookmark(self.user.id, added)
+        self.redis_repo.add_bookmark(self.user.id, removed)
+        self.redis_repo.remove_bookmark(self.user.id, removed)
+        for _ in range(2):
+            self.redis_repo.add_bookmark(self.user.id, readded)
+            self.redis_repo.remove_bookmark(self.user.id, readded)
+        self.redis_repo.add_bookmark(self.user.id, readded)
+        self.redis_repo.add_bookmark(self.user.id, cancelled)
+        self.redis_repo.remove_bookmark(self.user.id, cancelled)
+
+        result = self.manager.sync_to_database()
+
+        self.assertEqual(result["status"], "success")
+        self.assertEqual((result["chunks"], result["processed"], result["errors"]), (1, 4, 0))
+        self.assertEqual(self._bookmark_rows(added).filter(deleted_at__isnull=True).count(), 1)
+        self.assertIsNotNone(self._bookmark_rows(removed).get().deleted_at)
+        self.assertIsNone(self._bookmark_rows(readded).get().deleted_at)
+        self.assertFalse(self._bookmark_rows(cancelled).exists())
+        self.assertFalse(self._pending_keys(CabinetBookmarkRedisRepository.CHANGED_KEY))
+        self.assertFalse(self._pending_keys(CabinetBookmarkRedisRepository.PROCESSING_KEY))
+
+    def test_db_error_requeues_chunk(self):
+        """청크 트랜잭션이 실패하면 꺼낸 키가 변경 목록으로 되돌아가고 다음 실행에서 반영되어야 함"""
+        for cabinet in self.cabinets[:2]:
+            self.redis_repo.add_bookmark(self.user.id, cabinet)
+
+        with mock.patch.object(self.manager.db_repo, 'bulk_create_bookmarks', side_effect=DatabaseError("down")):
+            result = self.manager.sync_to_database()
+
+        self.assertEqual(result["status"], "failed")
+        self.assertEqual(result["errors"], 2)
+        self.assertEqual(result["backlog"], 2)
+        self.assertFalse(cabinet_bookmarks.objects.exists())
+        self.assertEqual(
+            self._pending_keys(CabinetBookmarkRedisRepository.CHANGED_KEY),
+            {f"{self.user.id}:{cabinet.id}" for cabinet in self.cabinets[:2]}
+        )
+        self.assertFalse(self._pending_keys(CabinetBookmarkRedisRepository.PROCESSING_KEY))
+
+        self.assertEqual(self.manager.sync_to_database()["processed"], 2)
+        self.assertEqual(cabinet_bookmarks.objects.count(), 2)
+
+    def test_lock_extend_failure_stops_loop(self):
+        """락 연장에 실패하면 남은 청크를 처리하지 않고 변경 목록에 남겨 두어야 함"""
+        self.manager.chunk_size = 1
+        for cabinet in self.cabinets[:3]:
+            self.redis_repo.add_bookmark(self.user.id, cabinet)
+
+        with mock.patch.object(RedisLock, 'extend', return_value=False) as extend:
+            result = self.manager.sync_to_database()
+
+        extend.assert_called_once()
+        self.assertEqual((result["chunks"], result["processed"]), (1, 1))
+        self.assertEqual(result["backlog"], 2)
+        self.assertEqual(cabinet_bookmarks.objects.count(), 1)
+        self.assertFalse(self._pending_keys(CabinetBookmarkRedisRepository.PROCESSING_KEY))
+
+    def test_legacy_json_change_still_syncs(self):
+        """이전 JSON 형식 키(cabinet:bookmark:{user}:{cabinet})로 남은 변경도 반영되어야 함"""
+        added, removed = self.cabinets[:2]
+        cabinet_bookmarks.objects.create(user_id=self.user, cabinet_id=removed)
+        for cabinet, bookmark_status in ((added, 'active'), (removed, 'deleted')):
+            self.redis_conn.set(f"cabinet:bookmark:{self.user.id}:{cabinet.id}", json.dumps({
+                'id': cabinet.id,
+                'user_id': self.user.id,
+                'cabinet_id': cabinet.id,
+                'bookmark_status': bookmark_status,
+                'cabinet_status': cabinet.status,
+                'created_at': timezone.now().isoformat(),
+                'updated_at': timezone.now().isoformat(),
+            }))
+            self.redis_conn.sadd(CabinetBookmarkRedisRepository.CHANGED_KEY, f"{self.user.id}:{cabinet.id}")
+
+        result = self.manager.sync_to_database()
+
+        self.assertEqual((result["processed"], result["skipped"]), (2, 0))
+        self.assertIsNone(self._bookmark_rows(added).get().deleted_at)
+        self.assertIsNotNone(self._bookmark_rows(removed).get().deleted_at)
+
+    def test_keys_left_by_crashed_worker_are_recovered(self):
+        """커밋 전에 종료된 워커가 꺼낸 키는 처리 중 목록에 남아 다음 동기화에서 반영되어야 함"""
+        self.redis_repo.add_bookmark(self.user.id, self.cabinets[0])
+        # 꺼낸 뒤 커밋/복구 없이 종료된 상황
+        self.assertEqual(len(self.redis_repo.pop_changed_bookmarks(10)), 1)
+        self.assertEqual(self.redis_repo.count_changed_bookmarks(), 1)
+
+        result = self.manager.sync_to_database()
+
+        self.assertEqual(result["processed"], 1)
+        self.assertEqual(result["backlog"], 0)
+        self.assertTrue(self._bookmark_rows(self.cabinets[0]).exists())
+
+
+@override_settings(BOOKMARK_SYNC_TRIGGER_SIZE=3, BOOKMARK_SYNC_MAX_LAG=30,
+                   BOOKMARK_SYNC_CHECK_INTERVAL=2, BOOKMARK_SYNC_MAX_BACKOFF=60)
+class BookmarkSyncSchedulerTest(FakeRedisMixin, TestCase):
+    """북마크 동기화 적응형 스케줄러 테스트"""
+
+    def setUp(self):
+        super().setUp()
+        self.scheduler = BookmarkSyncScheduler()
+        patcher = mock.patch('cabinet.util.cabinet_celery_task.sync_bookmarks_to_database.apply_async')
+        self.apply_async = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _add_changes(self, count):
+        self.redis_conn.sadd(BookmarkSyncScheduler.CHANGED_KEY, *[f"1:{number}" for number in range(count)])
+
+    def test_size_trigger(self):
+        """변경 수가 기준 미만이면 예약하지 않고, 기준 이상이면 예약해야 함"""
+        self._add_changes(2)
+        self.assertEqual(self.scheduler.check()["reason"], "below_threshold")
+        self.apply_async.assert_not_called()
+
+        self._add_changes(3)
+        result = self.scheduler.check()
+        self.assertTrue(result["scheduled"])
+        self.assertEqual(result["backlog"], 3)
+        self.apply_async.assert_called_once()
+
+    def test_lag_trigger(self):
+        """변경 수가 적어도 가장 오래된 변경이 최대 대기 시간을 넘기면 예약해야 함"""
+        self._add_changes(1)
+        self.redis_conn.set(BookmarkSyncScheduler.SINCE_KEY, int(time.time()) - 30)
+
+        result = self.scheduler.check()
+
+        self.assertTrue(result["scheduled"])
+        self.assertGreaterEqual(result["lag"], 30)
+        self.apply_async.assert_called_once()
+
+    def test_empty_backlog_resets_lag(self):
+        """변경 목록이 비어 있으면 대기 시작 시각을 지워야 함"""
+        self.assertEqual(self.scheduler.check()["reason"], "empty")
+        self.assertFalse(self.redis_conn.exists(BookmarkSyncScheduler.SINCE_KEY))
+
+    def test_set_nx_coalesces_schedules(self):
+        """예약 키가 있는 동안의 확인/예약은 작업을 다시 넣지 않아야 함"""
+        self._add_changes(3)
+        self.assertTrue(self.scheduler.check()["scheduled"])
+
+        self.assertEqual(self.scheduler.check()["reason"], "backoff_or_scheduled")
+        self.assertEqual(self.scheduler.schedule(backlog=3, lag=0)["reason"], "already_scheduled")
+        self.apply_async.assert_called_once()
+
+    def test_enqueue_failure_releases_schedule(self):
+        """작업 전달에 실패하면 예약 키를 지워 다음 확인에서 다시 예약할 수 있어야 함"""
+        self.apply_async.side_effect = ConnectionError("broker down")
+        self.assertEqual(self.scheduler.schedule()["reason"], "enqueue_failed")
+        self.assertFalse(self.redis_conn.exists(BookmarkSyncScheduler.SCHEDULED_KEY))
+
+    def test_exponential_backoff(self):
+        """연속 실패마다 지연이 두 배로 늘고 최대 지연에서 멈춰야 함"""
+        delays = []
+        for _ in range(6):
+            self.scheduler.on_sync_finished({"status": "failed"})
+            delays.append(self.redis_conn.ttl(BookmarkSyncScheduler.BACKOFF_KEY))
+        self.assertEqual(delays, [4, 8, 16, 32, 60, 60])
+
+        self._add_changes(3)
+        self.assertEqual(self.scheduler.check()["reason"], "backoff_or_scheduled")
+        self.apply_async.assert_not_called()
+
+    def test_slow_sync_backs_off_and_success_resets(self):
+        """느린 동기화도 지연시키고, 정상 완료되면 실패 횟수와 지연을 초기화해야 함"""
+        self.scheduler.on_sync_finished({"status": "success", "elapsed_ms": self.scheduler.slow_ms + 1})
+        self.assertTrue(self.redis_conn.exists(BookmarkSyncScheduler.BACKOFF_KEY))
+
+        self.scheduler.on_sync_finished({"status": "success", "elapsed_ms": 10, "backlog": 0})
+        self.assertFalse(self.redis_conn.exists(BookmarkSyncScheduler.BACKOFF_KEY, BookmarkSyncScheduler.FAILURES_KEY))
+
+    def test_leftover_backlog_reschedules_immediately(self):
+        """남은 변경이 기준 이상이면 곧바로 다시 예약하고, 기준 미만이면 대기 시간을 새로 계산해야 함"""
+        self.redis_conn.set(BookmarkSyncScheduler.SCHEDULED_KEY, 1)
+
+        self.scheduler.on_sync_finished({"status": "success", "elapsed_ms": 10, "backlog": 3})
+        self.apply_async.assert_called_once()
+        self.assertTrue(self.redis_conn.exists(BookmarkSyncScheduler.SCHEDULED_KEY))
+
+        self.redis_conn.delete(BookmarkSyncScheduler.SCHEDULED_KEY)
+        self.scheduler.on_sync_finished({"status": "success", "elapsed_ms": 10, "backlog": 2})
+        self.apply_async.assert_called_once()
+        self.assertTrue(self.redis_conn.exists(BookmarkSyncScheduler.SINCE_KEY))
+        self.assertFalse(self.redis_conn.exists(BookmarkSyncScheduler.SCHEDULED_KEY))
+
+
+class CabinetBookmarkAddQueryCountTest(FakeRedisMixin, CabinetFixtureMixin, TestCase):
+    """북마크 추가 시 사물함 상태 인덱스/사용자 북마크 해시 사용 테스트"""
+
+    def setUp(self):
+        super().setUp()
+        self.building = self.create_building()
+        self.user = self.create_user("20240001")
+        self.cabinet = self.create_cabinet(1)
+        self.service = CabinetBookmarkService()
+        self.index_repo = CabinetStatusIndexRedisRepository()
+
+    def _warm_up(self):
+        # 사물함 상태 인덱스와 사용자 북마크 해시(북마크 없음) 적재
+        self.service.get_bookmarks("20240001", user_id=self.user.id)
+        self.service._get_cabinet_info(self.cabinet.id)
+
+    def test_warm_add_runs_no_queries(self):
+        """인덱스와 사용자 해시가 적재되어 있으면 추가와 중복 확인 모두 DB를 조회하지 않아야 함"""
+        self._warm_up()
+
+        with self.assertNumQueries(0):
+            bookmark = self.service.add_bookmark(self.cabinet.id, "20240001", user_id=self.user.id)
+            with self.assertRaises(CabinetBookmarkAlreadyExistsException):
+                self.service.add_bookmark(self.cabinet.id, "20240001", user_id=self.user.id)
+
+        self.assertEqual(bookmark['bookmark_status'], 'active')
+        self.assertEqual(bookmark['cabinet_status'], CabinetStatusEnum.AVAILABLE.value)
+
+    def test_cold_add_fills_status_index(self):
+        """인덱스에 없는 사물함은 DB에서 한 번 읽고 인덱스에 저장해야 함"""
+        self.assertIsNone(self.index_repo.get_cabinet(self.cabinet.id))
+
+        # 사물함 조회 1회 + 적재되지 않은 사용자의 북마크 확인 1회
+        with self.assertNumQueries(2):
+            self.service.add_bookmark(self.cabinet.id, "20240001", user_id=self.user.id)
+
+        self.assertEqual(self.index_repo.get_cabinet(self.cabinet.id).status, CabinetStatusEnum.AVAILABLE.value)
+
+    def test_status_change_invalidates_index_on_commit(self):
+        """사물함 상태 변경은 커밋된 뒤에 인덱스 항목을 지워 다음 조회가 새 상태를 읽어야 함"""
+        self._warm_up()
+        with self.captureOnCommitCallbacks(execute=True):
+            CabinetService().rent_cabinet(self.cabinet.id, "20240001")
+            # 커밋 전에는 이전 상태가 남아 있음
+            self.assertEqual(self.index_repo.get_cabinet(self.cabinet.id).status, CabinetStatusEnum.AVAILABLE.value)
+        self.assertIsNone(self.index_repo.get_cabinet(self.cabinet.id))
+
+        bookmark = self.service.add_bookmark(self.cabinet.id, "20240001", user_id=self.user.id)
+        self.assertEqual(bookmark['cabinet_status'], CabinetStatusEnum.USING.value)
+        self.assertEqual(self.index_repo.get_cabinet(self.cabinet.id).status, CabinetStatusEnum.USING.value)
+
+
+class CabinetBookmarkListQueryCountTest(FakeRedisMixin, CabinetFixtureMixin, TestCase):
+    """북마크 목록 조회 API read-through 쿼리 수 테스트"""
+
+    # 적재되지 않은 사용자의 북마크 조회 1회 (사물함/건물 조인)
+    COLD_QUERY_COUNT = 1
+
+    def setUp(self):
+        super().setUp()
+        self.building = self.create_building()
+        self.user = self.create_user("20240001")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user.authn_info)
+        self.redis_repo = CabinetBookmarkRedisRepository()
+
+    def _create_bookmarks(self, *cabinet_numbers, status=CabinetStatusEnum.AVAILABLE.value):
+        return [
+            cabinet_bookmarks.objects.create(user_id=self.user, cabinet_id=self.create_cabinet(number, status=status))
+            for number in cabinet_numbers
+        ]
+
+    def _get_bookmarks(self, query_count):
+        with self.assertNumQueries(query_count):
+            response = self.client.get('/cabinet/bookmark/list')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_loaded_user_is_served_from_redis(self):
+        """첫 조회에서 적재한 뒤에는 북마크 수와 관계없이 DB를 조회하지 않아야 함"""
+        self._create_bookmarks(1, 2, 3)
+
+        cold = self._get_bookmarks(self.COLD_QUERY_COUNT)
+        warm = self._get_bookmarks(0)
+
+        self.assertEqual([bookmark['cabinetNumber'] for bookmark in cold], [1, 2, 3])
+        self.assertEqual(warm, cold)
+        self.assertEqual(warm[0]['building'], BuildingNameEnum.가온관.value)
+
+    def test_user_without_bookmarks_is_not_requeried(self):
+        """북마크가 없는 사용자도 적재 표시를 남겨 다시 DB를 조회하지 않아야 함"""
+        self.assertEqual(self._get_bookmarks(self.COLD_QUERY_COUNT), [])
+        self.assertEqual(self._get_bookmarks(0), [])
+
+    def test_load_does_not_mark_changes_or_overwrite_pending(self):
+        """DB 적재는 변경 목록에 추가하지 않고, 아직 동기화되지 않은 Redis 변경을 덮어쓰지 않아야 함"""
+        synced, pending_removal = self._create_bookmarks(1, 2)
+        pending_add = self.create_cabinet(3)
+        # 적재 전에 Redis에만 반영된 변경 (동기화 대기 중)
+        self.redis_repo.add_bookmark(self.user.id, pending_add)
+        self.redis_repo.add_bookmark(self.user.id, pending_removal.cabinet_id)
+        self.redis_repo.remove_bookmark(self.user.id, pending_removal.cabinet_id)
+        changed_before = self.redis_conn.smembers(CabinetBookmarkRedisRepository.CHANGED_KEY)
+
+        bookmarks = self._get_bookmarks(self.COLD_QUERY_COUNT)
+
+        self.assertEqual(sorted(bookmark['id'] for bookmark in bookmarks), [synced.cabinet_id_id, pending_add.id])
+        self.assertEqual(self.redis_conn.smembers(CabinetBookmarkRedisRepository.CHANGED_KEY), changed_before)
+
+    def test_falls_back_to_db_when_redis_is_down(self):
+        """Redis를 사용할 수 없으면 DB 북마크를 반환하고 BROKEN 사물함은 제외해야 함"""
+        self._create_bookmarks(1, 2)
+        self._create_bookmarks(3, status=CabinetStatusEnum.BROKEN.value)
+        broken_redis = mock.Mock()
+        broken_redis.pipeline.side_effect = ConnectionError("redis down")
+
+        with mock.patch.object(cabinet_bookmark_service.cabinet_bookmark_redis_repository, 'redis_conn', broken_redis):
+            bookmarks = self._get_bookmarks(self.COLD_QUERY_COUNT)
+
+        self.assertEqual([bookmark['cabinetNumber'] for bookmark in bookmarks], [1, 2])
+
+
+class BookmarkEntryCodecTest(TestCase):
+    """북마크 항목 바이너리 인코딩 테스트"""
+
+    def _entry(self, **fields):
+        entry = {
+            'bookmark_status': 'active',
+            'cabinet_status': CabinetStatusEnum.AVAILABLE.value,
+            'cabinet_number': 12,
+            'building_id': 3,
+            'created_at': 1700000000,
+            'updated_at': 1700000100,
+            'deleted_at': None,
+        }
+        entry.update(fields)
+        return entry
+
+    def test_round_trip(self):
+        """모든 북마크/사물함 상태가 인코딩 후 그대로 복원되고 deleted_at=None이 유지되어야 함"""
+        for bookmark_status in BookmarkEntryCodec.BOOKMARK_STATUSES:
+            for cabinet_status in BookmarkEntryCodec.CABINET_STATUSES:
+                entry = self._entry(bookmark_status=bookmark_status, cabinet_status=cabinet_status)
+                raw = BookmarkEntryCodec.encode(entry)
+                self.assertEqual(len(raw), 21)
+                self.assertEqual(BookmarkEntryCodec.decode(raw), entry)
+
+        deleted = self._entry(bookmark_status='deleted', deleted_at=1700000200)
+        self.assertEqual(BookmarkEntryCodec.decode(BookmarkEntryCodec.encode(deleted)), deleted)
+
+    def test_zero_and_missing_values_are_distinct(self):
+        """사물함 번호/건물 ID 0은 0으로, 값이 없으면 None으로 복원되어야 함"""
+        zero = self._entry(cabinet_number=0, building_id=0)
+        self.assertEqual(BookmarkEntryCodec.decode(BookmarkEntryCodec.encode(zero)), zero)
+
+        missing = self._entry(cabinet_number=None, building_id=None)
+        self.assertEqual(BookmarkEntryCodec.decode(BookmarkEntryCodec.encode(missing)), missing)
+
+    def test_legacy_version_decodes_zero_as_missing(self):
+        """이전 형식(버전 1) 항목은 0을 값 없음으로 읽어야 함"""
+        raw = BookmarkEntryCodec.ENTRY.pack(BookmarkEntryCodec.LEGACY_VERSION, 1, 0, 0, 0, 1700000000, 1700000100, 0)
+        entry = BookmarkEntryCodec.decode(raw)
+        self.assertEqual((entry['cabinet_number'], entry['building_id'], entry['deleted_at']), (None, None, None))
+        self.assertEqual(entry['bookmark_status'], 'active')
+
+    def test_unknown_cabinet_status(self):
+        """알 수 없는 사물함 상태는 UNKNOWN 코드로 저장되고 None으로 복원되어야 함"""
+        for cabinet_status in (None, 'NOT_A_STATUS'):
+            raw = BookmarkEntryCodec.encode(self._entry(cabinet_status=cabinet_status))
+            self.assertEqual(raw[2], BookmarkEntryCodec.UNKNOWN)
+            self.assertIsNone(BookmarkEntryCodec.decode(raw)['cabinet_status'])
+
+    def test_version_byte(self):
+        """첫 바이트는 인코딩 버전이며 다른 버전은 복원하지 않아야 함"""
+        raw = BookmarkEntryCodec.encode(self._entry())
+        self.assertEqual(raw[0], BookmarkEntryCodec.VERSION)
+
+        with self.assertRaises(ValueError):
+            BookmarkEntryCodec.decode(bytes([BookmarkEntryCodec.VERSION + 1]) + raw[1:])
@@ -5,6 +5,7 @@ urlpatterns = [
     path('', views.CabinetInfoView.as_view(), name='info'),
     path('detail', views.CabinetInfoDetailView.as_view(), name='floor_detail'),
     path('rent', views.CabinetRentView.as_view(), name='rent'),
+    path('rent/result', views.CabinetRentResultView.as_view(), name='rent_result'),
     path('return', views.CabinetReturnView.as_view(), name='return'),
 
     path('search', views.CabinetSearchView.as_view(), name='search'),
@@ -1,45 +1,143 @@
 import json
-import time
 import logging
 from django_redis import get_redis_connection
 
 logger = logging.getLogger(__name__)
 
 class AsyncResultManager:
-    """비동기 작업 결과 관리자"""
+    """
+    비동기 작업 결과 관리자
+
+    결과는 `cabinet:async:result:{task_id}`에 저장하고, 동시에
+    `cabinet:async:notify:{task_id}` 리스트에 알림을 넣어 대기 중인 요청이
+    BLPOP으로 즉시 깨어나도록 합니다 (주기적 폴링 없음).
+    """
+    
+    @staticmethod
+    def _result_key(task_id):
+        return f"cabinet:async:result:{task_id}"
+    
+    @staticmethod
+    def _notify_key(task_id):
+        return f"cabinet:async:notify:{task_id}"
+    
+    @staticmethod
+    def _parse(task_id, raw):
+        try:
+            return json.loads(raw.decode('utf-8') if isinstance(raw, bytes) else raw)
+        except json.JSONDecodeError:
+            logger.error(f"결과 JSON 파싱 실패: {task_id}")
+            return None
+    
+    @staticmethod
+    def _queue_result(pipe, task_id, result, expire_time):
+        payload = json.dumps(result)
+        notify_key = AsyncResultManager._notify_key(task_id)
+        pipe.set(AsyncResultManager._result_key(task_id), payload, ex=expire_time)
+        pipe.delete(notify_key)
+        pipe.rpush(notify_key, payload)
+        pipe.expire(notify_key, expire_time)
     
     @staticmethod
     def set_result(task_id, result, expire_time=300):
-        """비동기 작업 결과를 Redis에 저장"""
+        """비동기 작업 결과를 Redis에 저장하고 대기 중인 요청에 알림"""
         redis_conn = get_redis_connection("default")
-        key = f"cabinet:async:result:{task_id}"
-        redis_conn.set(key, json.dumps(result), ex=expire_time)
+        
+        # 결과 저장과 알림을 하나의 트랜잭션으로 처리
+        pipe = redis_conn.pipeline(transaction=True)
+        AsyncResultManager._queue_result(pipe, task_id, result, expire_time)
+        pipe.execute()
         logger.debug(f"결과 저장 완료: {task_id}")
     
     @staticmethod
-    def get_result(task_id, timeout=10, poll_interval=0.5):
-        """Redis에서 비동기 작업 결과 조회 (timeout 동안 대기)"""
+    def set_results(results, expire_time=300):
+        """여러 작업 결과({task_id: result})를 한 번의 왕복으로 저장하고 알림"""
+        if not results:
+            return
+        redis_conn = get_redis_connection("default")
+        pipe = redis_conn.pipeline(transaction=False)
+        for task_id, result in results.items():
+            AsyncResultManager._queue_result(pipe, task_id, result, expire_time)
+        pipe.execute()
+        logger.debug(f"결과 {len(results)}건 저장 완료")
+    
+    @staticmethod
+    def build_error_result(exception, cabinet_id, student_number):
+        """예외 정보를 비동기 작업 결과 형식으로 변환"""
+        error_info = {
+            "status": "error",
+            "cabinet_id": cabinet_id,
+            "student_number": student_number,
+            # 예외 클래스 정보 저장 (모듈 경로와 클래스명)
+            "exception_module": exception.__class__.__module__,
+            "exception_class": exception.__class__.__name__,
+            "message": str(exception),
+        }
+        
+        # ApplicationError 상속 클래스인 경우 추가 정보 포함
+        if hasattr(exception, 'error_code'):
+            error_info["error_code"] = getattr(exception, 'error_code', 'unknown_error')
+        
+        if hasattr(exception, 'status_code'):
+            error_info["status_code"] = getattr(exception, 'status_code', 500)
+        
+        # 디테일 정보가 있으면 포함
+        if hasattr(exception, 'details'):
+            error_info["details"] = getattr(exception, 'details', None)
+        
+        return error_info
+    
+    @staticmethod
+    def set_error_result(task_id, exception, cabinet_id, student_number, expire_time=300):
+        """예외 정보를 비동기 작업 결과로 저장하고 저장된 결과 반환"""
+        error_info = AsyncResultManager.build_error_result(exception, cabinet_id, student_number)
+        AsyncResultManager.set_result(task_id, error_info, expire_time=expire_time)
+        return error_info
+    
+    @staticmethod
+    def peek_result(task_id):
+        """대기 없이 저장된 작업 결과 조회 (없으면 None)"""
+        redis_conn = get_redis_connection("default")
+        result = redis_conn.get(AsyncResultManager._result_key(task_id))
+        if not result:
+            return None
+        return AsyncResultManager._parse(task_id, result)
+    
+    @staticmethod
+    def get_result(task_id, timeout=10):
+        """
+        비동기 작업 결과 조회 (결과가 저장될 때까지 최대 timeout초 대기)
+
+        결과가 아직 없으면 알림 리스트에서 BLPOP으로 대기하므로 워커가 결과를
+        저장하는 즉시 반환됩니다. 같은 작업을 기다리는 다른 요청도 깨어날 수
+        있도록 꺼낸 알림은 다시 넣어 둡니다.
+        """
+        result = AsyncResultManager.peek_result(task_id)
+        if result or timeout <= 0:
+            return result
+        
         redis_conn = get_redis_connection("default")
-        key = f"cabinet:async:result:{task_id}"
+        notify_key = AsyncResultManager._notify_key(task_id)
+        popped = redis_conn.blpop([notify_key], timeout=timeout)
         
-        start_time = time.time()
-        while time.time() - start_time < timeout:
-            result = redis_conn.get(key)
-            if result:
-                try:
-                    return json.loads(result.decode('utf-8') if isinstance(result, bytes) else result)
-                except json.JSONDecodeError:
-                    logger.error(f"결과 JSON 파싱 실패: {task_id}")
-                    return None
-            time.sleep(poll_interval)
+        if popped is None:
+            # 알림 직후 다른 요청이 알림을 가져간 경우를 위해 한 번 더 확인
+            result = AsyncResultManager.peek_result(task_id)
+            if not result:
+                logger.warning(f"결과 조회 타임아웃: {task_id}")
+            return result
         
-        logger.warning(f"결과 조회 타임아웃: {task_id}")
-        return None
+        _, payload = popped
+        # 다른 대기자를 위해 알림 복원 (TTL은 결과 키와 동일하게 유지)
+        pipe = redis_conn.pipeline(transaction=True)
+        pipe.rpush(notify_key, payload)
+        pipe.expire(notify_key, max(redis_conn.ttl(AsyncResultManager._result_key(task_id)), 1))
+        pipe.execute()
+        return AsyncResultManager._parse(task_id, payload)
     
     @staticmethod
     def delete_result(task_id):
-        """작업 결과 삭제"""
+        """작업 결과 및 알림 삭제"""
         redis_conn = get_redis_connection("default")
-        key = f"cabinet:async:result:{task_id}"
-        redis_conn.delete(key)
-        logger.debug(f"결과 삭제 완료: {task_id}")
\ No newline at end of file
+        redis_conn.delete(AsyncResultManager._result_key(task_id), AsyncResultManager._notify_key(task_id))
+        logger.debug(f"결과 삭제 완료: {task_id}")
@@ -121,6 +121,15 @@ class AsyncServiceManager:
             except Exception as e:
                 logger.error(f"스레드 풀 종료 실패: {str(e)}")
         
+        # 4. 대여 배치 워커 종료 (사용 중인 경우 남은 요청 처리 후 종료)
+        from cabinet.util.cabinet_rental_batcher import CabinetRentalBatcher
+        if CabinetRentalBatcher._instance is not None:
+            try:
+                logger.info("대여 배치 워커 종료 중...")
+                CabinetRentalBatcher._instance.stop()
+            except Exception as e:
+                logger.error(f"대여 배치 워커 종료 실패: {str(e)}")
+        
         # Redis 상태 업데이트
         try:
             redis_conn = get_redis_connection("default")
@@ -1,188 +1,220 @@
+import time
 import traceback
+from collections import defaultdict
+from django.conf import settings
+from django.db import transaction
 from django.utils import timezone
+from cabinet.models import cabinet_bookmarks
 from cabinet.persistence.cabinet_bookmark_redis_repository import CabinetBookmarkRedisRepository
 from cabinet.persistence.cabinet_bookmark_repository import CabinetBookmarkRepository
 from cabinet.persistence.cabinet_repository import CabinetRepository
 from core.config.redis_lock import RedisLock
-from authn.business.authn_service import AuthnService
 from cabinet.type import CabinetStatusEnum
+from user.persistence.user_repository import UserRepository
 import logging
-import json
 
 logger = logging.getLogger(__name__)
 
 class BookmarkSyncManager:
+    """
+    북마크 Redis -> DB 동기화 (write-behind)
+
+    변경 목록(cabinet:bookmarks:changed)을 청크 단위로 꺼내(SPOP) 사용자/사물함을
+    IN 쿼리 두 번으로 확인하고, 청크마다 하나의 트랜잭션에서 bulk_create / bulk_update로 반영합니다.
+    꺼낸 키는 커밋될 때까지 처리 중 목록(cabinet:bookmarks:processing)에 남아 있으며,
+    청크 처리가 실패하면 변경 목록에 되돌리고 워커가 비정상 종료되면 다음 실행 시작 시 되돌려 다시 처리합니다.
+    (커밋 후 처리 완료 표시 전에 종료된 경우 같은 상태를 한 번 더 반영하며, 반영은 멱등입니다.)
+    """
+    # 동기화 락 유지 시간 (초), 청크마다 연장
+    LOCK_EXPIRE = 30
+
     def __init__(self):
         self.redis_repo = CabinetBookmarkRedisRepository()
         self.db_repo = CabinetBookmarkRepository()
         self.cabinet_repo = CabinetRepository()
-        self.authn_service = AuthnService()
-    
+        self.user_repo = UserRepository()
+        self.chunk_size = getattr(settings, 'BOOKMARK_SYNC_CHUNK_SIZE', 500)
+        self.max_chunks = getattr(settings, 'BOOKMARK_SYNC_MAX_CHUNKS', 20)
+
     def is_cabinet_bookmarkable(self, cabinet_info):
         """캐비닛의 상태에 따라 북마크 가능 여부 확인"""
         # BROKEN 상태인 경우 북마크 불가
         if cabinet_info.status == CabinetStatusEnum.BROKEN.value:
             return False
         return True
-    
+
     def sync_to_database(self):
         """Redis의 북마크 변경사항을 데이터베이스에 동기화"""
-        # 동기화 작업 시작 로그
         logger.info("북마크 동기화 작업 시작")
         result = {
             "status": "success",
             "processed": 0,
             "skipped": 0,
-            "errors": 0
+            "errors": 0,
+            "chunks": 0,
         }
-        
+        start_time = time.monotonic()
+
         try:
-            # Redis 연결 확인 (문제 디버깅을 위해 추가)
+            # 대기 중인 변경이 없으면 락을 잡지 않고 종료
             try:
-                changed_keys_count = len(self.redis_repo.redis_conn.smembers("cabinet:bookmarks:changed"))
-                logger.info(f"Redis 연결 확인: 변경된 북마크 키 수: {changed_keys_count}")
+                backlog = self.redis_repo.count_changed_bookmarks()
             except Exception as e:
                 logger.error(f"Redis 연결 확인 중 오류: {str(e)}")
                 result["status"] = "failed"
                 result["error"] = f"Redis 연결 오류: {str(e)}"
                 return result
-            
+
+            if not backlog:
+                logger.info("동기화할 북마크 변경사항이 없습니다.")
+                result["backlog"] = 0
+                return result
+
             # 동기화 작업이 동시에 실행되지 않도록 락 획득
-            with RedisLock("bookmark_sync", expire_time=15) as lock:
+            with RedisLock("bookmark_sync", expire_time=self.LOCK_EXPIRE) as lock:
                 if not lock.acquired:
                     logger.warning("북마크 동기화 락 획득 실패, 다른 프로세스가 이미 동기화 중입니다.")
                     result["status"] = "skipped"
                     result["reason"] = "lock_not_acquired"
                     return result
-                
-                # 변경된 북마크 목록 조회
-                try:
-                    changed_bookmarks = self.redis_repo.get_changed_bookmarks()
-                    logger.info(f"변경된 북마크 조회: {len(changed_bookmarks)}개")
-                    
-                    # 디버깅: 첫 번째 북마크 데이터 로깅
-                    if changed_bookmarks and len(changed_bookmarks) > 0:
-                        logger.info(f"첫 번째 북마크 데이터 샘플: {json.dumps(changed_bookmarks[0], default=str)}")
-                    
-                except Exception as e:
-                    logger.error(f"변경된 북마크 조회 중 오류: {str(e)}")
-                    result["status"] = "failed"
-                    result["error"] = f"북마크 조회 오류: {str(e)}"
-                    return result
-                
-                if not changed_bookmarks:
-                    logger.info("동기화할 북마크 변경사항이 없습니다.")
-                    return result
-                
-                logger.info(f"{len(changed_bookmarks)}개의 북마크 변경사항을 동기화합니다.")
-                
-                processed_keys = []
-                skipped_keys = []
-                
-                for bookmark in changed_bookmarks:
-                    try:
-                        user_id = bookmark.get('user_id')
-                        cabinet_id = bookmark.get('cabinet_id')
-                        # 북마크 상태와 캐비닛 상태 구분
-                        bookmark_status = bookmark.get('bookmark_status', bookmark.get('status', 'unknown'))
-                        cabinet_status = bookmark.get('cabinet_status')
-                        
-                        logger.info(f"처리 중인 북마크: user_id={user_id}, cabinet_id={cabinet_id}, bookmark_status={bookmark_status}, cabinet_status={cabinet_status}")
-                        
-                        # cabinet_id가 딕셔너리인 경우 ID 추출
-                        if isinstance(cabinet_id, dict):
-                            cabinet_id = cabinet_id.get('id')
-                        
-                        # user_id로 사용자 정보 조회
-                        try:
-                            from user.models import users
-                            
-                            # 디버깅: user_id 타입 확인
-                            logger.info(f"user_id 타입: {type(user_id)}, 값: {user_id}")
-                            
-                            user_obj = users.objects.get(id=user_id)
-                            logger.info(f"사용자 조회 성공: id={user_id}")
-                            
-                            user_info = self.authn_service.get_authn_by_user_id(user_obj.id)
-                            
-                            if not user_info:
-                                logger.error(f"사용자 인증 정보를 찾을 수 없습니다: {user_id}")
-                                result["errors"] += 1
-                                continue
-                            
-                            cabinet_info = self.cabinet_repo.get_cabinet_by_id(cabinet_id)
-                            if not cabinet_info:
-                                logger.error(f"캐비닛 정보를 찾을 수 없습니다: {cabinet_id}")
-                                result["errors"] += 1
-                                continue
-                            
-                            # 북마크 상태에 따라 DB 업데이트
-                            if bookmark_status == 'active':
-                                # 캐비닛 상태 확인
-                                logger.info(f"캐비닛 상태: {cabinet_info.status}")
-                                
-                                if not self.is_cabinet_bookmarkable(cabinet_info):
-                                    logger.warning(f"캐비닛이 {cabinet_info.status} 상태이므로 북마크를 추가할 수 없습니다: {cabinet_id}")
-                                    skipped_keys.append(f"{user_id}:{cabinet_id}")
-                                    result["skipped"] += 1
-                                    continue
-                                
-                                # 북마크 추가 수행
-                                try:
-                                    db_result = self.db_repo.add_bookmark(user_info, cabinet_info)
-                                    logger.info(f"북마크 추가 동기화 완료: {user_id}:{cabinet_id}, 결과: {db_result}")
-                                    result["processed"] += 1
-                                except Exception as e:
-                                    logger.error(f"북마크 추가 실패: {user_id}:{cabinet_id} - {str(e)}")
-                                    logger.error(traceback.format_exc())  # 스택 트레이스 추가
-                                    result["errors"] += 1
-                                    continue
-                                    
-                            elif bookmark_status == 'deleted':
-                                # 북마크 삭제는 캐비닛 상태와 관계없이 진행
-                                try:
-                                    db_result = self.db_repo.remove_bookmark(user_info, cabinet_info)
-                                    logger.info(f"북마크 삭제 동기화 완료: {user_id}:{cabinet_id}, 결과: {db_result}")
-                                    result["processed"] += 1
-                                except Exception as e:
-                                    logger.error(f"북마크 삭제 실패: {user_id}:{cabinet_id} - {str(e)}")
-                                    logger.error(traceback.format_exc())  # 스택 트레이스 추가
-                                    result["errors"] += 1
-                                    continue
-                            
-                            # 처리 완료된 키 추가
-                            processed_keys.append(f"{user_id}:{cabinet_id}")
-                            
-                        except Exception as e:
-                            logger.error(f"사용자/캐비닛 정보 조회 중 오류: {str(e)}")
-                            logger.error(traceback.format_exc())  # 스택 트레이스 추가
-                            result["errors"] += 1
-                            continue
-                    except Exception as e:
-                        logger.error(f"북마크 처리 중 예상치 못한 오류: {str(e)}")
-                        logger.error(traceback.format_exc())  # 스택 트레이스 추가
-                        result["errors"] += 1
-                        continue
-                
-                # 처리 완료된 북마크 변경 목록에서 제거
-                if processed_keys:
+
+                recovered = self.redis_repo.recover_processing_bookmarks()
+                if recovered:
+                    logger.warning(f"이전 동기화에서 반영되지 않은 북마크 {recovered}개를 다시 처리합니다.")
+
+                logger.info(f"{backlog}개의 북마크 변경사항을 동기화합니다. (청크 크기: {self.chunk_size})")
+
+                for _ in range(self.max_chunks):
+                    entries = self.redis_repo.pop_changed_bookmarks(self.chunk_size)
+                    if not entries:
+                        break
+
                     try:
-                        removed_count = self.redis_repo.clear_changed_bookmarks(processed_keys)
-                        logger.info(f"{len(processed_keys)}개의 북마크 동기화가 완료되었습니다. (Redis에서 {removed_count}개 제거됨)")
+                        chunk_result = self._sync_chunk(entries)
                     except Exception as e:
-                        logger.error(f"처리 완료된 북마크 목록 정리 중 오류: {str(e)}")
-                        logger.error(traceback.format_exc())  # 스택 트레이스 추가
-                        result["status"] = "partial_success"
-                
-                # 건너뛴 북마크 로그
-                if skipped_keys:
-                    logger.info(f"{len(skipped_keys)}개의 북마크가 캐비닛 상태로 인해 건너뛰었습니다.")
-        
+                        # 청크 트랜잭션이 롤백되었으므로 꺼낸 키를 되돌림
+                        logger.error(f"북마크 청크 동기화 실패 ({len(entries)}개): {str(e)}")
+                        logger.error(traceback.format_exc())
+                        self.redis_repo.requeue_changed_bookmarks([key for key, _ in entries])
+                        result["errors"] += len(entries)
+                        result["status"] = "partial_success" if result["processed"] else "failed"
+                        result["error"] = str(e)
+                        break
+
+                    # 청크 트랜잭션이 커밋된 뒤에 처리 중 목록에서 제거
+                    self.redis_repo.ack_changed_bookmarks([key for key, _ in entries])
+                    result["chunks"] += 1
+                    for field in ("processed", "skipped", "errors"):
+                        result[field] += chunk_result[field]
+
+                    # 다음 청크 처리 전 락 연장 (연장 실패 시 다른 프로세스에 넘김)
+                    if not lock.extend():
+                        logger.warning("북마크 동기화 락이 만료되어 동기화를 중단합니다.")
+                        break
+
         except Exception as e:
             logger.error(f"북마크 동기화 작업 중 예상치 못한 오류: {str(e)}")
-            logger.error(traceback.format_exc())  # 스택 트레이스 추가
+            logger.error(traceback.format_exc())
             result["status"] = "failed"
             result["error"] = str(e)
-        
+
+        self._add_metrics(result, start_time)
         logger.info(f"북마크 동기화 작업 종료: {result}")
-        return result
\ No newline at end of file
+        return result
+
+    def _sync_chunk(self, entries):
+        """변경 목록 청크 하나를 하나의 트랜잭션으로 DB에 반영"""
+        chunk_result = {"processed": 0, "skipped": 0, "errors": 0}
+
+        changes = []
+        for key, bookmark in entries:
+            if bookmark is None:
+                # TTL 만료 등으로 데이터가 없는 경우 반영할 상태를 알 수 없으므로 제외
+                logger.warning(f"변경 목록에는 있지만 데이터를 찾을 수 없음: {key}")
+                chunk_result["skipped"] += 1
+                continue
+
+            user_id, _, cabinet_id = key.partition(':')
+            # 북마크 상태와 캐비닛 상태 구분
+            bookmark_status = bookmark.get('bookmark_status', bookmark.get('status', 'unknown'))
+            changes.append((int(user_id), int(cabinet_id), bookmark_status))
+
+        if not changes:
+            return chunk_result
+
+        user_ids = {user_id for user_id, _, _ in changes}
+        cabinet_ids = {cabinet_id for _, cabinet_id, _ in changes}
+
+        existing_user_ids = set(self.user_repo.get_users_by_ids(user_ids).values_list('id', flat=True))
+        cabinet_map = {cabinet.id: cabinet for cabinet in self.cabinet_repo.get_cabinets_by_ids(cabinet_ids)}
+
+        now = timezone.now()
+        with transaction.atomic():
+            existing_bookmarks = defaultdict(list)
+            for bookmark in self.db_repo.get_bookmarks_by_user_and_cabinet_ids(user_ids, cabinet_ids).select_for_update():
+                existing_bookmarks[(bookmark.user_id_id, bookmark.cabinet_id_id)].append(bookmark)
+
+            to_create = []
+            to_update = []
+            for user_id, cabinet_id, bookmark_status in changes:
+                cabinet_info = cabinet_map.get(cabinet_id)
+                if user_id not in existing_user_ids or cabinet_info is None:
+                    logger.error(f"사용자 또는 캐비닛 정보를 찾을 수 없습니다: {user_id}:{cabinet_id}")
+                    chunk_result["errors"] += 1
+                    continue
+
+                rows = existing_bookmarks[(user_id, cabinet_id)]
+                active_rows = [row for row in rows if row.deleted_at is None]
+
+                if bookmark_status == 'active':
+                    if not self.is_cabinet_bookmarkable(cabinet_info):
+                        logger.warning(f"캐비닛이 {cabinet_info.status} 상태이므로 북마크를 추가할 수 없습니다: {cabinet_id}")
+                        chunk_result["skipped"] += 1
+                        continue
+
+                    if active_rows:
+                        # 이미 반영된 북마크
+                        pass
+                    elif rows:
+                        # 삭제된 북마크가 있는 경우 - 가장 최근 것을 복구
+                        rows[-1].deleted_at = None
+                        to_update.append(rows[-1])
+                    else:
+                        # 최초 생성
+                        to_create.append(cabinet_bookmarks(user_id_id=user_id, cabinet_id_id=cabinet_id))
+
+                elif bookmark_status == 'deleted':
+                    # 북마크 삭제는 캐비닛 상태와 관계없이 진행
+                    for row in active_rows:
+                        row.deleted_at = now
+                        to_update.append(row)
+
+                else:
+                    logger.warning(f"알 수 없는 북마크 상태: {user_id}:{cabinet_id} ({bookmark_status})")
+                    chunk_result["skipped"] += 1
+                    continue
+
+                chunk_result["processed"] += 1
+
+            if to_create:
+                self.db_repo.bulk_create_bookmarks(to_create)
+            if to_update:
+                self.db_repo.bulk_update_bookmarks(to_update)
+
+        logger.info(
+            f"북마크 청크 동기화 완료: {len(entries)}개 중 {chunk_result['processed']}개 반영 "
+            f"(생성 {len(to_create)}, 수정 {len(to_update)})"
+        )
+        return chunk_result
+
+    def _add_metrics(self, result, start_time):
+        """처리량 지표 추가 (소요 시간, 초당 처리 건수, 남은 변경 수)"""
+        elapsed = time.monotonic() - start_time
+        handled = result["processed"] + result["skipped"] + result["errors"]
+        result["elapsed_ms"] = round(elapsed * 1000, 1)
+        result["throughput_per_sec"] = round(handled / elapsed, 1) if elapsed > 0 else 0.0
+        if "backlog" not in result:
+            try:
+                result["backlog"] = self.redis_repo.count_changed_bookmarks()
+            except Exception as e:
+                logger.error(f"남은 북마크 변경 수 조회 중 오류: {str(e)}")
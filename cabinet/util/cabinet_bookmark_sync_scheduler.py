@@ -0,0 +1,130 @@
+import logging
+import time
+from django.conf import settings
+from django_redis import get_redis_connection
+
+logger = logging.getLogger(__name__)
+
+
+class BookmarkSyncScheduler:
+    """
+    북마크 동기화 적응형 스케줄러
+
+    Celery beat가 짧은 주기로 check()를 호출하면 변경 목록(cabinet:bookmarks:changed)의
+    크기와 대기 시간을 보고 필요할 때만 동기화 작업을 예약합니다.
+
+    - 변경 수가 BOOKMARK_SYNC_TRIGGER_SIZE 이상이거나 가장 오래된 변경이
+      BOOKMARK_SYNC_MAX_LAG초 이상 대기했을 때 동기화
+    - 예약 키(SET NX)로 예약/실행 중인 동기화가 있으면 새로 예약하지 않음
+    - Redis 확인이나 동기화가 느리거나 실패하면 지수적으로 예약을 미룸
+    """
+    CHANGED_KEY = "cabinet:bookmarks:changed"
+    # 비정상 종료된 동기화가 남긴 처리 중 키도 대기 중인 변경으로 셈
+    PROCESSING_KEY = "cabinet:bookmarks:processing"
+    # 변경 목록이 처음 비어 있지 않은 것으로 관찰된 시각 (대기 시간 계산용)
+    SINCE_KEY = "cabinet:bookmarks:sync:since"
+    SCHEDULED_KEY = "cabinet:bookmarks:sync:scheduled"
+    BACKOFF_KEY = "cabinet:bookmarks:sync:backoff"
+    FAILURES_KEY = "cabinet:bookmarks:sync:failures"
+
+    # 예약 후 작업이 유실되어도 이 시간이 지나면 다시 예약 가능 (초)
+    SCHEDULED_TTL = 60
+
+    def __init__(self):
+        self.redis_conn = get_redis_connection("default")
+        self.check_interval = getattr(settings, 'BOOKMARK_SYNC_CHECK_INTERVAL', 2)
+        self.trigger_size = getattr(settings, 'BOOKMARK_SYNC_TRIGGER_SIZE', 100)
+        self.max_lag = getattr(settings, 'BOOKMARK_SYNC_MAX_LAG', 30)
+        self.slow_ms = getattr(settings, 'BOOKMARK_SYNC_SLOW_MS', 5000)
+        self.max_backoff = getattr(settings, 'BOOKMARK_SYNC_MAX_BACKOFF', 60)
+
+    def check(self):
+        """변경 목록 상태를 확인하고 필요하면 동기화 작업 예약"""
+        start_time = time.monotonic()
+        now = int(time.time())
+        try:
+            pipeline = self.redis_conn.pipeline(transaction=False)
+            pipeline.scard(self.CHANGED_KEY)
+            pipeline.scard(self.PROCESSING_KEY)
+            pipeline.set(self.SINCE_KEY, now, nx=True)
+            pipeline.get(self.SINCE_KEY)
+            pipeline.exists(self.BACKOFF_KEY, self.SCHEDULED_KEY)
+            changed, processing, _, since, blocked = pipeline.execute()
+            backlog = changed + processing
+        except Exception as e:
+            logger.error(f"북마크 동기화 예약 확인 중 오류: {str(e)}")
+            return {"scheduled": False, "reason": "redis_error"}
+
+        probe_ms = (time.monotonic() - start_time) * 1000
+        if probe_ms > self.slow_ms:
+            # Redis 응답이 느리면 동기화로 부하를 더하지 않음
+            self._back_off(f"Redis 응답 지연 ({probe_ms:.0f}ms)")
+            return {"scheduled": False, "reason": "redis_slow", "backlog": backlog}
+
+        if not backlog:
+            self.redis_conn.delete(self.SINCE_KEY)
+            return {"scheduled": False, "reason": "empty", "backlog": 0}
+
+        lag = now - int(since) if since else 0
+        if backlog < self.trigger_size and lag < self.max_lag:
+            return {"scheduled": False, "reason": "below_threshold", "backlog": backlog, "lag": lag}
+
+        if blocked:
+            return {"scheduled": False, "reason": "backoff_or_scheduled", "backlog": backlog, "lag": lag}
+
+        return self.schedule(backlog=backlog, lag=lag)
+
+    def schedule(self, **info):
+        """예약된 동기화가 없을 때만 동기화 작업 예약 (중복 실행 합치기)"""
+        if not self.redis_conn.set(self.SCHEDULED_KEY, int(time.time()), ex=self.SCHEDULED_TTL, nx=True):
+            return {"scheduled": False, "reason": "already_scheduled", **info}
+
+        try:
+            # 순환 참조 방지를 위한 지연 임포트
+            from cabinet.util.cabinet_celery_task import sync_bookmarks_to_database
+            sync_bookmarks_to_database.apply_async()
+        except Exception as e:
+            self.redis_conn.delete(self.SCHEDULED_KEY)
+            logger.error(f"북마크 동기화 작업 예약 실패: {str(e)}")
+            return {"scheduled": False, "reason": "enqueue_failed", **info}
+
+        logger.info(f"북마크 동기화 작업 예약: {info}")
+        return {"scheduled": True, **info}
+
+    def on_sync_finished(self, result):
+        """동기화 결과에 따라 예약 해제, 지연 조정, 남은 변경 재예약"""
+        try:
+            self.redis_conn.delete(self.SCHEDULED_KEY)
+
+            status = result.get("status")
+            if status == "skipped":
+                return
+
+            if status == "failed" or result.get("error") or result.get("elapsed_ms", 0) > self.slow_ms:
+                self._back_off(f"동기화 실패 또는 지연 ({status}, {result.get('elapsed_ms')}ms)")
+                return
+
+            self.redis_conn.delete(self.FAILURES_KEY, self.BACKOFF_KEY)
+
+            backlog = result.get("backlog") or 0
+            if not backlog:
+                self.redis_conn.delete(self.SINCE_KEY)
+            elif backlog >= self.trigger_size:
+                # 처리 한도에 걸려 남은 변경이 많으면 다음 확인 주기를 기다리지 않고 이어서 처리
+                self.schedule(backlog=backlog, lag=0)
+            else:
+                # 남은 변경의 대기 시간은 지금부터 다시 계산
+                self.redis_conn.set(self.SINCE_KEY, int(time.time()))
+        except Exception as e:
+            logger.error(f"북마크 동기화 후처리 중 오류: {str(e)}")
+
+    def _back_off(self, reason):
+        """연속 실패 횟수에 따라 예약을 지수적으로 미룸"""
+        try:
+            failures = self.redis_conn.incr(self.FAILURES_KEY)
+            self.redis_conn.expire(self.FAILURES_KEY, self.max_backoff * 10)
+            delay = min(self.max_backoff, self.check_interval * (2 ** min(failures, 10)))
+            self.redis_conn.set(self.BACKOFF_KEY, failures, ex=delay)
+            logger.warning(f"북마크 동기화 {delay}초 지연: {reason} (연속 {failures}회)")
+        except Exception as e:
+            logger.error(f"북마크 동기화 지연 설정 중 오류: {str(e)}")
@@ -4,6 +4,8 @@ import logging
 from core.config.redis_lock import RedisLock
 from cabinet.util.cabinet_async_result_manager import AsyncResultManager
 from cabinet.util.cabinet_bookmark_sync_manager import BookmarkSyncManager
+from cabinet.util.cabinet_bookmark_sync_scheduler import BookmarkSyncScheduler
+from cabinet.util.cabinet_rental_dispatcher import CabinetRentalDispatcher
 
 logger = logging.getLogger(__name__)
 
@@ -18,7 +20,7 @@ def process_cabinet_rental(cabinet_id, student_number, task_id=None):
         task_id: 작업 추적을 위한 ID (없으면 Celery 작업 ID 사용)
     
     Returns:
-        처리 결과 딕셔너리
+        처리 결과 딕셔너리 (다른 워커가 처리 중이면 None)
     """
     
     logger.info(f"사물함 {cabinet_id} 대여 요청 처리 중 (학번: {student_number})")
@@ -26,62 +28,8 @@ def process_cabinet_rental(cabinet_id, student_number, task_id=None):
     # 작업 ID 설정
     task_id = task_id or process_cabinet_rental.request.id
     
-    redis_conn = get_redis_connection("default")
-    processing_key = f"cabinet:processing:{cabinet_id}"
-    
-    try:
-        lock_name = f"cabinet:{cabinet_id}:rent"
-        
-        with RedisLock(lock_name, expire_time=30) as lock:
-            if lock.acquired:
-                try:
-                    # 사물함 대여 처리
-                    from cabinet.business.cabinet_service import CabinetService
-                    cabinet_service = CabinetService()
-                    cabinet_service.rent_cabinet(cabinet_id, student_number)
-                    
-                    result = {
-                        "status": "success", 
-                        "cabinet_id": cabinet_id,
-                        "student_number": student_number,
-                        "message": f"사물함 {cabinet_id} 대여 성공"
-                    }
-                    
-                    logger.info(f"사물함 {cabinet_id} 대여 성공 (학번: {student_number})")
-                    
-                    # 결과 저장
-                    AsyncResultManager.set_result(task_id, result)
-                    return result
-                except Exception as e:
-                    error_msg = str(e)
-                    logger.error(f"사물함 {cabinet_id} 대여 실패: {error_msg}")
-                    
-                    result = {
-                        "status": "error", 
-                        "cabinet_id": cabinet_id,
-                        "student_number": student_number,
-                        "message": error_msg
-                    }
-                    
-                    # 결과 저장
-                    AsyncResultManager.set_result(task_id, result)
-                    return result
-            else:
-                result = {
-                    "status": "error", 
-                    "cabinet_id": cabinet_id,
-                    "student_number": student_number,
-                    "message": "사물함 대여 처리를 위한 락 획득 실패"
-                }
-                
-                logger.warning(f"사물함 {cabinet_id} 락 획득 실패")
-                
-                # 결과 저장
-                AsyncResultManager.set_result(task_id, result)
-                return result
-    finally:
-        # 처리 키 삭제
-        redis_conn.delete(processing_key)
+    # 재전달/재시도된 작업도 한 번만 처리되도록 공통 실행 경로 사용
+    return CabinetRentalDispatcher.execute(cabinet_id, student_number, task_id)
 
 @shared_task
 def process_cabinet_return(cabinet_id, student_number, task_id=None):
@@ -162,6 +110,7 @@ def process_cabinet_return(cabinet_id, student_number, task_id=None):
 @shared_task(bind=True, max_retries=3)
 def sync_bookmarks_to_database(self):
     """북마크 Redis -> DB 동기화 태스크"""
+    result = {"status": "failed"}
     try:
         logger.info("북마크 동기화 작업 시작")
         sync_manager = BookmarkSyncManager()
@@ -170,4 +119,13 @@ def sync_bookmarks_to_database(self):
         return result
     except Exception as e:
         logger.error(f"북마크 동기화 중 오류 발생: {str(e)}")
-        return {"status": "failed", "error": str(e)}
\ No newline at end of file
+        result = {"status": "failed", "error": str(e)}
+        return result
+    finally:
+        # 예약 해제 및 결과에 따른 지연/재예약
+        BookmarkSyncScheduler().on_sync_finished(result)
+
+@shared_task
+def schedule_bookmark_sync():
+    """변경 목록 크기와 대기 시간을 보고 필요할 때만 북마크 동기화 예약"""
+    return BookmarkSyncScheduler().check()
@@ -1,5 +1,6 @@
 import json
 import threading
+import time
 import logging
 from django.conf import settings
 from kafka import KafkaConsumer
@@ -38,11 +39,12 @@ class CabinetRentConsumer(threading.Thread):
             cabinet_id = data.get('cabinet_id')
             student_number = data.get('student_number')
             action = data.get('action', 'rent')
+            task_id = data.get('task_id')
 
             logger.info(f"메시지 수신: {action} (사물함 ID: {cabinet_id}, 학번: {student_number})")
 
             if action == 'rent':
-                self._process_rental(cabinet_id, student_number)
+                self._process_rental(cabinet_id, student_number, task_id)
             elif action == 'return':
                 self._process_return(cabinet_id, student_number)
             else:
@@ -50,19 +52,15 @@ class CabinetRentConsumer(threading.Thread):
         except Exception as e:
             logger.error(f"메시지 처리 중 오류: {str(e)}")
 
-    def _process_rental(self, cabinet_id, student_number):
-        """대여 요청 처리"""
-        lock_name = f"cabinet:{cabinet_id}:rent"
-        with RedisLock(lock_name, expire_time=30) as lock:
-            if lock.acquired:
-                try:
-                    # 순환 참조 방지를 위한 지연 임포트
-                    from cabinet.business.cabinet_service import CabinetService
-                    cabinet_service = CabinetService()
-                    cabinet_service.rent_cabinet(cabinet_id, student_number)
-                    logger.info(f"사물함 {cabinet_id} 대여 성공 (학번: {student_number})")
-                except Exception as e:
-                    logger.error(f"사물함 {cabinet_id} 대여 실패: {str(e)}")
+    def _process_rental(self, cabinet_id, student_number, task_id=None):
+        """대여 요청 처리 (재전달된 메시지는 작업 ID 기준으로 한 번만 처리)"""
+        if not task_id:
+            task_id = f"rental-{int(time.time())}-{cabinet_id}-{student_number}"
+            logger.warning(f"작업 ID 없는 대여 메시지 수신, 새 작업 ID 생성: {task_id}")
+
+        # 순환 참조 방지를 위한 지연 임포트
+        from cabinet.util.cabinet_rental_dispatcher import CabinetRentalDispatcher
+        CabinetRentalDispatcher.execute(cabinet_id, student_number, task_id)
     
     def _process_return(self, cabinet_id, student_number):
         """반납 요청 처리"""
@@ -25,7 +25,7 @@ class CabinetRentProducer:
             logger.error(f"Failed to initialize Kafka producer: {str(e)}")
             self.available = False
 
-    def send_rental_request(self, cabinet_id, student_number):
+    def send_rental_request(self, cabinet_id, student_number, task_id=None):
         """Send a cabinet rental request to Kafka"""
         if not self.available:
             logger.warning(f"Kafka producer not available, skipping message for cabinet {cabinet_id}")
@@ -38,6 +38,7 @@ class CabinetRentProducer:
                 {
                     'cabinet_id': cabinet_id,
                     'student_number': student_number,
+                    'task_id': task_id,
                     'timestamp': str(time.time()),
                     'action': 'rent'
                 }
@@ -0,0 +1,65 @@
+import datetime
+import logging
+from django.db.models import BooleanField, Case, Value, When
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class CabinetRentAvailability:
+    """
+    사물함 대여 가능 여부 판정
+
+    상태가 AVAILABLE이고 무료(FREE)인 사물함은 마지막 변경일 다음 날 13시부터 대여할 수 있습니다.
+    이는 "마지막 변경 시각 < 기준 시각"과 같으며, 기준 시각은 현재 13시 이후면 오늘 0시,
+    그 전이면 어제 0시입니다. 기준 시각은 인스턴스 생성 시 한 번만 계산합니다.
+    """
+
+    def __init__(self, now=None):
+        self.now = now or timezone.now()
+        self.cutoff = self.get_cutoff(self.now)
+
+    @staticmethod
+    def get_cutoff(now):
+        """대여 가능 판정 기준 시각 (이 시각 이전에 변경된 사물함만 대여 가능)"""
+        midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        if now.hour >= 13:
+            return midnight
+        return midnight - datetime.timedelta(days=1)
+
+    def is_available(self, cabinet):
+        """사물함 객체의 대여 가능 여부"""
+        if cabinet.status != 'AVAILABLE' or cabinet.payable != 'FREE':
+            return False
+
+        try:
+            return cabinet.updated_at < self.cutoff
+        except TypeError as e:
+            # 시간대 정보가 섞인 경우 등 비교 불가 시 대여 불가능 처리
+            logger.error(f"사물함 {cabinet.id} 대여 가능 여부 판정 실패: {str(e)}")
+            return False
+
+    def annotate(self, queryset):
+        """대여 가능 여부를 is_rent_available 컬럼으로 SQL에서 계산"""
+        return queryset.annotate(
+            is_rent_available=Case(
+                When(status='AVAILABLE', payable='FREE', updated_at__lt=self.cutoff, then=Value(True)),
+                default=Value(False),
+                output_field=BooleanField(),
+            )
+        )
+
+
+class CabinetRentAvailabilityMixin:
+    """isRentAvailable 필드를 제공하는 시리얼라이저 믹스인"""
+
+    def get_isRentAvailable(self, obj):
+        # SQL에서 계산된 값이 있으면 그대로 사용
+        annotated = getattr(obj, 'is_rent_available', None)
+        if annotated is not None:
+            return annotated
+
+        # 요청(시리얼라이저 context)당 기준 시각 한 번만 계산
+        if 'rent_availability' not in self.context:
+            self.context['rent_availability'] = CabinetRentAvailability()
+        return self.context['rent_availability'].is_available(obj)
@@ -0,0 +1,170 @@
+import threading
+import queue
+import logging
+import time
+from django.conf import settings
+from django_redis import get_redis_connection
+
+from cabinet.util.cabinet_async_result_manager import AsyncResultManager
+from cabinet.util.cabinet_rental_state import CabinetRentalState
+
+logger = logging.getLogger(__name__)
+
+
+class CabinetRentalBatcher:
+    """
+    사물함 대여 배치 처리기
+
+    큐에 쌓인 대여 요청을 몇 ms 간격으로 모아 한 번에 검증하고,
+    이력 생성과 상태 변경을 하나의 트랜잭션(bulk_create / bulk_update)으로 반영한 뒤
+    작업별 결과를 저장합니다.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(CabinetRentalBatcher, cls).__new__(cls)
+            cls._instance.init()
+        return cls._instance
+
+    def init(self):
+        self.task_queue = queue.Queue()
+        self.interval = getattr(settings, 'CABINET_RENTAL_BATCH_INTERVAL_MS', 5) / 1000
+        self.batch_size = getattr(settings, 'CABINET_RENTAL_BATCH_SIZE', 200)
+        self.running = False
+        self.worker = None
+        self.lock = threading.Lock()
+
+    def start(self):
+        """배치 워커 스레드 시작"""
+        with self.lock:
+            if self.running and self.worker and self.worker.is_alive():
+                return
+
+            self.running = True
+            self.worker = threading.Thread(target=self._run, name="cabinet-rental-batcher", daemon=True)
+            self.worker.start()
+            logger.info(f"대여 배치 워커 시작됨 (주기: {self.interval * 1000:.0f}ms, 최대 {self.batch_size}건)")
+
+    def stop(self):
+        """배치 워커 스레드 중지 (남은 요청은 처리 후 종료)"""
+        if not self.running:
+            return
+
+        self.running = False
+        if self.worker and self.worker.is_alive():
+            self.worker.join(timeout=5)
+        self.worker = None
+        logger.info("대여 배치 워커 중지됨")
+
+    def add_rental_task(self, cabinet_id, student_number, task_id):
+        """대여 요청을 배치 큐에 추가"""
+        self.task_queue.put((cabinet_id, student_number, task_id))
+        logger.debug(f"사물함 {cabinet_id} 대여 작업이 배치 큐에 추가됨 (작업 ID: {task_id})")
+        return task_id
+
+    def _run(self):
+        while self.running or not self.task_queue.empty():
+            batch = self._drain()
+            if not batch:
+                continue
+            try:
+                self._process_batch(batch)
+            except Exception as e:
+                logger.error(f"대여 배치 처리 실패 ({len(batch)}건): {str(e)}")
+
+    def _drain(self):
+        """첫 요청 도착 후 interval 동안 또는 batch_size만큼 요청 수집"""
+        try:
+            batch = [self.task_queue.get(timeout=1)]
+        except queue.Empty:
+            return []
+
+        deadline = time.monotonic() + self.interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.task_queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _claim(self, batch):
+        """이미 처리되었거나 다른 워커가 선점한 작업 제외 (Redis 왕복 1회)"""
+        from cabinet.util.cabinet_rental_dispatcher import CabinetRentalDispatcher
+
+        redis_conn = get_redis_connection("default")
+        pipe = redis_conn.pipeline(transaction=False)
+        for _, student_number, task_id in batch:
+            pipe.set(
+                f"cabinet:task:claim:{task_id}", student_number,
+                ex=CabinetRentalDispatcher.CLAIM_TTL, nx=True
+            )
+        claimed = pipe.execute()
+        return [task for task, acquired in zip(batch, claimed) if acquired]
+
+    def _release_claims(self, tasks):
+        """작업 실행 선점 해제 (결과 저장 후 재전달은 저장된 결과로 처리됨)"""
+        redis_conn = get_redis_connection("default")
+        redis_conn.delete(*[f"cabinet:task:claim:{task_id}" for _, _, task_id in tasks])
+
+    def _process_batch(self, batch):
+        from cabinet.business.cabinet_service import CabinetService
+
+        try:
+            tasks = self._claim(batch)
+        except Exception as e:
+            # 선점 실패(Redis 장애 등) 시에도 결과 조회가 끝나도록 배치 전체를 실패로 보고
+            logger.error(f"대여 작업 선점 실패 ({len(batch)}건): {str(e)}")
+            self._report(batch, [e] * len(batch))
+            return
+        if not tasks:
+            return
+
+        start_time = time.monotonic()
+        try:
+            try:
+                outcomes = CabinetService().rent_cabinets_in_batch(
+                    [(cabinet_id, student_number) for cabinet_id, student_number, _ in tasks]
+                )
+            except Exception as e:
+                # 트랜잭션 전체 실패 시 모든 작업을 실패로 보고
+                logger.error(f"대여 배치 트랜잭션 실패: {str(e)}")
+                outcomes = [e] * len(tasks)
+
+            succeeded = self._report(tasks, outcomes)
+        finally:
+            self._release_claims(tasks)
+
+        logger.info(
+            f"대여 배치 처리 완료: {succeeded}/{len(tasks)}건 성공 "
+            f"({(time.monotonic() - start_time) * 1000:.1f}ms)"
+        )
+
+    def _report(self, tasks, outcomes):
+        """
+        작업별 결과 저장/알림과 Redis 상태 전이를 각각 한 번의 왕복으로 처리하고 성공 건수 반환
+
+        결과 저장에 실패해도 대여 선점(renting:)이 RENTING_TTL 동안 남지 않도록 상태 전이는 항상 수행합니다.
+        """
+        results = {}
+        state_outcomes = []
+        for (cabinet_id, student_number, task_id), error in zip(tasks, outcomes):
+            if error is None:
+                results[task_id] = {
+                    "status": "success",
+                    "cabinet_id": cabinet_id,
+                    "student_number": student_number,
+                    "message": f"사물함 {cabinet_id} 대여 성공"
+                }
+            else:
+                results[task_id] = AsyncResultManager.build_error_result(error, cabinet_id, student_number)
+            state_outcomes.append((cabinet_id, student_number, error is None))
+
+        try:
+            AsyncResultManager.set_results(results)
+        finally:
+            CabinetRentalState().complete_rents(state_outcomes)
+        return sum(1 for _, _, success in state_outcomes if success)
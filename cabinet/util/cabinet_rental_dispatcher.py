@@ -0,0 +1,159 @@
+import logging
+import threading
+from django.conf import settings
+from django_redis import get_redis_connection
+
+from cabinet.exceptions import CabinetRentFailedException
+from cabinet.util.cabinet_async_result_manager import AsyncResultManager
+from cabinet.util.cabinet_rental_state import CabinetRentalState
+
+logger = logging.getLogger(__name__)
+
+
+class CabinetRentalDispatcher:
+    """
+    사물함 대여 작업 디스패처
+
+    배포 환경마다 하나의 백엔드(스레드 풀, Celery, Kafka, 배치)만 사용하여
+    대여 요청 1건이 정확히 1번만 처리되도록 보장합니다.
+    """
+    BACKEND_THREAD_POOL = 'thread_pool'
+    BACKEND_CELERY = 'celery'
+    BACKEND_KAFKA = 'kafka'
+    BACKEND_BATCH = 'batch'
+    BACKENDS = (BACKEND_THREAD_POOL, BACKEND_CELERY, BACKEND_KAFKA, BACKEND_BATCH)
+
+    # 동일 작업 ID 재전달 방지 키 유지 시간 (초)
+    DISPATCH_TTL = 60
+    # 작업 실행 선점 키 유지 시간 (초, 실행이 끝나면 즉시 해제되며 워커가 비정상 종료된 경우에만 만료로 해제)
+    CLAIM_TTL = 60
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(CabinetRentalDispatcher, cls).__new__(cls)
+            cls._instance.init()
+        return cls._instance
+
+    def init(self):
+        backend = getattr(settings, 'CABINET_RENTAL_BACKEND', self.BACKEND_THREAD_POOL)
+        if backend not in self.BACKENDS:
+            logger.warning(f"알 수 없는 대여 백엔드 설정: {backend}, 스레드 풀을 사용합니다")
+            backend = self.BACKEND_THREAD_POOL
+
+        self.backend = backend
+        self.kafka_producer = None
+        self.lock = threading.Lock()
+
+    def dispatch(self, cabinet_id, student_number, task_id):
+        """대여 작업을 설정된 백엔드로 한 번만 전달 (작업 ID 기준 중복 제거)"""
+        redis_conn = get_redis_connection("default")
+        dispatch_key = f"cabinet:dispatch:{task_id}"
+
+        if not redis_conn.set(dispatch_key, self.backend, ex=self.DISPATCH_TTL, nx=True):
+            logger.info(f"이미 전달된 대여 작업입니다 (작업 ID: {task_id})")
+            return False
+
+        try:
+            if self.backend == self.BACKEND_CELERY:
+                self._dispatch_celery(cabinet_id, student_number, task_id)
+            elif self.backend == self.BACKEND_KAFKA:
+                self._dispatch_kafka(cabinet_id, student_number, task_id)
+            elif self.backend == self.BACKEND_BATCH:
+                self._dispatch_batch(cabinet_id, student_number, task_id)
+            else:
+                self._dispatch_thread_pool(cabinet_id, student_number, task_id)
+        except Exception:
+            # 전달 실패 시 재요청이 가능하도록 중복 제거 키 삭제
+            redis_conn.delete(dispatch_key)
+            raise
+
+        logger.info(f"사물함 {cabinet_id} 대여 작업 전달 완료 (백엔드: {self.backend}, 작업 ID: {task_id})")
+        return True
+
+    @staticmethod
+    def is_dispatched(task_id):
+        """작업 ID가 최근 DISPATCH_TTL초 이내에 전달되었는지 확인"""
+        return bool(get_redis_connection("default").exists(f"cabinet:dispatch:{task_id}"))
+
+    def _dispatch_thread_pool(self, cabinet_id, student_number, task_id):
+        from cabinet.util.worker_pool import CabinetThreadPool
+
+        thread_pool = CabinetThreadPool()
+        thread_pool.start()
+        if not thread_pool.add_rental_task(cabinet_id, student_number, task_id):
+            raise CabinetRentFailedException(cabinet_id=cabinet_id)
+
+    def _dispatch_celery(self, cabinet_id, student_number, task_id):
+        from cabinet.util.cabinet_celery_task import process_cabinet_rental
+
+        # Celery 작업 ID를 대여 작업 ID와 동일하게 지정
+        process_cabinet_rental.apply_async(args=(cabinet_id, student_number, task_id), task_id=task_id)
+
+    def _dispatch_kafka(self, cabinet_id, student_number, task_id):
+        producer = self._get_kafka_producer()
+        if not producer.send_rental_request(cabinet_id, student_number, task_id=task_id):
+            raise CabinetRentFailedException(cabinet_id=cabinet_id)
+
+    def _dispatch_batch(self, cabinet_id, student_number, task_id):
+        from cabinet.util.cabinet_rental_batcher import CabinetRentalBatcher
+
+        batcher = CabinetRentalBatcher()
+        batcher.start()
+        batcher.add_rental_task(cabinet_id, student_number, task_id)
+
+    def _get_kafka_producer(self):
+        """Kafka 프로듀서를 한 번만 생성하여 재사용"""
+        with self.lock:
+            if self.kafka_producer is None or not self.kafka_producer.available:
+                from cabinet.util.cabinet_kafka_rent_producer import CabinetRentProducer
+                self.kafka_producer = CabinetRentProducer()
+            return self.kafka_producer
+
+    @classmethod
+    def execute(cls, cabinet_id, student_number, task_id):
+        """
+        대여 작업 실행 (모든 백엔드 공통)
+
+        재전달되거나 재시도된 작업은 저장된 결과를 그대로 반환하여
+        같은 작업 ID에 대해 DB 반영이 한 번만 일어나도록 합니다.
+        """
+        existing_result = AsyncResultManager.peek_result(task_id)
+        if existing_result:
+            logger.info(f"이미 처리된 대여 작업입니다 (작업 ID: {task_id})")
+            return existing_result
+
+        redis_conn = get_redis_connection("default")
+        claim_key = f"cabinet:task:claim:{task_id}"
+        if not redis_conn.set(claim_key, student_number, ex=cls.CLAIM_TTL, nx=True):
+            logger.info(f"다른 워커가 처리 중인 대여 작업입니다 (작업 ID: {task_id})")
+            return None
+
+        success = False
+        try:
+            # 순환 참조 방지를 위한 지연 임포트
+            from cabinet.business.cabinet_service import CabinetService
+            CabinetService().rent_cabinet(cabinet_id, student_number)
+            success = True
+
+            result = {
+                "status": "success",
+                "cabinet_id": cabinet_id,
+                "student_number": student_number,
+                "message": f"사물함 {cabinet_id} 대여 성공"
+            }
+            AsyncResultManager.set_result(task_id, result)
+            logger.info(f"사물함 {cabinet_id} 대여 성공 (학번: {student_number})")
+            return result
+        except Exception as e:
+            logger.error(f"사물함 {cabinet_id} 대여 실패: {str(e)}")
+            return AsyncResultManager.set_error_result(task_id, e, cabinet_id, student_number)
+        finally:
+            try:
+                # 대여 결과에 따라 Redis 상태를 한 번에 전이 (처리 중 키 해제 포함)
+                CabinetRentalState().complete_rent(cabinet_id, student_number, success)
+            finally:
+                # 선점 해제: 결과가 저장된 뒤의 재전달은 peek_result로 처리되고,
+                # 결과 저장에 실패한 경우에는 재전달된 작업이 다시 처리하여 결과를 남길 수 있음
+                redis_conn.delete(claim_key)
@@ -0,0 +1,185 @@
+import logging
+from django_redis import get_redis_connection
+
+logger = logging.getLogger(__name__)
+
+
+# KEYS: processing, status, user_rental / ARGV: 학번, 사물함 ID, 처리 중 TTL, 상태 TTL
+CLAIM_RENT_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return 1
+end
+local status = redis.call('GET', KEYS[2])
+if status and string.sub(status, 1, 8) == 'renting:' then
+    return 1
+end
+if redis.call('EXISTS', KEYS[3]) == 1 then
+    return 2
+end
+if status and string.sub(status, 1, 7) == 'rented:' then
+    return 3
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[3])
+redis.call('SET', KEYS[2], 'renting:' .. ARGV[1], 'EX', ARGV[4])
+redis.call('SET', KEYS[3], 'renting:' .. ARGV[2], 'EX', ARGV[4])
+return 0
+"""
+
+# KEYS: processing, status, user_rental / ARGV: 학번, 사물함 ID, 성공 여부(1/0), 대여 상태 TTL
+COMPLETE_RENT_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    redis.call('DEL', KEYS[1])
+end
+if ARGV[3] == '1' then
+    redis.call('SET', KEYS[2], 'rented:' .. ARGV[1], 'EX', ARGV[4])
+    redis.call('SET', KEYS[3], 'rented:' .. ARGV[2], 'EX', ARGV[4])
+    return 0
+end
+if redis.call('GET', KEYS[2]) == 'renting:' .. ARGV[1] then
+    redis.call('DEL', KEYS[2])
+end
+if redis.call('GET', KEYS[3]) == 'renting:' .. ARGV[2] then
+    redis.call('DEL', KEYS[3])
+end
+return 0
+"""
+
+# KEYS: processing, status / ARGV: 학번, 처리 중 TTL
+CLAIM_RETURN_SCRIPT = """
+local status = redis.call('GET', KEYS[2]) or ''
+if string.sub(status, 1, 8) == 'renting:' or redis.call('EXISTS', KEYS[1]) == 1 then
+    return {1, status}
+end
+redis.call('SET', KEYS[1], 'return:' .. ARGV[1], 'EX', ARGV[2])
+return {0, status}
+"""
+
+# KEYS: processing, status, user_rental / ARGV: 학번, 성공 여부(1/0)
+COMPLETE_RETURN_SCRIPT = """
+if redis.call('GET', KEYS[1]) == 'return:' .. ARGV[1] then
+    redis.call('DEL', KEYS[1])
+end
+if ARGV[2] == '1' then
+    redis.call('DEL', KEYS[2], KEYS[3])
+end
+return 0
+"""
+
+
+class CabinetRentalState:
+    """
+    사물함 대여/반납 Redis 상태 머신
+
+    처리 중 키, 사물함 상태 키, 사용자 대여 키를 Lua 스크립트로 한 번에 전이시켜
+    대여/반납 경로가 Redis 왕복 1회로 상태를 선점하고, 상태가 일부만 기록되는
+    일이 없도록 합니다.
+
+    - cabinet:processing:{cabinet_id}  : 대여 시 학번, 반납 시 return:{학번}
+    - cabinet:status:{cabinet_id}      : renting:{학번} / rented:{학번}
+    - cabinet:user_rental:{학번}       : renting:{cabinet_id} / rented:{cabinet_id}
+    """
+    CLAIMED = 0
+    BUSY = 1
+    USER_HAS_RENTAL = 2
+    CABINET_RENTED = 3
+
+    PROCESSING_TTL = 15
+    RENTING_TTL = 60
+    RENTED_TTL = 3600
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(CabinetRentalState, cls).__new__(cls)
+            cls._instance.init()
+        return cls._instance
+
+    def init(self):
+        self.redis_conn = get_redis_connection("default")
+        # EVALSHA로 실행되며 스크립트 캐시가 비어 있으면 자동으로 EVAL 재시도
+        self.claim_rent_script = self.redis_conn.register_script(CLAIM_RENT_SCRIPT)
+        self.complete_rent_script = self.redis_conn.register_script(COMPLETE_RENT_SCRIPT)
+        self.claim_return_script = self.redis_conn.register_script(CLAIM_RETURN_SCRIPT)
+        self.complete_return_script = self.redis_conn.register_script(COMPLETE_RETURN_SCRIPT)
+
+    @staticmethod
+    def _keys(cabinet_id, student_number):
+        return [
+            f"cabinet:processing:{cabinet_id}",
+            f"cabinet:status:{cabinet_id}",
+            f"cabinet:user_rental:{student_number}",
+        ]
+
+    def claim_rent(self, cabinet_id, student_number):
+        """대여 선점 (CLAIMED / BUSY / USER_HAS_RENTAL / CABINET_RENTED 반환)"""
+        return int(self.claim_rent_script(
+            keys=self._keys(cabinet_id, student_number),
+            args=[student_number, cabinet_id, self.PROCESSING_TTL, self.RENTING_TTL],
+        ))
+
+    def complete_rent(self, cabinet_id, student_number, success):
+        """대여 처리 종료 (성공 시 대여 상태 기록, 실패 시 선점 해제)"""
+        self.complete_rent_script(
+            keys=self._keys(cabinet_id, student_number),
+            args=[student_number, cabinet_id, 1 if success else 0, self.RENTED_TTL],
+        )
+
+    def complete_rents(self, outcomes):
+        """여러 대여 처리 종료를 한 번의 왕복으로 반영 ((사물함 ID, 학번, 성공 여부) 목록)"""
+        if not outcomes:
+            return
+        pipe = self.redis_conn.pipeline(transaction=False)
+        for cabinet_id, student_number, success in outcomes:
+            self.complete_rent_script(
+                keys=self._keys(cabinet_id, student_number),
+                args=[student_number, cabinet_id, 1 if success else 0, self.RENTED_TTL],
+                client=pipe,
+            )
+        pipe.execute()
+
+    def claim_return(self, cabinet_id, student_number):
+        """반납 선점 ((CLAIMED 또는 BUSY, 현재 사물함 상태 문자열) 반환)"""
+        code, status = self.claim_return_script(
+            keys=self._keys(cabinet_id, student_number)[:2],
+            args=[student_number, self.PROCESSING_TTL],
+        )
+        if isinstance(status, bytes):
+            status = status.decode('utf-8')
+        return int(code), status
+
+    def complete_return(self, cabinet_id, student_number, success):
+        """반납 처리 종료 (성공 시 대여 상태 삭제, 항상 선점 해제)"""
+        self.complete_return_script(
+            keys=self._keys(cabinet_id, student_number),
+            args=[student_number, 1 if success else 0],
+        )
+
+    def release_cabinets(self, cabinet_ids):
+        """
+        관리자 반납/상태 변경된 사물함의 대여 상태 정리 (왕복 2회)
+
+        진행 중인 대여 선점(renting:)은 대여 작업이 끝날 때 정리하므로 건드리지 않으며,
+        DB 변경은 이미 커밋된 뒤이므로 Redis 오류는 기록만 합니다.
+        """
+        if not cabinet_ids:
+            return
+        try:
+            status_keys = [f"cabinet:status:{cabinet_id}" for cabinet_id in cabinet_ids]
+            statuses = self.redis_conn.mget(status_keys)
+
+            pipe = self.redis_conn.pipeline(transaction=True)
+            for status_key, status in zip(status_keys, statuses):
+                if not status:
+                    continue
+                status = status.decode('utf-8') if isinstance(status, bytes) else status
+                state, _, student_number = status.partition(':')
+                if state == 'renting':
+                    continue
+                if student_number:
+                    pipe.delete(f"cabinet:user_rental:{student_number}")
+                pipe.delete(status_key)
+            pipe.execute()
+            logger.debug(f"사물함 대여 상태 정리 완료: {cabinet_ids}")
+        except Exception as e:
+            logger.error(f"사물함 대여 상태 정리 중 오류 발생: {str(e)}")
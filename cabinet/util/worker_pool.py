@@ -94,17 +94,8 @@ class CabinetThreadPool:
         if task_id is None:
             task_id = f"rental-{int(time.time())}-{cabinet_id}-{student_number}"
             
-        redis_conn = get_redis_connection("default")
-        processing_key = f"cabinet:processing:{cabinet_id}"
-        
         try:
-            # 이전 작업 결과가 있으면 삭제
-            AsyncResultManager.delete_result(task_id)
-            
-            # 처리 중으로 표시 (이미 설정되어 있지 않은 경우만)
-            if not redis_conn.get(processing_key):
-                redis_conn.set(processing_key, student_number, ex=15)
-            
+            # 처리 중 상태는 대여 요청 시 선점됨 (CabinetRentalState.claim_rent)
             # 작업 큐에 추가
             self.task_queue.put((self._process_rental, (cabinet_id, student_number, task_id), {}))
             logger.info(f"사물함 {cabinet_id} 대여 작업이 큐에 추가됨 (작업 ID: {task_id})")
@@ -115,29 +106,10 @@ class CabinetThreadPool:
     
     def _process_rental(self, cabinet_id, student_number, task_id):
         """Process a cabinet rental in this thread and store the result"""
-        redis_conn = get_redis_connection("default")
-        processing_key = f"cabinet:processing:{cabinet_id}"
-        
-        try:
-            from cabinet.business.cabinet_service import CabinetService
-            cabinet_service = CabinetService()
-            cabinet_service.rent_cabinet(cabinet_id, student_number)
-            # 성공 결과 저장
-            AsyncResultManager.set_result(task_id, {
-                "status": "success",
-                "cabinet_id": cabinet_id,
-                "student_number": student_number,
-                "message": f"사물함 {cabinet_id} 대여 성공"
-            })
-            logger.info(f"사물함 {cabinet_id} 대여 성공 (학번: {student_number})")
-            return True
-        except Exception as e:
-            # 실패 결과 저장
-            logger.error(f"Error in worker thread for cabinet {cabinet_id}: {str(e)}")
-            return self._handle_exception(e, cabinet_id, student_number, task_id)
-        finally:
-            # Clean up the processing key
-            redis_conn.delete(processing_key)
+        from cabinet.util.cabinet_rental_dispatcher import CabinetRentalDispatcher
+
+        result = CabinetRentalDispatcher.execute(cabinet_id, student_number, task_id)
+        return bool(result) and result.get("status") == "success"
 
     def _process_return(self, cabinet_id, student_number, task_id):
         """스레드에서 사물함 반납 처리"""
@@ -180,38 +152,3 @@ class CabinetThreadPool:
         finally:
             # 처리 키 삭제
             redis_conn.delete(processing_key)
-
-    def _handle_exception(self, exception, cabinet_id, student_number, task_id):
-        """예외 정보를 저장하는 헬퍼 메서드"""
-        from core.exception.base import ApplicationError
-        from cabinet.util.cabinet_async_result_manager import AsyncResultManager
-        
-        # 로그 기록
-        logger.error(f"Error in cabinet operation (ID: {cabinet_id}): {str(exception)}")
-        
-        # 예외 정보 구성
-        error_info = {
-            "status": "error",
-            "cabinet_id": cabinet_id,
-            "student_number": student_number,
-        }
-        
-        # 예외 클래스 정보 저장 (모듈 경로와 클래스명)
-        error_info["exception_module"] = exception.__class__.__module__
-        error_info["exception_class"] = exception.__class__.__name__
-        error_info["message"] = str(exception)
-        
-        # ApplicationError 상속 클래스인 경우 추가 정보 포함
-        if hasattr(exception, 'error_code'):
-            error_info["error_code"] = getattr(exception, 'error_code', 'unknown_error')
-        
-        if hasattr(exception, 'status_code'):
-            error_info["status_code"] = getattr(exception, 'status_code', 500)
-        
-        # 디테일 정보가 있으면 포함
-        if hasattr(exception, 'details'):
-            error_info["details"] = getattr(exception, 'details', None)
-        
-        # 결과 저장
-        AsyncResultManager.set_result(task_id, error_info)
-        return False  # 작업 실패 반환
\ No newline at end of file
@@ -2,6 +2,7 @@ from __future__ import absolute_import, unicode_literals
 import os
 from celery import Celery
 from datetime import timedelta
+from django.conf import settings
 
 # Django 설정 모듈 지정
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'univ_cabi.settings')
@@ -18,27 +19,23 @@ app.autodiscover_tasks(['cabinet'])
 def debug_task(self):
     print(f'Request: {self.request!r}')
 
-# 기존 스케줄 유지 (필요한 경우)
-app.conf.beat_schedule.update({
-    'process-cabinet-rental': {
-        'task': 'cabinet.util.cabinet_celery_task.process_cabinet_rental',
-        'schedule': timedelta(seconds=10),
+# 북마크 동기화는 고정 주기로 실행하지 않고, 짧은 주기로 변경 목록을 확인해
+# 변경 수/대기 시간 기준을 넘었을 때만 예약 (BookmarkSyncScheduler)
+# 사물함 대여 처리(process_cabinet_rental)는 요청마다 인자와 함께 전달되므로 주기 실행하지 않음
+app.conf.beat_schedule = {
+    'schedule-bookmark-sync': {
+        'task': 'cabinet.util.cabinet_celery_task.schedule_bookmark_sync',
+        'schedule': timedelta(seconds=getattr(settings, 'BOOKMARK_SYNC_CHECK_INTERVAL', 2)),
         'options': {
-            'queue': 'cabinet_operations',
+            # 밀린 확인 작업은 의미가 없으므로 다음 주기 전에 만료
+            'expires': getattr(settings, 'BOOKMARK_SYNC_CHECK_INTERVAL', 2),
         }
     },
-})
-
-# 5초마다 북마크 동기화 실행 스케줄 설정
-app.conf.beat_schedule = {
-    'sync-bookmarks-every-5-seconds': {
-        'task': 'cabinet.util.cabinet_celery_task.sync_bookmarks_to_database',
-        'schedule': timedelta(seconds=5),
-    },
 }
 
 # 기존 작업 유지
 app.conf.task_routes = {
     'cabinet.util.cabinet_celery_task.process_cabinet_rental': {'queue': 'cabinet_operations'},
     'cabinet.util.cabinet_celery_task.sync_bookmarks_to_database': {'queue': 'cabinet_operations'},
+    'cabinet.util.cabinet_celery_task.schedule_bookmark_sync': {'queue': 'cabinet_operations'},
 }
\ No newline at end of file
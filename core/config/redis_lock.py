@@ -34,6 +34,25 @@ class RedisLock:
             return True
         return False
 
+    def extend(self, expire_time=None):
+        """Reset the lock TTL if it's still owned by us (for long-running holders)"""
+        if not self.acquired:
+            return False
+        script = """
+        if redis.call('get', KEYS[1]) == ARGV[1] then
+            return redis.call('expire', KEYS[1], ARGV[2])
+        else
+            return 0
+        end
+        """
+        extended = self.redis_conn.eval(
+            script, 1, self.lock_name, self.identifier, expire_time or self.expire_time
+        )
+        if not extended:
+            # Lock expired and may have been taken by another holder
+            self.acquired = False
+        return bool(extended)
+
     def __enter__(self):
         self.acquire()
         return self
@@ -0,0 +1,136 @@
+import hashlib
+import json
+import logging
+from django.conf import settings
+from django_redis import get_redis_connection
+
+from core.util.ttl_lru_cache import TTLLRUCache
+
+logger = logging.getLogger(__name__)
+
+
+class AuthPrincipal:
+    """
+    인증된 요청 사용자 (authns 행 대신 사용하는 가벼운 객체)
+
+    뷰와 권한 클래스에서 사용하는 id, user_id_id, student_number, role, is_active만 가집니다.
+    """
+    __slots__ = ('id', 'user_id_id', 'student_number', 'role', 'is_active')
+
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, id, user_id_id, student_number, role, is_active=True):
+        self.id = id
+        self.user_id_id = user_id_id
+        self.student_number = student_number
+        self.role = role
+        self.is_active = is_active
+
+    @property
+    def pk(self):
+        return self.id
+
+    @classmethod
+    def from_authn(cls, authn):
+        return cls(
+            id=authn.id,
+            user_id_id=authn.user_id_id,
+            student_number=authn.student_number,
+            role=authn.role,
+            is_active=authn.is_active,
+        )
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    def __str__(self):
+        return self.student_number
+
+
+class AuthPrincipalCache:
+    """
+    토큰의 암호화된 student_number 클레임 -> AuthPrincipal 캐시
+
+    프로세스 로컬 LRU를 먼저 조회하고, 없으면 Redis 공유 캐시를 조회합니다.
+    사용자 삭제나 권한 변경 시 invalidate()로 Redis 항목을 지우며,
+    다른 프로세스의 로컬 캐시는 짧은 TTL이 지나면 만료됩니다.
+
+    - authn:principal:{클레임 해시}           : principal JSON
+    - authn:principal:claims:{student_number} : 사용자별 클레임 해시 집합 (무효화용)
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(AuthPrincipalCache, cls).__new__(cls)
+            cls._instance.init()
+        return cls._instance
+
+    def init(self):
+        self.local_cache = TTLLRUCache(
+            maxsize=getattr(settings, 'AUTH_PRINCIPAL_LOCAL_MAXSIZE', 10000),
+            ttl=getattr(settings, 'AUTH_PRINCIPAL_LOCAL_TTL', 30),
+        )
+        self.redis_ttl = getattr(settings, 'AUTH_PRINCIPAL_REDIS_TTL', 300)
+        self.key_prefix = "authn:principal:"
+
+    @staticmethod
+    def _hash_claim(claim):
+        return hashlib.sha256(claim.encode()).hexdigest()
+
+    def _get_principal_key(self, claim_hash):
+        return f"{self.key_prefix}{claim_hash}"
+
+    def _get_claims_key(self, student_number):
+        return f"{self.key_prefix}claims:{student_number}"
+
+    def get(self, claim):
+        """캐시된 principal 조회 (없으면 None)"""
+        claim_hash = self._hash_claim(claim)
+        principal = self.local_cache.get(claim_hash)
+        if principal is not None:
+            return principal
+
+        try:
+            raw = get_redis_connection("default").get(self._get_principal_key(claim_hash))
+        except Exception as e:
+            logger.error(f"인증 사용자 캐시 조회 중 오류: {str(e)}")
+            return None
+
+        if not raw:
+            return None
+
+        principal = AuthPrincipal(**json.loads(raw))
+        self.local_cache.set(claim_hash, principal)
+        return principal
+
+    def set(self, claim, principal):
+        """principal 저장 (로컬 + Redis)"""
+        claim_hash = self._hash_claim(claim)
+        self.local_cache.set(claim_hash, principal)
+        try:
+            claims_key = self._get_claims_key(principal.student_number)
+            pipeline = get_redis_connection("default").pipeline()
+            pipeline.set(self._get_principal_key(claim_hash), json.dumps(principal.to_dict()), ex=self.redis_ttl)
+            pipeline.sadd(claims_key, claim_hash)
+            pipeline.expire(claims_key, self.redis_ttl)
+            pipeline.execute()
+        except Exception as e:
+            logger.error(f"인증 사용자 캐시 저장 중 오류: {str(e)}")
+
+    def invalidate(self, student_number):
+        """사용자의 캐시된 principal 모두 삭제"""
+        self.local_cache.delete_where(lambda _, principal: principal.student_number == student_number)
+        try:
+            redis_conn = get_redis_connection("default")
+            claims_key = self._get_claims_key(student_number)
+            claim_hashes = redis_conn.smembers(claims_key)
+            keys = [
+                self._get_principal_key(claim_hash.decode() if isinstance(claim_hash, bytes) else claim_hash)
+                for claim_hash in claim_hashes
+            ]
+            redis_conn.delete(claims_key, *keys)
+            logger.debug(f"인증 사용자 캐시 삭제: {student_number} ({len(keys)}개)")
+        except Exception as e:
+            logger.error(f"인증 사용자 캐시 삭제 중 오류: {str(e)}")
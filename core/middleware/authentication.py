@@ -9,7 +9,9 @@ from django.contrib.auth.hashers import check_password
 import jwt
 from rest_framework_simplejwt.exceptions import TokenError
 
+from core.middleware.auth_principal import AuthPrincipal, AuthPrincipalCache
 from core.middleware.jwt import decrypt_student_number
+from core.middleware.token_version import TokenVersionStore
 import logging
 
 logger = logging.getLogger(__name__)
@@ -44,7 +46,6 @@ class IsValidRefreshToken(JWTStatelessUserAuthentication):
         # RefreshToken 객체 생성 시 예외 발생 가능
         try:
             refresh = RefreshToken(refresh_token)
-            return (None, refresh)  # (user, auth)에서 user는 None
         except TokenError as e:
             logger.error(f"Token error: {str(e)}")
             raise AuthenticationFailed(
@@ -90,6 +91,28 @@ class IsValidRefreshToken(JWTStatelessUserAuthentication):
                 code='token_not_valid'
             )
 
+        # 토큰 버전이 바뀐 사용자(삭제, 권한 변경)의 refresh token으로는 재발급하지 않음
+        if self._is_revoked(refresh):
+            raise AuthenticationFailed(_("Token has been revoked"), code="token_revoked")
+        return (None, refresh)  # (user, auth)에서 user는 None
+
+    @staticmethod
+    def _is_revoked(refresh):
+        """
+        token_version 클레임이 현재 버전과 다르면 True
+
+        클레임이 없는 이전 토큰은 False, 사용자가 없거나 확인에 실패하면 True입니다.
+        """
+        token_version = refresh.get('token_version')
+        if token_version is None or refresh.get('student_number') is None:
+            return False
+        try:
+            student_number = decrypt_student_number(refresh['student_number'])
+            return token_version != TokenVersionStore().get(student_number)
+        except Exception as e:
+            logger.error(f"Failed to check refresh token version: {str(e)}")
+            return True
+
 class IsLoginUser(JWTAuthentication):
     def get_user(self, validated_token):
         if 'student_number' not in validated_token:
@@ -101,9 +124,22 @@ class IsLoginUser(JWTAuthentication):
             logger.error("student_number is None in token.")
             raise AuthenticationFailed(_("Token contained no recognizable user identification"), code="token_not_valid")
         
-        # student_number 복호화
+        # 캐시된 사용자가 있으면 복호화와 DB 조회 생략
+        principal_cache = AuthPrincipalCache()
+        principal = principal_cache.get(student_number)
+        if principal is None:
+            principal = AuthPrincipal.from_authn(self._get_authn(student_number, validated_token.get('exp')))
+            principal_cache.set(student_number, principal)
+
+        if not principal.is_active:
+            logger.warning(f"User {principal} is inactive.")
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        return principal
+
+    def _get_authn(self, student_number, expires_at=None):
+        # student_number 복호화 (토큰 만료 시각까지 결과 메모)
         try:
-            decoded_student_number = decrypt_student_number(student_number)
+            decoded_student_number = decrypt_student_number(student_number, expires_at=expires_at)
             logger.debug(f"Decoded student_number: {decoded_student_number}")
         except Exception as e:
             logger.error(f"Failed to decrypt student number: {str(e)}")
@@ -111,19 +147,51 @@ class IsLoginUser(JWTAuthentication):
         
         # 사용자 조회
         try:
-            user = authns.objects.get(student_number=decoded_student_number)
-            if not user.is_active:
-                logger.warning(f"User {user} is inactive.")
-                raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
-            return user
+            return authns.objects.get(student_number=decoded_student_number)
         except authns.DoesNotExist:
             logger.warning(f"User with student_number {decoded_student_number} not found.")
             raise AuthenticationFailed(_("User not found"), code="user_not_found")
 
+class IsStatelessLoginUser(IsLoginUser):
+    """
+    토큰 클레임만으로 사용자를 구성하는 인증 (조회 API용)
+
+    user_id, role, token_version 클레임이 있는 토큰은 현재 토큰 버전(캐시 우선, 없으면 DB)만 확인하고
+    authns 조회 없이 AuthPrincipal을 만듭니다.
+    클레임이 없는 이전 토큰은 IsLoginUser 방식으로 인증합니다.
+    """
+    stateless_claims = ('student_number', 'user_id', 'role', 'token_version')
+
+    def get_user(self, validated_token):
+        if any(validated_token.get(claim) is None for claim in self.stateless_claims):
+            return super().get_user(validated_token)
+
+        try:
+            student_number = decrypt_student_number(validated_token['student_number'], expires_at=validated_token.get('exp'))
+        except Exception as e:
+            logger.error(f"Failed to decrypt student number: {str(e)}")
+            raise AuthenticationFailed(_("Failed to decrypt student number."), code="token_decryption_failed")
+
+        current_version = TokenVersionStore().get(student_number)
+        if current_version is None:
+            logger.warning(f"User with student_number {student_number} not found.")
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if validated_token['token_version'] != current_version:
+            logger.warning(f"Revoked token used by {student_number}.")
+            raise AuthenticationFailed(_("Token has been revoked"), code="token_revoked")
+
+        return AuthPrincipal(
+            id=None,
+            user_id_id=validated_token['user_id'],
+            student_number=student_number,
+            role=validated_token['role'],
+        )
+
 class IsAdminUser(IsLoginUser):
     def get_user(self, validated_token):
         user = super().get_user(validated_token)
         if user.role != 'ADMIN':
             logger.warning(f"User {user} is not an admin.")
             raise AuthenticationFailed(_("User is not an admin"), code="user_not_admin")
-        return user
\ No newline at end of file
+        return user
@@ -1,11 +1,21 @@
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 import os
+import time
 
 from cryptography.fernet import Fernet
 
+from core.util.ttl_lru_cache import TTLLRUCache
+
 key = os.environ.get('SECRET_ENCRYPTION_KEY')
 cipher_suite = Fernet(key)
 
+# 복호화 결과 메모 (암호문 -> 평문), 토큰 만료 시각까지만 보관
+DECRYPT_CACHE_TTL = int(os.environ.get('STUDENT_NUMBER_DECRYPT_CACHE_TTL', 24 * 60 * 60))
+decrypt_cache = TTLLRUCache(
+    maxsize=int(os.environ.get('STUDENT_NUMBER_DECRYPT_CACHE_SIZE', 10000)),
+    ttl=DECRYPT_CACHE_TTL,
+)
+
 # student_number를 hash 시켜서 담습니다
 class CustomLoginJwtToken(TokenObtainPairSerializer):
     @classmethod
@@ -15,11 +25,16 @@ class CustomLoginJwtToken(TokenObtainPairSerializer):
 
         # Customize the token payload to include student_number instead of user_id
 
-        print('token:', token)
         # Optionally, remove user_id if you don't want it
         if 'student_number' in token:
             token['student_number'] = encrypt_student_number(user.student_number)
-            
+
+        # 인증 시 authns 조회 없이 사용자를 구성할 수 있도록 서명된 클레임 추가
+        # (access token은 refresh token의 클레임을 그대로 이어받음)
+        token['user_id'] = user.user_id_id
+        token['role'] = user.role
+        token['token_version'] = user.token_version
+
         return token
     
 
@@ -28,6 +43,18 @@ def encrypt_student_number(plain_text):
     """주어진 평문을 암호화하여 반환"""
     return cipher_suite.encrypt(plain_text.encode()).decode()
 
-def decrypt_student_number(encrypted_text):
-    """암호화된 텍스트를 복호화하여 반환"""
-    return cipher_suite.decrypt(encrypted_text.encode()).decode()
+def decrypt_student_number(encrypted_text, expires_at=None):
+    """
+    암호화된 텍스트를 복호화하여 반환
+
+    같은 토큰은 만료될 때까지 같은 암호문을 가지므로 결과를 메모합니다.
+    expires_at(토큰 exp, epoch 초)이 주어지면 그 시각까지만 보관합니다.
+    """
+    plain_text = decrypt_cache.get(encrypted_text)
+    if plain_text is not None:
+        return plain_text
+
+    plain_text = cipher_suite.decrypt(encrypted_text.encode()).decode()
+    ttl = DECRYPT_CACHE_TTL if expires_at is None else int(expires_at - time.time())
+    decrypt_cache.set(encrypted_text, plain_text, ttl=ttl)
+    return plain_text
@@ -0,0 +1,79 @@
+import logging
+from django.conf import settings
+from django_redis import get_redis_connection
+
+from authn.models import authns
+
+logger = logging.getLogger(__name__)
+
+# KEYS: 토큰 버전 / ARGV: 버전, TTL
+# 버전은 증가만 하므로 캐시된 값보다 클 때만 저장
+# (변경 커밋 전에 DB를 읽은 요청이 이전 버전으로 캐시를 덮어쓰지 못하게 함)
+SET_VERSION_IF_NEWER_SCRIPT = """
+local cached = redis.call('GET', KEYS[1])
+if cached and tonumber(cached) >= tonumber(ARGV[1]) then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+return 1
+"""
+
+
+class TokenVersionStore:
+    """
+    사용자별 토큰 버전 캐시 (토큰 무효화용)
+
+    현재 버전은 authns.token_version 컬럼에 저장하고 Redis에는 조회용 캐시만 둡니다.
+    캐시에 없거나 Redis 오류 시에는 DB에서 읽으므로, 키가 만료되거나 지워져도
+    이전에 발급된 토큰이 다시 유효해지지 않습니다.
+
+    - authn:token_version:{student_number} : 현재 토큰 버전 (TTL 적용)
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(TokenVersionStore, cls).__new__(cls)
+            cls._instance.init()
+        return cls._instance
+
+    def init(self):
+        self.key_prefix = "authn:token_version:"
+        self.cache_ttl = getattr(settings, 'TOKEN_VERSION_CACHE_TTL', 60)
+
+    def _get_version_key(self, student_number):
+        return f"{self.key_prefix}{student_number}"
+
+    def get(self, student_number):
+        """현재 토큰 버전 조회 (캐시 우선, 없으면 DB 조회 후 캐시 / 사용자가 없으면 None)"""
+        try:
+            raw = get_redis_connection("default").get(self._get_version_key(student_number))
+        except Exception as e:
+            logger.error(f"토큰 버전 캐시 조회 중 오류, DB 조회: {str(e)}")
+            return self._get_from_db(student_number)
+
+        if raw is not None:
+            return int(raw)
+
+        version = self._get_from_db(student_number)
+        if version is not None:
+            self.set(student_number, version)
+        return version
+
+    def _get_from_db(self, student_number):
+        return authns.objects.filter(
+            student_number=student_number
+        ).values_list('token_version', flat=True).first()
+
+    def set(self, student_number, version):
+        """토큰 버전 캐시 (캐시된 버전보다 클 때만 저장, 오류는 기록만 함)"""
+        try:
+            get_redis_connection("default").eval(
+                SET_VERSION_IF_NEWER_SCRIPT, 1, self._get_version_key(student_number), version, self.cache_ttl
+            )
+        except Exception as e:
+            logger.error(f"토큰 버전 캐시 저장 중 오류: {str(e)}")
+
+    def invalidate(self, student_number):
+        """캐시된 토큰 버전 삭제 (Redis 오류는 호출자에게 전달)"""
+        get_redis_connection("default").delete(self._get_version_key(student_number))
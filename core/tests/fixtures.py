@@ -0,0 +1,103 @@
+import importlib
+import uuid
+from unittest import mock
+
+import fakeredis
+from django.test import override_settings
+from django_redis import get_redis_connection
+
+from authn.models import authns
+from building.models import buildings
+from building.type.BuildingNameEnum import BuildingNameEnum
+from cabinet.models import cabinets
+from cabinet.type import CabinetStatusEnum, CabinetPayableEnum
+from cabinet.util.cabinet_rental_state import CabinetRentalState
+from user.models import users
+
+
+class CabinetFixtureMixin:
+    """
+    테스트 공통 데이터 생성 헬퍼 (TestCase와 함께 상속)
+
+    가온관 건물, 학번을 이름/전화번호로 쓰는 사용자(+ 인증 정보), 사물함을 같은 형식으로 생성합니다.
+    """
+
+    def create_building(self, floor=1):
+        return buildings.objects.create(
+            name=BuildingNameEnum.가온관.value,
+            floor=floor,
+            section="A",
+            width=100,
+            height=100
+        )
+
+    def create_user(self, student_number, building=None, with_authn=True, **authn_fields):
+        """사용자 생성 (with_authn이면 같은 학번의 인증 정보도 생성)"""
+        user = users.objects.create(
+            name=str(student_number),
+            affiliation="Test Affiliation",
+            phone_number=f"010-{student_number}",
+            building_id=building or self.building
+        )
+        if with_authn:
+            authns.objects.create(user_id=user, student_number=str(student_number), password="testpassword", **authn_fields)
+        return user
+
+    def create_cabinet(self, cabinet_number, building=None, user=None, status=CabinetStatusEnum.AVAILABLE.value,
+                       payable=CabinetPayableEnum.FREE.value):
+        return cabinets.objects.create(
+            building_id=building or self.building,
+            user_id=user,
+            cabinet_number=cabinet_number,
+            status=status,
+            payable=payable
+        )
+
+
+class FakeRedisMixin:
+    """
+    fakeredis 기반 Redis 테스트 헬퍼 (TestCase와 함께 상속, setUp에서 super().setUp() 호출)
+
+    테스트마다 새 FakeServer를 쓰도록 django_redis 연결 설정(CACHES)을 바꾸므로
+    get_redis_connection("default")를 쓰는 코드가 그대로 동작합니다 (Lua 스크립트 포함).
+    연결을 보관하는 싱글톤은 테스트 전후로 초기화하고,
+    모듈 수준 Redis 저장소 인스턴스는 테스트 동안 fakeredis 연결을 쓰는 새 인스턴스로 바꿉니다.
+    """
+    redis_singletons = (CabinetRentalState,)
+    redis_module_instances = (
+        ('cabinet.business.cabinet_service', 'cabinet_floor_map_redis_repository'),
+        ('cabinet.business.cabinet_bookmark_service', 'cabinet_bookmark_redis_repository'),
+        ('cabinet.business.cabinet_bookmark_service', 'cabinet_status_index_redis_repository'),
+    )
+
+    def setUp(self):
+        super().setUp()
+        self.redis_server = fakeredis.FakeServer()
+        # django_redis는 URL별로 연결 풀을 재사용하므로 테스트마다 다른 URL 사용
+        redis_settings = override_settings(CACHES={
+            "default": {
+                "BACKEND": "django_redis.cache.RedisCache",
+                "LOCATION": f"redis://fakeredis-{uuid.uuid4().hex}/0",
+                "OPTIONS": {
+                    "CLIENT_CLASS": "django_redis.client.DefaultClient",
+                    "CONNECTION_POOL_KWARGS": {
+                        "connection_class": fakeredis.FakeConnection,
+                        "server": self.redis_server,
+                    },
+                },
+            }
+        })
+        redis_settings.enable()
+        self.addCleanup(redis_settings.disable)
+        self._reset_redis_singletons()
+        self.addCleanup(self._reset_redis_singletons)
+        for module_name, attribute in self.redis_module_instances:
+            module = importlib.import_module(module_name)
+            patcher = mock.patch.object(module, attribute, type(getattr(module, attribute))())
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.redis_conn = get_redis_connection("default")
+
+    def _reset_redis_singletons(self):
+        for singleton in self.redis_singletons:
+            singleton._instance = None
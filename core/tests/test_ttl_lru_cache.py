@@ -0,0 +1,157 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from core.middleware import jwt
+from core.util.ttl_lru_cache import TTLLRUCache
+
+
+class FakeClock:
+    """time.monotonic / time.time 대체 (advance로 시간 이동)"""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class TTLLRUCacheTest(SimpleTestCase):
+    """프로세스 로컬 TTL + LRU 캐시 테스트"""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch('core.util.ttl_lru_cache.time.monotonic', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_entry_expires_after_ttl(self):
+        """항목은 지정한 ttl(기본 ttl 이하)이 지나면 조회되지 않아야 함"""
+        cache = TTLLRUCache(maxsize=10, ttl=60)
+        cache.set('short', 1, ttl=5)
+        cache.set('capped', 2, ttl=600)
+
+        self.clock.advance(4.9)
+        self.assertEqual(cache.get('short'), 1)
+        self.clock.advance(0.1)
+        self.assertIsNone(cache.get('short'))
+
+        # 기본 ttl보다 긴 ttl은 기본 ttl로 제한
+        self.clock.advance(55)
+        self.assertIsNone(cache.get('capped'))
+        self.assertEqual(len(cache), 0)
+
+    def test_non_positive_ttl_is_not_stored(self):
+        """이미 만료된 항목(ttl 0 이하)은 저장하지 않아야 함"""
+        cache = TTLLRUCache(maxsize=10, ttl=60)
+        cache.set('expired', 1, ttl=0)
+        cache.set('past', 2, ttl=-30)
+        self.assertEqual(len(cache), 0)
+
+    def test_lru_eviction_at_maxsize(self):
+        """가득 차면 가장 오래 사용하지 않은 항목부터 제거해야 함"""
+        cache = TTLLRUCache(maxsize=3, ttl=60)
+        for key in ('a', 'b', 'c'):
+            cache.set(key, key)
+        # a를 사용하여 b가 가장 오래 사용하지 않은 항목이 됨
+        self.assertEqual(cache.get('a'), 'a')
+
+        cache.set('d', 'd')
+
+        self.assertEqual(len(cache), 3)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual([cache.get(key) for key in ('a', 'c', 'd')], ['a', 'c', 'd'])
+
+    def test_delete_where(self):
+        """조건에 맞는 항목만 제거해야 함"""
+        cache = TTLLRUCache(maxsize=10, ttl=60)
+        for number in range(4):
+            cache.set(number, number % 2)
+        cache.delete_where(lambda _, value: value == 1)
+        self.assertEqual([cache.get(number) for number in range(4)], [0, None, 0, None])
+
+    def test_concurrent_access(self):
+        """여러 스레드가 동시에 읽고 쓰고 지워도 오류 없이 maxsize를 지켜야 함"""
+        cache = TTLLRUCache(maxsize=50, ttl=60)
+        start = threading.Barrier(8)
+
+        def worker(worker_id):
+            start.wait()
+            for number in range(2000):
+                key = (worker_id * 7 + number) % 200
+                cache.set(key, key)
+                value = cache.get(key)
+                # 다른 스레드가 제거했을 수는 있지만 다른 값이 보이면 안 됨
+                assert value in (None, key)
+                if number % 50 == 0:
+                    cache.delete_where(lambda cached_key, _: cached_key % 10 == worker_id)
+            return True
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(worker, range(8)))
+
+        self.assertEqual(results, [True] * 8)
+        self.assertLessEqual(len(cache), 50)
+
+
+class DecryptStudentNumberCacheTest(SimpleTestCase):
+    """student_number 클레임 복호화 메모 테스트"""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        for target in ('core.util.ttl_lru_cache.time.monotonic', 'core.middleware.jwt.time.time'):
+            patcher = mock.patch(target, self.clock)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        jwt.decrypt_cache.clear()
+        self.addCleanup(jwt.decrypt_cache.clear)
+        self.encrypted = jwt.encrypt_student_number("20240001")
+        patcher = mock.patch.object(jwt.cipher_suite, 'decrypt', wraps=jwt.cipher_suite.decrypt)
+        self.decrypt = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_memo_hit_skips_decryption(self):
+        """같은 암호문의 두 번째 복호화는 메모된 결과를 사용해야 함"""
+        expires_at = self.clock() + 300
+        self.assertEqual(jwt.decrypt_student_number(self.encrypted, expires_at=expires_at), "20240001")
+        self.assertEqual(jwt.decrypt_student_number(self.encrypted, expires_at=expires_at), "20240001")
+        self.assertEqual(self.decrypt.call_count, 1)
+
+    def test_memo_expires_at_token_exp(self):
+        """메모는 토큰 만료 시각(exp)까지만 유지되어야 함"""
+        expires_at = self.clock() + 10
+        jwt.decrypt_student_number(self.encrypted, expires_at=expires_at)
+
+        self.clock.advance(9)
+        jwt.decrypt_student_number(self.encrypted, expires_at=expires_at)
+        self.assertEqual(self.decrypt.call_count, 1)
+
+        self.clock.advance(1)
+        jwt.decrypt_student_number(self.encrypted, expires_at=expires_at)
+        self.assertEqual(self.decrypt.call_count, 2)
+
+    def test_expired_token_is_not_memoized(self):
+        """이미 만료된 토큰의 복호화 결과는 메모하지 않아야 함"""
+        jwt.decrypt_student_number(self.encrypted, expires_at=self.clock() - 1)
+        self.assertEqual(len(jwt.decrypt_cache), 0)
+
+    def test_concurrent_decryption(self):
+        """여러 스레드가 동시에 복호화해도 모두 같은 결과를 받아야 함"""
+        tokens = [jwt.encrypt_student_number(f"2024{number:04d}") for number in range(20)]
+        expires_at = self.clock() + 300
+
+        def worker(index):
+            token_index = index % len(tokens)
+            return token_index, jwt.decrypt_student_number(tokens[token_index], expires_at=expires_at)
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(worker, range(400)))
+
+        for token_index, plain_text in results:
+            self.assertEqual(plain_text, f"2024{token_index:04d}")
+        self.assertEqual(len(jwt.decrypt_cache), len(tokens))
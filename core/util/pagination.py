@@ -1,6 +1,18 @@
+import hashlib
+import logging
+
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from django.core import signing
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
 from django.db import models
+from django.db.models import F, Q
+from django_redis import get_redis_connection
+
+from core.exception.exceptions import GlobalDtoValidationException
+
+logger = logging.getLogger(__name__)
 
 
 # 페이지네이션 클래스 정의
@@ -13,103 +25,253 @@ class CabinetPagination(PageNumberPagination):
 def paginate_data(data, request, pagination_class=CabinetPagination, transform_func=None, serialized_data=None):
     """
     데이터를 페이지네이션하는 전역 유틸리티 함수
-    
+
+    QuerySet은 paginate_queryset을 사용하면 현재 페이지만 조회/직렬화합니다.
+    잘못된 페이지 요청은 예외(404)로 처리합니다.
+
     Args:
         data (QuerySet or list): 페이지네이션할 데이터
         request (HttpRequest): HTTP 요청 객체
         pagination_class (Pagination): 사용할 페이지네이션 클래스 (기본값: CabinetPagination)
         transform_func (callable, optional): 각 객체를 변환하는 함수
         serialized_data (list, optional): 이미 직렬화된 데이터 (transform_func 대신 사용)
-    
+
     Returns:
         Response: 페이지네이션된 응답
     """
-    # 페이지 크기 파라미터 확인
-    page_size = request.query_params.get('pageSize')
-    if page_size and page_size.isdigit():
-        request.query_params._mutable = True
-        request.query_params[pagination_class.page_size_query_param] = page_size
-        request.query_params._mutable = False
-    
-    # 페이지네이션 인스턴스 생성
     paginator = pagination_class()
-    
-    try:
-        # 이미 직렬화된 데이터가 제공된 경우
-        if serialized_data is not None:
-            # 직렬화된 데이터를 페이지네이션
-            page = paginator.paginate_queryset(serialized_data, request)
-            return paginator.get_paginated_response(page)
-            
-        # 모델 인스턴스인 경우, transform_func이 반드시 필요함
-        if (isinstance(data, models.Model) or 
-            (isinstance(data, list) and len(data) > 0 and isinstance(data[0], models.Model))):
-            if not callable(transform_func):
-                raise ValueError("Model instances require a transform_func to be serializable")
-                
-        # 원본 데이터를 페이지네이션
-        paginated_objects = paginator.paginate_queryset(data, request)
-        
-        # transform_func이 제공된 경우 데이터 변환
-        if transform_func and callable(transform_func):
-            results = [transform_func(obj) for obj in paginated_objects]
+
+    # 이미 직렬화된 데이터가 제공된 경우
+    if serialized_data is not None:
+        page = paginator.paginate_queryset(serialized_data, request)
+        return paginator.get_paginated_response(page)
+
+    # 모델 인스턴스인 경우, transform_func이 반드시 필요함
+    if (isinstance(data, models.Model) or
+        (isinstance(data, list) and len(data) > 0 and isinstance(data[0], models.Model))):
+        if not callable(transform_func):
+            raise ValueError("Model instances require a transform_func to be serializable")
+
+    # 원본 데이터를 페이지네이션
+    paginated_objects = paginator.paginate_queryset(data, request)
+
+    # transform_func이 제공된 경우 데이터 변환
+    if transform_func and callable(transform_func):
+        results = [transform_func(obj) for obj in paginated_objects]
+    else:
+        results = paginated_objects
+
+    # 페이지네이션된 응답 반환
+    return paginator.get_paginated_response(results)
+
+
+def _reverse_ordering(ordering):
+    return tuple(field[1:] if field.startswith('-') else f'-{field}' for field in ordering)
+
+
+def _get_ordering_expressions(ordering):
+    """정렬 키를 정렬 식으로 변환 (내림차순은 NULL 먼저, 오름차순은 NULL 마지막으로 DB와 무관하게 고정)"""
+    return [
+        F(field[1:]).desc(nulls_first=True) if field.startswith('-') else F(field).asc(nulls_last=True)
+        for field in ordering
+    ]
+
+
+def _get_keyset_filter(ordering, values):
+    """
+    마지막 행의 정렬 키 값(values) 이후의 행만 남기는 조건
+
+    (a, b, id) 순서라면 a 이후 OR (a 같음 AND b 이후) OR (a, b 같음 AND id 이후)로 구성합니다.
+    """
+    keyset_filter = Q(pk__in=[])
+    prefix = Q()
+    for field, value in zip(ordering, values):
+        descending = field.startswith('-')
+        name = field.lstrip('-')
+        if descending:
+            # 내림차순(NULL 먼저): NULL 다음은 NULL이 아닌 모든 값
+            after = Q(**{f'{name}__isnull': False}) if value is None else Q(**{f'{name}__lt': value})
         else:
-            results = paginated_objects
-            
-        # 페이지네이션된 응답 반환
-        return paginator.get_paginated_response(results)
-        
-    except Exception as e:
-        # 에러 로깅
-        print(f"Pagination error: {str(e)}")
-        
-        # 에러 발생 시 기본 응답 생성
+            # 오름차순(NULL 마지막): NULL 다음에는 더 이상 값이 없음
+            after = None if value is None else Q(**{f'{name}__gt': value}) | Q(**{f'{name}__isnull': True})
+        if after is not None:
+            keyset_filter |= prefix & after
+        prefix &= Q(**{f'{name}__isnull': True}) if value is None else Q(**{name: value})
+    return keyset_filter
+
+
+class KeysetCursorPagination:
+    """
+    키셋(커서) 페이지네이션
+
+    정렬 키(ordering) 기준으로 커서 위치 이후의 행만 LIMIT으로 조회하므로
+    OFFSET 방식과 달리 깊은 페이지도 첫 페이지와 같은 비용으로 조회됩니다.
+
+    - 정렬 키의 마지막 필드는 고유해야 합니다 (예: ('id',), ('-ended_at', '-id')).
+    - 커서는 서명된 불투명 문자열로, 정렬 키 값과 방향(다음/이전)을 담습니다.
+    - count_mode: None이면 전체 개수를 세지 않고, 'exact'는 매번 COUNT,
+      'cached'는 같은 조건의 COUNT 결과를 Redis에 count_cache_ttl초 동안 보관한 근사값을 사용합니다.
+    """
+    page_size = 10
+    page_size_query_param = 'pageSize'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    ordering = ('id',)
+    count_mode = None
+    count_cache_ttl = 60
+    cursor_salt = 'core.util.pagination.cursor'
+
+    NEXT = 'n'
+    PREVIOUS = 'p'
+
+    def __init__(self, ordering=None, count_mode=None, page_size=None):
+        if ordering is not None:
+            self.ordering = tuple(ordering)
+        if count_mode is not None:
+            self.count_mode = count_mode
+        if page_size is not None:
+            self.page_size = page_size
+
+    def get_page_size(self, request):
+        """pageSize 쿼리 파라미터 반영 (max_page_size 이내)"""
+        page_size = request.query_params.get(self.page_size_query_param)
+        if page_size and page_size.isdigit() and int(page_size) > 0:
+            return min(int(page_size), self.max_page_size)
+        return self.page_size
+
+    def _get_fields(self, model):
+        """정렬 키 필드 확인 (마지막 키가 고유하지 않으면 같은 값의 행이 누락/중복될 수 있으므로 거부)"""
+        try:
+            fields = [model._meta.get_field(field.lstrip('-')) for field in self.ordering]
+        except FieldDoesNotExist as e:
+            raise ImproperlyConfigured(f"Invalid cursor ordering {self.ordering}: {e}")
+        if not (fields[-1].primary_key or fields[-1].unique):
+            raise ImproperlyConfigured(f"Cursor ordering {self.ordering} must end with a unique field")
+        return fields
+
+    def encode_cursor(self, direction, row):
+        values = [getattr(row, field.attname) for field in self.fields]
+        # datetime은 마이크로초까지 유지되도록 isoformat으로 변환
+        values = [value.isoformat() if hasattr(value, 'isoformat') else value for value in values]
+        return signing.dumps([direction, values], salt=self.cursor_salt, compress=True)
+
+    def decode_cursor(self, cursor):
+        """커서 문자열을 (방향, 정렬 키 값 목록)으로 변환 (빈 커서는 첫 페이지)"""
+        if not cursor:
+            return self.NEXT, None
         try:
-            # 페이지 크기 적용 (기본 30, 쿼리 파라미터 있으면 그 값 사용)
-            limit = int(page_size) if page_size and page_size.isdigit() else 12
-            limit = min(limit, 100)  # 최대 100개로 제한
-            
-            # 직렬화 방식에 따라 결과 준비
-            if serialized_data is not None:
-                results = serialized_data[:limit]
-            elif transform_func and callable(transform_func):
-                # 모델 인스턴스를 직렬화 가능한 형태로 변환
-                if isinstance(data, models.QuerySet) or (
-                    isinstance(data, list) and len(data) > 0 and isinstance(data[0], models.Model)
-                ):
-                    limited_data = data[:limit]
-                    results = [transform_func(obj) for obj in limited_data]
-                else:
-                    results = data[:limit]
-            else:
-                # 직렬화 불가능한 경우 빈 결과 반환
-                if isinstance(data, models.QuerySet) or (
-                    isinstance(data, list) and len(data) > 0 and isinstance(data[0], models.Model)
-                ):
-                    results = []
-                else:
-                    results = data[:limit]
-            
-            # 전체 항목 수 계산
-            if hasattr(data, '__len__'):
-                count = len(data)
-            elif hasattr(data, 'count') and callable(data.count):
-                count = data.count()
-            else:
-                count = len(results)
-                
-            # 기본 페이지네이션 형식으로 응답
-            return Response({
-                "count": count,
-                "next": None,
-                "previous": None,
-                "results": results
-            })
-        except Exception as fallback_error:
-            print(f"Critical pagination error: {str(fallback_error)}")
-            return Response({
-                "count": 0,
-                "next": None,
-                "previous": None,
-                "results": []
-            })
\ No newline at end of file
+            direction, values = signing.loads(cursor, salt=self.cursor_salt)
+            if direction not in (self.NEXT, self.PREVIOUS) or len(values) != len(self.fields):
+                raise ValueError("invalid cursor")
+            return direction, [
+                None if value is None else field.to_python(value)
+                for field, value in zip(self.fields, values)
+            ]
+        except Exception:
+            raise GlobalDtoValidationException({self.cursor_query_param: ['유효하지 않은 커서입니다.']})
+
+    def paginate_queryset(self, queryset, request):
+        """현재 페이지의 행 목록 반환 (page_size + 1개만 조회하여 다음 페이지 여부 판단)"""
+        self.request = request
+        self.fields = self._get_fields(queryset.model)
+        page_size = self.get_page_size(request)
+        direction, values = self.decode_cursor(request.query_params.get(self.cursor_query_param))
+
+        # 이전 페이지는 정렬을 뒤집어 커서 이전 행을 조회한 뒤 다시 뒤집음
+        ordering = self.ordering if direction == self.NEXT else _reverse_ordering(self.ordering)
+        page_queryset = queryset.order_by(*_get_ordering_expressions(ordering))
+        if values is not None:
+            page_queryset = page_queryset.filter(_get_keyset_filter(ordering, values))
+
+        rows = list(page_queryset[:page_size + 1])
+        has_more = len(rows) > page_size
+        page = rows[:page_size]
+        if direction == self.NEXT:
+            self.has_next, self.has_previous = has_more, values is not None
+        else:
+            page.reverse()
+            self.has_next, self.has_previous = True, has_more
+
+        self.page = page
+        self.count = self.get_count(queryset)
+        return page
+
+    def get_count(self, queryset):
+        if not self.count_mode:
+            return None
+        queryset = queryset.order_by()
+        if self.count_mode != 'cached':
+            return queryset.count()
+
+        sql, params = queryset.query.sql_with_params()
+        key = f"pagination:count:{hashlib.sha1(f'{sql}{params}'.encode()).hexdigest()}"
+        try:
+            redis_conn = get_redis_connection("default")
+            cached = redis_conn.get(key)
+            if cached is not None:
+                return int(cached)
+            count = queryset.count()
+            redis_conn.set(key, count, ex=self.count_cache_ttl)
+            return count
+        except Exception as e:
+            logger.error(f"페이지네이션 개수 캐시 처리 중 오류: {str(e)}")
+            return queryset.count()
+
+    def _get_link(self, direction, row):
+        url = replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, self.encode_cursor(direction, row))
+        return remove_query_param(url, 'page')
+
+    def get_next_link(self):
+        if not (self.has_next and self.page):
+            return None
+        return self._get_link(self.NEXT, self.page[-1])
+
+    def get_previous_link(self):
+        if not (self.has_previous and self.page):
+            return None
+        return self._get_link(self.PREVIOUS, self.page[0])
+
+    def get_paginated_response(self, data):
+        response = {}
+        if self.count is not None:
+            response["count"] = self.count
+        response.update({
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data
+        })
+        return Response(response)
+
+
+def paginate_queryset(queryset, request, serializer_class, ordering=('id',), pagination_class=CabinetPagination,
+                      context=None, cursor_pagination_class=KeysetCursorPagination, count_mode=None):
+    """
+    QuerySet을 DB에서 페이지 단위로 잘라 현재 페이지만 직렬화하는 전역 유틸리티 함수
+
+    - cursor 쿼리 파라미터가 있으면 KeysetCursorPagination으로 처리합니다.
+      빈 cursor로 첫 페이지를 요청하며, 응답의 next/previous에 커서가 포함됩니다.
+    - 없으면 기존과 같은 page/pageSize 응답 형식을 유지하되 LIMIT/OFFSET으로 현재 페이지만 조회합니다.
+
+    Args:
+        queryset (QuerySet): 페이지네이션할 QuerySet
+        request (HttpRequest): HTTP 요청 객체
+        serializer_class (Serializer): 현재 페이지 직렬화에 사용할 시리얼라이저
+        ordering (tuple): 정렬 키 ('-'는 내림차순, 마지막 키는 고유), 예: ('id',), ('-ended_at', '-id')
+        pagination_class (Pagination): page 방식 페이지네이션 클래스
+        context (dict, optional): 시리얼라이저 context
+        cursor_pagination_class (class): 커서 방식 페이지네이션 클래스
+        count_mode (str, optional): 커서 방식의 전체 개수 계산 방식 (None, 'exact', 'cached')
+
+    Returns:
+        Response: 페이지네이션된 응답
+    """
+    context = context or {'request': request}
+
+    if cursor_pagination_class.cursor_query_param in request.query_params:
+        paginator = cursor_pagination_class(ordering=ordering, count_mode=count_mode)
+    else:
+        queryset = queryset.order_by(*_get_ordering_expressions(ordering))
+        paginator = pagination_class()
+
+    page = paginator.paginate_queryset(queryset, request)
+    return paginator.get_paginated_response(serializer_class(page, many=True, context=context).data)
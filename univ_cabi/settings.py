@@ -149,6 +149,14 @@ SIMPLE_JWT = {
     
 }
 
+# 인증 사용자(AuthPrincipal) 캐시: 프로세스 로컬 LRU 최대 항목 수와 TTL(초), Redis 공유 캐시 TTL(초)
+AUTH_PRINCIPAL_LOCAL_MAXSIZE = env.int('AUTH_PRINCIPAL_LOCAL_MAXSIZE', default=10000)
+AUTH_PRINCIPAL_LOCAL_TTL = env.int('AUTH_PRINCIPAL_LOCAL_TTL', default=30)
+AUTH_PRINCIPAL_REDIS_TTL = env.int('AUTH_PRINCIPAL_REDIS_TTL', default=300)
+
+# 토큰 버전 Redis 캐시 TTL(초), 원본은 authns.token_version
+TOKEN_VERSION_CACHE_TTL = env.int('TOKEN_VERSION_CACHE_TTL', default=60)
+
 #JWT_MIDDLEWARE_EXCLUDED_PATHS = [
 #    r'^/authn/login/$',
 #    #r'^/authn/signup/$',
@@ -236,6 +244,31 @@ CACHES = {
     }
 }
 
+# 사물함 대여 작업 처리 백엔드 (thread_pool, celery, kafka, batch 중 하나만 사용)
+CABINET_RENTAL_BACKEND = env('CABINET_RENTAL_BACKEND', default='thread_pool')
+
+# 층별 사물함 배치도(CabinetInfoView) Redis 캐시 사용 여부
+CABINET_FLOOR_MAP_CACHE_ENABLED = env.bool('CABINET_FLOOR_MAP_CACHE_ENABLED', default=True)
+
+# 대여 DB 반영 시 동시성 제어 방식 (redis: RedisLock, db: select_for_update 행 잠금)
+CABINET_RENTAL_LOCK_MODE = env('CABINET_RENTAL_LOCK_MODE', default='redis')
+
+# batch 백엔드: 대여 요청을 모아 한 트랜잭션으로 반영하는 주기(ms)와 최대 건수
+CABINET_RENTAL_BATCH_INTERVAL_MS = env.int('CABINET_RENTAL_BATCH_INTERVAL_MS', default=5)
+CABINET_RENTAL_BATCH_SIZE = env.int('CABINET_RENTAL_BATCH_SIZE', default=200)
+
+# 북마크 Redis -> DB 동기화: 청크당 최대 건수와 1회 실행당 최대 청크 수
+BOOKMARK_SYNC_CHUNK_SIZE = env.int('BOOKMARK_SYNC_CHUNK_SIZE', default=500)
+BOOKMARK_SYNC_MAX_CHUNKS = env.int('BOOKMARK_SYNC_MAX_CHUNKS', default=20)
+
+# 북마크 동기화 적응형 스케줄링: 확인 주기(초), 즉시 동기화 기준 변경 수, 최대 대기 시간(초),
+# 지연으로 판단할 처리 시간(ms), 최대 지연 시간(초)
+BOOKMARK_SYNC_CHECK_INTERVAL = env.int('BOOKMARK_SYNC_CHECK_INTERVAL', default=2)
+BOOKMARK_SYNC_TRIGGER_SIZE = env.int('BOOKMARK_SYNC_TRIGGER_SIZE', default=100)
+BOOKMARK_SYNC_MAX_LAG = env.int('BOOKMARK_SYNC_MAX_LAG', default=30)
+BOOKMARK_SYNC_SLOW_MS = env.int('BOOKMARK_SYNC_SLOW_MS', default=5000)
+BOOKMARK_SYNC_MAX_BACKOFF = env.int('BOOKMARK_SYNC_MAX_BACKOFF', default=60)
+
 # Kafka settings
 KAFKA_BOOTSTRAP_SERVERS = 'localhost:9092'
 KAFKA_CABINET_RENTAL_TOPIC = 'cabinet-rental-requests'
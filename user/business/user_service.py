@@ -1,10 +1,56 @@
+from django.db import transaction
+
+from cabinet.persistence.cabinet_floor_map_redis_repository import CabinetFloorMapRedisRepository
+from user.exceptions import UserNotFoundException
 from user.persistence.user_repository import UserRepository
+from user.persistence.user_profile_redis_repository import UserProfileRedisRepository
 
 user_repository = UserRepository()
 
 class UserService :
     def get_user_by_student_number(self, student_number) :
         return user_repository.get_user_by_student_number(student_number)
+
+    def get_profile(self, student_number, user_id=None) :
+        """프로필 + 현재 대여 정보 조회 (캐시 우선, 없으면 한 번의 조인 쿼리로 조회 후 캐시)"""
+        if user_id is None:
+            user = user_repository.get_user_by_student_number(student_number)
+            if not user:
+                raise UserNotFoundException(student_number=student_number)
+            user_id = user.id
+
+        profile_cache = UserProfileRedisRepository()
+        profile = profile_cache.get_profile(user_id)
+        if profile is not None:
+            return profile
+
+        profile = user_repository.get_profile_by_user_id(user_id)
+        if profile is None:
+            raise UserNotFoundException(student_number=student_number)
+        profile_cache.set_profile(user_id, profile)
+        return profile
     
-    def update_user_is_visible_by_student_number(self, student_number, is_visible) :
-        return user_repository.update_user_is_visible_by_student_number(student_number, is_visible)
\ No newline at end of file
+    def update_user_is_visible_by_student_number(self, student_number, is_visible, user_id=None) :
+        """
+        이름 공개 여부 변경 (요청 사용자 행만 변경)
+
+        커밋 후 프로필 캐시를 삭제하고, 사용 중인 사물함이 있으면 캐시된 배치도의 해당 항목만 갱신합니다.
+        """
+        updated_user_id, rent_cabinet = user_repository.update_user_is_visible_by_student_number(
+            student_number, is_visible, user_id
+        )
+        if updated_user_id is None:
+            raise UserNotFoundException(student_number=student_number)
+
+        def on_commit():
+            UserProfileRedisRepository().invalidate([updated_user_id])
+            if rent_cabinet:
+                CabinetFloorMapRedisRepository().patch_owner_visibility(
+                    building_id=rent_cabinet['building_id'],
+                    cabinet_id=rent_cabinet['id'],
+                    owner_id=rent_cabinet['user_id'],
+                    is_visible=is_visible,
+                    username=rent_cabinet['user_id__name'],
+                )
+        transaction.on_commit(on_commit)
+        return rent_cabinet['id'] if rent_cabinet else None
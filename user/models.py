@@ -28,4 +28,4 @@ class users(models.Model):
     @classmethod
     def update_user_is_visible_by_student_number(cls, student_number, is_visible):
         
-        return cls.objects.update(is_visible=is_visible, updated_at=timezone.now())
\ No newline at end of file
+        return cls.objects.filter(authn_info__student_number=student_number).update(is_visible=is_visible, updated_at=timezone.now())
\ No newline at end of file
@@ -0,0 +1,53 @@
+from django_redis import get_redis_connection
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+class UserProfileRedisRepository:
+    """
+    사용자 프로필 + 현재 대여 정보 캐시
+
+    user:profile:{user_id} 키에 프로필과 현재 대여 사물함 요약(rent_cabinet)을 JSON으로 저장하여
+    /user/me 조회를 캐시 한 번으로 처리합니다.
+    대여/반납/상태 변경 시 CabinetRepository가, 프로필 변경 시 UserService가 커밋 후 해당 사용자 항목을 삭제합니다.
+    """
+
+    def __init__(self):
+        self.redis_conn = get_redis_connection("default")
+        self.key_prefix = "user:profile:"
+        # 1시간 = 3600초
+        self.ttl = 3600
+
+    def _get_profile_key(self, user_id):
+        return f"{self.key_prefix}{user_id}"
+
+    def get_profile(self, user_id):
+        """캐시된 프로필 조회 (없거나 Redis 오류 시 None)"""
+        try:
+            raw = self.redis_conn.get(self._get_profile_key(user_id))
+        except Exception as e:
+            logger.error(f"사용자 프로필 캐시 조회 중 오류 발생: {str(e)}")
+            return None
+
+        if not raw:
+            return None
+        return json.loads(raw)
+
+    def set_profile(self, user_id, profile):
+        """프로필 저장"""
+        try:
+            self.redis_conn.set(self._get_profile_key(user_id), json.dumps(profile), ex=self.ttl)
+        except Exception as e:
+            logger.error(f"사용자 프로필 캐시 저장 중 오류 발생: {str(e)}")
+
+    def invalidate(self, user_ids):
+        """변경된 사용자 프로필 삭제"""
+        user_ids = {user_id for user_id in user_ids if user_id is not None}
+        if not user_ids:
+            return
+        try:
+            self.redis_conn.delete(*[self._get_profile_key(user_id) for user_id in user_ids])
+            logger.debug(f"사용자 프로필 캐시 삭제: {user_ids}")
+        except Exception as e:
+            logger.error(f"사용자 프로필 캐시 삭제 중 오류 발생: {str(e)}")
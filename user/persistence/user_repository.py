@@ -1,11 +1,80 @@
 
 from user.models import users
+from cabinet.models import cabinets
 
+from django.db.models import F, FilteredRelation, Q
 from django.utils import timezone
 
 class UserRepository:
     def get_user_by_student_number(self, student_number):
         return users.objects.filter(authn_info__student_number=student_number).first()
-    
-    def update_user_is_visible_by_student_number(self, student_number, is_visible):
-        return users.objects.update(is_visible=is_visible, updated_at=timezone.now())
\ No newline at end of file
+
+    def get_users_by_ids(self, user_ids):
+        return users.objects.filter(id__in=user_ids)
+
+    def get_profile_by_user_id(self, user_id):
+        """
+        프로필과 현재 대여 정보를 하나의 조인 쿼리로 조회 (사용자가 없으면 None)
+
+        인증 정보, 사용 중인 사물함과 건물, 해당 사물함의 진행 중인 대여 이력을 LEFT JOIN하며
+        날짜는 캐시에 저장할 수 있도록 ISO 형식 문자열로 반환합니다.
+        """
+        row = users.objects.filter(id=user_id).annotate(
+            active_history=FilteredRelation(
+                'cabinet_histories',
+                condition=Q(cabinet_histories__ended_at__isnull=True, cabinet_histories__cabinet_id=F('cabinets__id'))
+            )
+        ).values(
+            'name', 'affiliation', 'is_visible', 'phone_number', 'authn_info__student_number',
+            'cabinets__id', 'cabinets__cabinet_number', 'cabinets__status',
+            'cabinets__building_id__name', 'cabinets__building_id__floor',
+            'active_history__created_at', 'active_history__expired_at'
+        ).order_by('cabinets__id', '-active_history__created_at').first()
+
+        if row is None:
+            return None
+
+        rent_cabinet = None
+        if row['cabinets__id'] is not None:
+            started_at = row['active_history__created_at']
+            expired_at = row['active_history__expired_at']
+            rent_cabinet = {
+                'building': row['cabinets__building_id__name'],
+                'floor': row['cabinets__building_id__floor'],
+                'cabinet_number': row['cabinets__cabinet_number'],
+                'status': row['cabinets__status'],
+                'start_date': started_at.isoformat() if started_at else None,
+                'end_date': expired_at.isoformat() if expired_at else None,
+            }
+
+        return {
+            'name': row['name'],
+            'affiliation': row['affiliation'],
+            'is_visible': row['is_visible'],
+            'student_number': row['authn_info__student_number'],
+            'phone_number': row['phone_number'],
+            'rent_cabinet': rent_cabinet,
+        }
+
+    def update_user_is_visible_by_student_number(self, student_number, is_visible, user_id=None):
+        """
+        요청 사용자 한 명의 이름 공개 여부만 변경
+
+        변경된 사용자 ID(없으면 None)와 사용자가 사용 중인 사물함 정보
+        (id, building_id, user_id, user_id__name, 없으면 None)를 반환합니다.
+        """
+        if user_id is None:
+            user_id = users.objects.filter(
+                authn_info__student_number=student_number
+            ).values_list('id', flat=True).first()
+            if user_id is None:
+                return None, None
+
+        updated = users.objects.filter(id=user_id).update(is_visible=is_visible, updated_at=timezone.now())
+        if not updated:
+            return None, None
+
+        rent_cabinet = cabinets.objects.filter(
+            user_id=user_id
+        ).values('id', 'building_id', 'user_id', 'user_id__name').order_by('id').first()
+        return user_id, rent_cabinet
\ No newline at end of file
@@ -12,7 +12,7 @@ from rest_framework import status
 from drf_yasg.utils       import swagger_auto_schema
 from drf_yasg             import openapi
 
-from core.middleware.authentication import IsLoginUser, IsAdminUser
+from core.middleware.authentication import IsStatelessLoginUser, IsAdminUser
 from ..serializers import GetProfileMeSerializer
 from ..models import users
 from authn.models import authns
@@ -36,7 +36,7 @@ user_service = UserService()
 
 class UserProfileMeView(APIView):
     permission_classes = [IsAuthenticated]
-    authentication_classes = [IsLoginUser]
+    authentication_classes = [IsStatelessLoginUser]
     
     @swagger_auto_schema(
         tags=['회원 본인 프로필 조회'],
@@ -69,9 +69,9 @@ class UserProfileMeView(APIView):
         }
     )
     def get(self, request):
-            user = user_service.get_user_by_student_number(request.user.student_number)        
-            
-            serializer = GetProfileMeSerializer(user)
+            profile = user_service.get_profile(request.user.student_number, user_id=request.user.user_id_id)
+
+            serializer = GetProfileMeSerializer(profile)
             return Response(serializer.data, status=status.HTTP_200_OK)
 
     @swagger_auto_schema(
@@ -112,7 +112,11 @@ class UserProfileMeView(APIView):
     def post(self, request):
 
         dto = UserProfileUpdateDto.create_validated(data=request.data)
-        user_service.update_user_is_visible_by_student_number(student_number=request.user.student_number, is_visible=dto.validated_data['isVisible'])
+        user_service.update_user_is_visible_by_student_number(
+            student_number=request.user.student_number,
+            is_visible=dto.validated_data['isVisible'],
+            user_id=request.user.user_id_id
+        )
         return Response({'message': 'User updated successfully'}, status=status.HTTP_200_OK)
 
 
@@ -1,59 +1,47 @@
 from rest_framework import serializers
 from datetime import datetime
-from .models import users
-from cabinet.models import cabinets, cabinet_histories
-from authn.models import authns
 
 from univ_cabi.utils import CamelCaseSerializer
 
 import pytz  # Add this import for timezone handling
 
 class GetProfileMeSerializer(CamelCaseSerializer):
+    """UserService.get_profile()이 반환한 프로필(캐시 또는 조인 쿼리 결과)을 응답 형식으로 변환"""
     name = serializers.CharField(help_text='이름')
     affiliation = serializers.CharField(help_text='소속')
     isVisible = serializers.BooleanField(source='is_visible', help_text='이름 공개 여부')
-    studentNumber = serializers.IntegerField(source='authn_info.student_number', help_text='학번')
+    studentNumber = serializers.IntegerField(source='student_number', help_text='학번')
     phoneNumber = serializers.CharField(source='phone_number', help_text='전화번호')
     rentCabinetInfo = serializers.SerializerMethodField(help_text='캐비넷 정보')
-
-    class Meta:
-        model = users
-        fields = ['name', 'isVisible', 'affiliation', 'studentNumber', 'phoneNumber', 'rentCabinetInfo']
     
     def get_rentCabinetInfo(self, obj):
-        cabinet = cabinets.objects.filter(user_id=obj.id).first()
-        if not cabinet:
+        rent_cabinet = obj.get('rent_cabinet')
+        if not rent_cabinet:
             return None
 
-        try:
-            cabinet_history = cabinet_histories.objects.filter(cabinet_id=cabinet.id).latest('expired_at')
-        except cabinet_histories.DoesNotExist:
-            cabinet_history = None
-
         # Make current_time timezone-aware
         current_time = datetime.now(pytz.UTC)
 
-        # Calculate leftDate
+        # Calculate leftDate (캐시된 값이 오래되지 않도록 조회 시점에 계산)
         left_date = None
-        if cabinet_history and cabinet_history.expired_at:
+        if rent_cabinet['end_date']:
             # Make expired_at timezone-aware if it isn't already
-            expired_at = cabinet_history.expired_at
+            expired_at = datetime.fromisoformat(rent_cabinet['end_date'])
             if expired_at.tzinfo is None:
                 expired_at = pytz.UTC.localize(expired_at)
             
             left_date = (expired_at - current_time).days
 
         return {
-            'building': cabinet.building_id.name,
-            'floor': cabinet.building_id.floor,
-            'cabinetNumber': cabinet.cabinet_number,
-            'status': cabinet.status,
-            'startDate': cabinet_history.created_at if cabinet_history else None,
-            'endDate': cabinet_history.expired_at if cabinet_history else None,
+            'building': rent_cabinet['building'],
+            'floor': rent_cabinet['floor'],
+            'cabinetNumber': rent_cabinet['cabinet_number'],
+            'status': rent_cabinet['status'],
+            'startDate': rent_cabinet['start_date'],
+            'endDate': rent_cabinet['end_date'],
             'leftDate': left_date
         }
 
 
 class UserUpdateProfileMeSerializer(serializers.Serializer):
     isVisible = serializers.BooleanField(help_text='이름 공개 여부')
-
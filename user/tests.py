@@ -1,3 +1,82 @@
+import datetime
+
 from django.test import TestCase
+from django.utils import timezone
+
+from cabinet.models import cabinet_histories
+from cabinet.persistence.cabinet_floor_map_redis_repository import CabinetFloorMapRedisRepository
+from cabinet.type import CabinetStatusEnum
+from core.tests.fixtures import CabinetFixtureMixin, FakeRedisMixin
+from user.business.user_service import UserService
+from user.exceptions import UserNotFoundException
+from user.models import users
+
+
+class UserProfileQueryTest(FakeRedisMixin, CabinetFixtureMixin, TestCase):
+    """프로필(현재 대여 정보) 조회 테스트 (fakeredis)"""
+
+    def setUp(self):
+        super().setUp()
+        self.building = self.create_building()
+        self.user = self.create_user("20240001")
+        self.cabinet = self.create_cabinet(7, user=self.user, status=CabinetStatusEnum.USING.value)
+        # 이전 사용자의 종료된 이력은 현재 대여 정보에 포함되지 않아야 함
+        cabinet_histories.objects.create(
+            user_id=self.user, cabinet_id=self.cabinet,
+            expired_at=timezone.now() + datetime.timedelta(days=365), ended_at=timezone.now()
+        )
+        self.active_history = cabinet_histories.objects.create(
+            user_id=self.user, cabinet_id=self.cabinet, expired_at=timezone.now() + datetime.timedelta(days=30)
+        )
+
+    def test_profile_loads_in_single_query(self):
+        """프로필과 현재 대여 정보를 한 번의 쿼리로 조회해야 함"""
+        with self.assertNumQueries(1):
+            profile = UserService().get_profile("20240001", user_id=self.user.id)
+
+        self.assertEqual(profile['student_number'], "20240001")
+        self.assertEqual(profile['rent_cabinet']['cabinet_number'], 7)
+        self.assertEqual(profile['rent_cabinet']['end_date'], self.active_history.expired_at.isoformat())
+
+    def test_cached_profile_skips_db(self):
+        """두 번째 조회는 캐시에서 같은 프로필을 반환하고 DB를 조회하지 않아야 함"""
+        profile = UserService().get_profile("20240001", user_id=self.user.id)
+        self.assertTrue(self.redis_conn.exists(f"user:profile:{self.user.id}"))
+
+        with self.assertNumQueries(0):
+            self.assertEqual(UserService().get_profile("20240001", user_id=self.user.id), profile)
+
+    def test_visibility_update_touches_only_caller(self):
+        """이름 공개 여부 변경은 요청 사용자 행만 바꾸고 사용 중인 사물함 ID를 반환해야 함"""
+        other = self.create_user("20240002", with_authn=False)
+
+        cabinet_id = UserService().update_user_is_visible_by_student_number("20240001", False, user_id=self.user.id)
+
+        self.assertEqual(cabinet_id, self.cabinet.id)
+        self.assertFalse(users.objects.get(id=self.user.id).is_visible)
+        self.assertTrue(users.objects.get(id=other.id).is_visible)
+
+    def test_visibility_update_by_student_number_refreshes_caches(self):
+        """학번으로 변경해도 커밋 후 프로필 캐시를 삭제하고 캐시된 배치도 항목을 갱신해야 함"""
+        floor_map_repository = CabinetFloorMapRedisRepository()
+        _, versions = floor_map_repository.get_floor_maps([self.building.id])
+        floor_map_repository.set_floor_maps({self.building.id: [
+            {'id': self.cabinet.id, 'ownerId': self.user.id, 'isVisible': True, 'username': self.user.name},
+        ]}, versions)
+        self.assertTrue(UserService().get_profile("20240001", user_id=self.user.id)['is_visible'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            cabinet_id = UserService().update_user_is_visible_by_student_number("20240001", False)
+
+        self.assertEqual(cabinet_id, self.cabinet.id)
+        self.assertFalse(self.redis_conn.exists(f"user:profile:{self.user.id}"))
+        self.assertFalse(UserService().get_profile("20240001", user_id=self.user.id)['is_visible'])
+        entry = floor_map_repository.get_floor_maps([self.building.id])[0][self.building.id][0]
+        self.assertFalse(entry['isVisible'])
+        self.assertEqual(entry['username'], self.user.name)
 
-# Create your tests here.
+    def test_visibility_update_unknown_student_number(self):
+        """없는 학번이면 아무 행도 바꾸지 않고 UserNotFoundException이 발생해야 함"""
+        with self.assertRaises(UserNotFoundException):
+            UserService().update_user_is_visible_by_student_number("20249999", False)
+        self.assertTrue(users.objects.get(id=self.user.id).is_visible)